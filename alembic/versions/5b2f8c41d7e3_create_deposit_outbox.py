@@ -0,0 +1,66 @@
+"""create deposit outbox
+
+Revision ID: 5b2f8c41d7e3
+Revises: 1937e2f7ef66
+Create Date: 2026-10-18 10:12:44.203518
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.types import UInt128Numeric
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2f8c41d7e3"
+down_revision: Union[str, Sequence[str], None] = "1937e2f7ef66"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "deposit_outbox",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("deposit_id", sa.String(), nullable=False),
+        sa.Column("transfer_id", UInt128Numeric(precision=39, scale=0), nullable=False),
+        sa.Column("credit_account_id", UInt128Numeric(precision=39, scale=0), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["deposit_id"],
+            ["deposits.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("deposit_id"),
+        sa.UniqueConstraint("transfer_id"),
+    )
+    # Workers only ever scan the unprocessed tail.
+    op.create_index(
+        "ix_deposit_outbox_unprocessed",
+        "deposit_outbox",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_deposit_outbox_unprocessed",
+        table_name="deposit_outbox",
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+    op.drop_table("deposit_outbox")
@@ -0,0 +1,51 @@
+"""index pending and per-user deposits
+
+Revision ID: 8e3a6f0c2b91
+Revises: 5b2f8c41d7e3
+Create Date: 2026-10-18 11:40:02.518934
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8e3a6f0c2b91"
+down_revision: Union[str, Sequence[str], None] = "5b2f8c41d7e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps callbacks writing during the build; it can't run in a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_deposits_pending_created_at",
+            "deposits",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("status = 'PENDING_CALLBACK'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_deposits_user_id_created_at",
+            "deposits",
+            ["user_id", "created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_deposits_user_id_created_at", table_name="deposits", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_deposits_pending_created_at", table_name="deposits", postgresql_concurrently=True
+        )
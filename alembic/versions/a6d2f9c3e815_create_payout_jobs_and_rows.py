@@ -0,0 +1,84 @@
+"""create payout jobs and rows
+
+Revision ID: a6d2f9c3e815
+Revises: f3a8d2c6b017
+Create Date: 2026-10-18 19:02:31.507214
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.types import UInt128Bytes
+
+# revision identifiers, used by Alembic.
+revision: str = "a6d2f9c3e815"
+down_revision: Union[str, Sequence[str], None] = "f3a8d2c6b017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "payout_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("source_account_id", UInt128Bytes(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("next_row", sa.BigInteger(), server_default="1", nullable=False),
+        sa.Column("posted", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("failed", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.CheckConstraint(
+            "octet_length(source_account_id) = 16", name="payout_jobs_source_account_id_len_check"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "payout_rows",
+        sa.Column("job_id", sa.String(), nullable=False),
+        sa.Column("row_no", sa.BigInteger(), nullable=False),
+        sa.Column("recipient", sa.String(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=True),
+        sa.Column("fee", sa.BigInteger(), nullable=True),
+        sa.Column("transfer_id", UInt128Bytes(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["job_id"],
+            ["payout_jobs.id"],
+        ),
+        sa.PrimaryKeyConstraint("job_id", "row_no"),
+    )
+    # Failures are what gets looked at after a run; the rest is only ever counted.
+    op.create_index(
+        "ix_payout_rows_failed",
+        "payout_rows",
+        ["job_id", "row_no"],
+        unique=False,
+        postgresql_where=sa.text("status = 'FAILED'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_payout_rows_failed",
+        table_name="payout_rows",
+        postgresql_where=sa.text("status = 'FAILED'"),
+    )
+    op.drop_table("payout_rows")
+    op.drop_table("payout_jobs")
@@ -0,0 +1,69 @@
+"""create deposit holds
+
+Revision ID: b83e5a1f7c20
+Revises: a6d2f9c3e815
+Create Date: 2026-10-18 21:14:09.318842
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.db.types import UInt128Bytes
+
+# revision identifiers, used by Alembic.
+revision: str = "b83e5a1f7c20"
+down_revision: Union[str, Sequence[str], None] = "a6d2f9c3e815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "deposit_holds",
+        sa.Column("deposit_id", sa.String(), nullable=False),
+        sa.Column("pending_id", UInt128Bytes(), nullable=False),
+        sa.Column("credit_account_id", UInt128Bytes(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("released_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("resolution", sa.String(), nullable=True),
+        sa.CheckConstraint(
+            "octet_length(pending_id) = 16", name="deposit_holds_pending_id_len_check"
+        ),
+        sa.CheckConstraint(
+            "octet_length(credit_account_id) = 16", name="deposit_holds_credit_account_id_len_check"
+        ),
+        sa.ForeignKeyConstraint(
+            ["deposit_id"],
+            ["deposit_keys.id"],
+        ),
+        sa.PrimaryKeyConstraint("deposit_id"),
+        sa.UniqueConstraint("pending_id"),
+    )
+    op.create_index(
+        "ix_deposit_holds_open_expires_at",
+        "deposit_holds",
+        ["expires_at"],
+        unique=False,
+        postgresql_where=sa.text("released_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_deposit_holds_open_expires_at",
+        table_name="deposit_holds",
+        postgresql_where=sa.text("released_at IS NULL"),
+    )
+    op.drop_table("deposit_holds")
@@ -0,0 +1,153 @@
+"""store uint128 ids as bytea
+
+Revision ID: c4d19a7e5f02
+Revises: 8e3a6f0c2b91
+Create Date: 2026-10-18 13:05:51.774120
+
+Online conversion of NUMERIC(39,0) id columns to 16-byte big-endian bytea:
+
+1. add a nullable shadow column and a trigger that keeps it in sync on writes
+2. backfill existing rows in short keyset batches (each its own transaction)
+3. build the unique index CONCURRENTLY and prove NOT NULL with a validated CHECK
+4. swap the columns in one short transaction (no table rewrite, no scan)
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d19a7e5f02"
+down_revision: Union[str, Sequence[str], None] = "8e3a6f0c2b91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 10_000
+
+# table -> (keyset column, [(column, unique constraint name or None)])
+CONVERSIONS = {
+    "users": ("id", [("tb_account_id", "users_tb_account_id_key")]),
+    "deposit_outbox": (
+        "id",
+        [("transfer_id", "deposit_outbox_transfer_id_key"), ("credit_account_id", None)],
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION u128_numeric_to_bytea(n numeric) RETURNS bytea
+        LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+        DECLARE
+            out bytea := '\\x00000000000000000000000000000000'::bytea;
+        BEGIN
+            FOR i IN REVERSE 15..0 LOOP
+                out := set_byte(out, i, mod(n, 256)::int);
+                n := div(n, 256);
+            END LOOP;
+            RETURN out;
+        END $$
+    """)
+
+    for table, (key, columns) in CONVERSIONS.items():
+        assignments = "\n".join(f"NEW.{c}_b := u128_numeric_to_bytea(NEW.{c});" for c, _ in columns)
+        for column, _ in columns:
+            op.add_column(table, sa.Column(f"{column}_b", sa.LargeBinary(), nullable=True))
+        op.execute(f"""
+            CREATE FUNCTION {table}_u128_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                {assignments}
+                RETURN NEW;
+            END $$
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_u128_sync BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_u128_sync()
+        """)
+
+    # Everything below commits as it goes, so no lock is held for long.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        for table, (key, columns) in CONVERSIONS.items():
+            sets = ", ".join(f"{c}_b = u128_numeric_to_bytea({c})" for c, _ in columns)
+            backfill = """
+                WITH batch AS (
+                    SELECT {key} FROM {table} {keyset} ORDER BY {key} LIMIT :n
+                ), done AS (
+                    UPDATE {table} t SET {sets} FROM batch
+                    WHERE t.{key} = batch.{key} RETURNING t.{key}
+                )
+                SELECT max({key}) FROM done
+            """
+            params: dict = {"n": BACKFILL_BATCH}
+            keyset = ""
+            while True:
+                last = conn.execute(
+                    sa.text(backfill.format(key=key, table=table, keyset=keyset, sets=sets)),
+                    params,
+                ).scalar()
+                if last is None:
+                    break
+                params["after"] = last
+                keyset = f"WHERE {key} > :after"
+
+            for column, unique in columns:
+                op.execute(f"""
+                    ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_b_not_null
+                    CHECK ({column}_b IS NOT NULL) NOT VALID
+                """)
+                op.execute(f"""
+                    ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_len_check
+                    CHECK (octet_length({column}_b) = 16) NOT VALID
+                """)
+                # VALIDATE only takes SHARE UPDATE EXCLUSIVE; writes keep going.
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_b_not_null")
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_len_check")
+                if unique:
+                    op.execute(
+                        f"CREATE UNIQUE INDEX CONCURRENTLY {unique}_b ON {table} ({column}_b)"
+                    )
+
+    for table, (key, columns) in CONVERSIONS.items():
+        op.execute(f"DROP TRIGGER {table}_u128_sync ON {table}")
+        op.execute(f"DROP FUNCTION {table}_u128_sync()")
+        for column, unique in columns:
+            # The validated CHECK lets SET NOT NULL skip its table scan.
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column}_b SET NOT NULL")
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_b_not_null")
+            op.drop_column(table, column)
+            op.alter_column(table, f"{column}_b", new_column_name=column)
+            if unique:
+                op.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {unique} UNIQUE USING INDEX {unique}_b"
+                )
+    op.execute("DROP FUNCTION u128_numeric_to_bytea(numeric)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Offline: rewrites the tables under an exclusive lock.
+    op.execute("""
+        CREATE FUNCTION u128_bytea_to_numeric(b bytea) RETURNS numeric
+        LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+        DECLARE
+            n numeric := 0;
+        BEGIN
+            FOR i IN 0..15 LOOP
+                n := n * 256 + get_byte(b, i);
+            END LOOP;
+            RETURN n;
+        END $$
+    """)
+    for table, (key, columns) in CONVERSIONS.items():
+        for column, _ in columns:
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_len_check")
+            op.execute(f"""
+                ALTER TABLE {table} ALTER COLUMN {column} TYPE NUMERIC(39, 0)
+                USING u128_bytea_to_numeric({column})
+            """)
+    op.execute("DROP FUNCTION u128_bytea_to_numeric(bytea)")
@@ -0,0 +1,115 @@
+"""create deposit callbacks log
+
+Revision ID: e71b3c9d4a68
+Revises: c4d19a7e5f02
+Create Date: 2026-10-18 14:21:09.385512
+
+Raw callback payloads move from deposits.raw_callback_json into an append-only,
+monthly partitioned deposit_callbacks table. Existing payloads are moved in short
+batches (copied and cleared by one statement each); the old column stays, empty,
+until a later release drops it.
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+from app.db.partitions import (
+    add_months,
+    default_partition_ddl,
+    monthly_partition_ddl,
+    months_between,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "e71b3c9d4a68"
+down_revision: Union[str, Sequence[str], None] = "c4d19a7e5f02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MOVE_BATCH = 5_000
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "deposit_callbacks",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column(
+            "received_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("deposit_id", sa.String(), nullable=False),
+        sa.Column("checkout_request_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint("id", "received_at"),
+        postgresql_partition_by="RANGE (received_at)",
+    )
+    op.create_index(
+        "ix_deposit_callbacks_deposit_id",
+        "deposit_callbacks",
+        ["deposit_id", "received_at"],
+        unique=False,
+    )
+
+    # Partitions from the oldest payload we are about to move through a few months ahead.
+    conn = op.get_bind()
+    today = datetime.now(timezone.utc).date()
+    oldest = conn.execute(
+        sa.text("SELECT min(updated_at) FROM deposits WHERE raw_callback_json IS NOT NULL")
+    ).scalar()
+    first: date = oldest.astimezone(timezone.utc).date() if oldest is not None else today
+    for start in months_between(first, add_months(today, MONTHS_AHEAD)):
+        op.execute(monthly_partition_ddl("deposit_callbacks", start))
+    op.execute(default_partition_ddl("deposit_callbacks"))
+
+    # One short transaction per batch; callbacks keep flowing meanwhile.
+    move = """
+        WITH batch AS (
+            SELECT id, checkout_request_id, status, raw_callback_json, updated_at
+            FROM deposits
+            WHERE raw_callback_json IS NOT NULL {keyset}
+            ORDER BY id LIMIT :n
+            FOR UPDATE
+        ), logged AS (
+            INSERT INTO deposit_callbacks
+                (deposit_id, checkout_request_id, status, payload, received_at)
+            SELECT id, checkout_request_id, status, raw_callback_json, updated_at FROM batch
+        ), cleared AS (
+            UPDATE deposits d SET raw_callback_json = NULL FROM batch
+            WHERE d.id = batch.id RETURNING d.id
+        )
+        SELECT max(id) FROM cleared
+    """
+    with op.get_context().autocommit_block():
+        params: dict = {"n": MOVE_BATCH}
+        keyset = ""
+        while True:
+            last = conn.execute(sa.text(move.format(keyset=keyset)), params).scalar()
+            if last is None:
+                break
+            params["after"] = last
+            keyset = "AND id > :after"
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Put the latest payload per deposit back on the row, then drop the log.
+    op.execute("""
+        UPDATE deposits d SET raw_callback_json = latest.payload
+        FROM (
+            SELECT DISTINCT ON (deposit_id) deposit_id, payload
+            FROM deposit_callbacks
+            ORDER BY deposit_id, received_at DESC, id DESC
+        ) latest
+        WHERE d.id = latest.deposit_id
+    """)
+    op.drop_table("deposit_callbacks")
@@ -0,0 +1,235 @@
+"""partition deposits by created_at
+
+Revision ID: f3a8d2c6b017
+Revises: e71b3c9d4a68
+Create Date: 2026-10-18 15:47:30.662049
+
+Online conversion of deposits into a table range-partitioned by month on created_at.
+The existing heap is not rewritten; it becomes the first partition, deposits_legacy,
+covering everything before the start of next month:
+
+1. create deposit_keys (global id / checkout_request_id uniqueness) and a trigger that
+   registers new deposits in it; backfill existing rows in short keyset batches
+2. build the (id, created_at) and checkout_request_id indexes CONCURRENTLY and prove
+   the partition bound with a validated CHECK, so ATTACH skips its table scan
+3. swap in one short transaction: rename the heap, create the partitioned parent,
+   attach the heap and create the monthly partitions after it
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+from app.db.partitions import add_months, monthly_partition_ddl, months_between
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8d2c6b017"
+down_revision: Union[str, Sequence[str], None] = "e71b3c9d4a68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 10_000
+MONTHS_AHEAD = 3
+
+REGISTER_KEY = """
+    CREATE OR REPLACE FUNCTION deposits_register_key() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO deposit_keys (id, checkout_request_id, created_at)
+        VALUES (NEW.id, NEW.checkout_request_id, NEW.created_at);
+        RETURN NEW;
+    END $$
+"""
+
+# (index on the old heap, name it takes once the heap is deposits_legacy)
+LEGACY_INDEXES = [
+    ("ix_deposits_pending_created_at", "deposits_legacy_pending_created_at_idx"),
+    ("ix_deposits_user_id_created_at", "deposits_legacy_user_id_created_at_idx"),
+]
+
+
+def _deposit_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("checkout_request_id", sa.String(), nullable=False),
+        sa.Column("merchant_request_id", sa.String(), nullable=True),
+        sa.Column("receipt", sa.String(), nullable=True),
+        sa.Column("raw_callback_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name="deposits_user_id_fkey"),
+    ]
+
+
+def _create_deposit_indexes() -> None:
+    op.create_index(
+        "ix_deposits_pending_created_at",
+        "deposits",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING_CALLBACK'"),
+    )
+    op.create_index(
+        "ix_deposits_user_id_created_at", "deposits", ["user_id", "created_at"], unique=False
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The heap keeps every row created before this; later months get their own partition.
+    today = datetime.now(timezone.utc).date()
+    boundary = add_months(today, 1)
+    bound = f"'{boundary.isoformat()} 00:00:00+00'"
+
+    op.create_table(
+        "deposit_keys",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("checkout_request_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("checkout_request_id"),
+    )
+    op.execute(REGISTER_KEY)
+    op.execute("""
+        CREATE TRIGGER deposits_register_key BEFORE INSERT ON deposits
+        FOR EACH ROW EXECUTE FUNCTION deposits_register_key()
+    """)
+
+    # Everything below commits as it goes, so no lock is held for long.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        backfill = """
+            WITH batch AS (
+                SELECT id, checkout_request_id, created_at FROM deposits
+                {keyset} ORDER BY id LIMIT :n
+            ), registered AS (
+                INSERT INTO deposit_keys (id, checkout_request_id, created_at)
+                SELECT id, checkout_request_id, created_at FROM batch
+                ON CONFLICT DO NOTHING
+            )
+            SELECT max(id) FROM batch
+        """
+        params: dict = {"n": BACKFILL_BATCH}
+        keyset = ""
+        while True:
+            last = conn.execute(sa.text(backfill.format(keyset=keyset)), params).scalar()
+            if last is None:
+                break
+            params["after"] = last
+            keyset = "WHERE id > :after"
+
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY deposits_legacy_pkey " "ON deposits (id, created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY deposits_legacy_checkout_request_id_idx "
+            "ON deposits (checkout_request_id)"
+        )
+        # VALIDATE only takes SHARE UPDATE EXCLUSIVE; writes keep going.
+        op.execute(f"""
+            ALTER TABLE deposits ADD CONSTRAINT deposits_legacy_bound
+            CHECK (created_at IS NOT NULL AND created_at < {bound}) NOT VALID
+        """)
+        op.execute("ALTER TABLE deposits VALIDATE CONSTRAINT deposits_legacy_bound")
+        op.execute("""
+            ALTER TABLE deposit_outbox ADD CONSTRAINT deposit_outbox_deposit_id_key_fkey
+            FOREIGN KEY (deposit_id) REFERENCES deposit_keys (id) NOT VALID
+        """)
+        op.execute(
+            "ALTER TABLE deposit_outbox VALIDATE CONSTRAINT deposit_outbox_deposit_id_key_fkey"
+        )
+
+    # Swap: catalog-only changes, under one short ACCESS EXCLUSIVE lock.
+    op.execute("ALTER TABLE deposit_outbox DROP CONSTRAINT deposit_outbox_deposit_id_fkey")
+    op.execute(
+        "ALTER TABLE deposit_outbox RENAME CONSTRAINT deposit_outbox_deposit_id_key_fkey "
+        "TO deposit_outbox_deposit_id_fkey"
+    )
+    op.execute("DROP TRIGGER deposits_register_key ON deposits")
+    # The parent's primary key only adopts an index that already backs one.
+    op.execute("ALTER TABLE deposits DROP CONSTRAINT deposits_pkey")
+    op.execute(
+        "ALTER TABLE deposits ADD CONSTRAINT deposits_legacy_pkey "
+        "PRIMARY KEY USING INDEX deposits_legacy_pkey"
+    )
+    op.execute("ALTER TABLE deposits DROP CONSTRAINT deposits_checkout_request_id_key")
+    op.rename_table("deposits", "deposits_legacy")
+    op.execute(
+        "ALTER TABLE deposits_legacy RENAME CONSTRAINT deposits_user_id_fkey "
+        "TO deposits_legacy_user_id_fkey"
+    )
+    for old, new in LEGACY_INDEXES:
+        op.execute(f"ALTER INDEX {old} RENAME TO {new}")
+
+    op.create_table(
+        "deposits",
+        *_deposit_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    _create_deposit_indexes()
+    op.create_index(
+        "ix_deposits_checkout_request_id", "deposits", ["checkout_request_id"], unique=False
+    )
+    # Matching indexes and the user_id FK on the heap are adopted, not rebuilt.
+    op.execute(
+        f"ALTER TABLE deposits ATTACH PARTITION deposits_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ({bound})"
+    )
+    op.execute("ALTER TABLE deposits_legacy DROP CONSTRAINT deposits_legacy_bound")
+    op.execute("""
+        CREATE TRIGGER deposits_register_key BEFORE INSERT ON deposits
+        FOR EACH ROW EXECUTE FUNCTION deposits_register_key()
+    """)
+    # No default partition: it would block DETACH ... CONCURRENTLY when archiving.
+    for start in months_between(boundary, add_months(today, MONTHS_AHEAD)):
+        op.execute(monthly_partition_ddl("deposits", start))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Offline: copies every remaining deposit back into a plain table.
+    op.rename_table("deposits", "deposits_partitioned")
+    op.execute(
+        "ALTER TABLE deposits_partitioned RENAME CONSTRAINT deposits_pkey "
+        "TO deposits_partitioned_pkey"
+    )
+    for index in (
+        "ix_deposits_pending_created_at",
+        "ix_deposits_user_id_created_at",
+        "ix_deposits_checkout_request_id",
+    ):
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_partitioned")
+    op.create_table(
+        "deposits",
+        *_deposit_columns(),
+        sa.PrimaryKeyConstraint("id", name="deposits_pkey"),
+        sa.UniqueConstraint("checkout_request_id", name="deposits_checkout_request_id_key"),
+    )
+    op.execute("INSERT INTO deposits SELECT * FROM deposits_partitioned")
+    _create_deposit_indexes()
+
+    op.execute("ALTER TABLE deposit_outbox DROP CONSTRAINT deposit_outbox_deposit_id_fkey")
+    op.create_foreign_key(
+        "deposit_outbox_deposit_id_fkey", "deposit_outbox", "deposits", ["deposit_id"], ["id"]
+    )
+    op.drop_table("deposits_partitioned")
+    op.execute("DROP FUNCTION deposits_register_key()")
+    op.drop_table("deposit_keys")
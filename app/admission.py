@@ -0,0 +1,188 @@
+"""
+Admission control: a bound on concurrent ledger and repository calls per process.
+
+When TigerBeetle or Postgres slows down, calls beyond the limit wait in a short FIFO
+queue; once the queue is full, or a call has waited longer than the queue timeout, it
+fails fast with Overloaded, which the API turns into 429 / 503 with Retry-After. The
+limit adapts to observed latency (additive increase, multiplicative decrease), so a
+slow dependency gets fewer concurrent calls instead of every call getting slower.
+
+Opt-in with `admission_enabled`, meant for API processes; background workers would
+rather wait than be shed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+from app.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_REJECTED, F
+from app.settings.config import settings
+
+
+class Overloaded(Exception):
+    def __init__(self, controller: str, reason: str, retry_after_s: int):
+        super().__init__(f"{controller} overloaded ({reason}), retry after {retry_after_s}s")
+        self.controller = controller
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+        # Queue full: the client is sending too much. Queue timeout: we are too slow.
+        self.status_code = 429 if reason == "queue_full" else 503
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        *,
+        enabled: bool = True,
+        max_limit: int = 64,
+        min_limit: int = 1,
+        queue_size: int = 64,
+        queue_timeout_s: float = 0.1,
+        target_latency_s: float = 0.0,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        """
+        `target_latency_s` of 0 keeps the limit fixed at `max_limit`; otherwise a call
+        slower than the target cuts the limit by `backoff` (at most once per that
+        call's duration, so one slow burst counts once) and a faster one raises it by
+        1/limit, i.e. by one per limit's worth of calls.
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("need 1 <= min_limit <= max_limit")
+        self.name = name
+        self.enabled = enabled
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.queue_size = queue_size
+        self.queue_timeout_s = queue_timeout_s
+        self.target_latency_s = target_latency_s
+        self.backoff = backoff
+        self.clock = clock
+
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+        # Exponentially weighted mean call latency, for Retry-After.
+        self.latency_s = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._last_decrease = -math.inf
+        self._queue_seconds = ADMISSION_QUEUE_SECONDS.labels(name)
+
+    def retry_after_s(self) -> int:
+        # Roughly how long the backlog takes to drain at the current limit.
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(backlog * self.latency_s / self.limit))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.labels(self.name, reason).inc()
+        return Overloaded(self.name, reason, self.retry_after_s())
+
+    async def _acquire(self) -> None:
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject("queue_full")
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        start = self.clock()
+        try:
+            await asyncio.wait((fut,), timeout=self.queue_timeout_s)
+        except BaseException:
+            # Cancelled while queued; hand back a slot that was given to us meanwhile.
+            if fut.done() and not fut.cancelled():
+                self._release()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            raise
+        if not fut.done():
+            fut.cancel()
+            self._waiters.remove(fut)
+            raise self._reject("queue_timeout")
+        # _release handed its slot (and in_flight count) over to us.
+        self._queue_seconds.observe(self.clock() - start)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            self._waiters.popleft().set_result(None)
+            self.in_flight += 1
+
+    def _observe(self, elapsed: float, now: float) -> None:
+        self.latency_s += (elapsed - self.latency_s) * 0.1
+        if not self.target_latency_s:
+            return
+        if elapsed > self.target_latency_s:
+            if now - self._last_decrease >= elapsed:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        await self._acquire()
+        start = self.clock()
+        try:
+            yield
+        finally:
+            now = self.clock()
+            self._observe(now - start, now)
+            self._release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": dict(self.rejected),
+            "latency_ms": round(self.latency_s * 1000, 3),
+        }
+
+
+def admitted(controller: AdmissionController) -> Callable[[F], F]:
+    """Run each call of the decorated coroutine function under `controller`."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not controller.enabled:
+                return await fn(*args, **kwargs)
+            async with controller.admit():
+                return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def _controller(name: str, max_limit: int, target_latency_ms: float) -> AdmissionController:
+    return AdmissionController(
+        name,
+        enabled=settings.admission_enabled,
+        max_limit=max_limit,
+        min_limit=min(settings.admission_min_limit, max_limit),
+        queue_size=settings.admission_queue_size,
+        queue_timeout_s=settings.admission_queue_timeout_ms / 1000,
+        target_latency_s=target_latency_ms / 1000,
+    )
+
+
+LEDGER_ADMISSION = _controller(
+    "ledger", settings.admission_ledger_limit, settings.admission_ledger_target_latency_ms
+)
+DB_ADMISSION = _controller(
+    "db", settings.admission_db_limit, settings.admission_db_target_latency_ms
+)
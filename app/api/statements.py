@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.deadline import route_deadline
+from app.ledger.tb_client import get_tb_client_pool
+from app.models.user import User
+from app.services.statements import csv_chunks, get_statement_exporter, ndjson_chunks
+
+router = APIRouter()
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _ns(dt: datetime | None) -> int:
+    # TigerBeetle timestamps are nanoseconds since the epoch; 0 means unbounded.
+    if dt is None:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 1_000_000_000 + dt.microsecond * 1_000
+
+
+# Streams a whole history, however long: no default deadline.
+@router.get("/users/{user_id}/statement", dependencies=[Depends(route_deadline(None))])
+async def statement(
+    user_id: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    # Streamed page by page: the next ledger page is only fetched once the client has
+    # taken the previous one, so a slow reader holds one page, not the whole history.
+    async with SessionLocal() as session:
+        account_id = await session.scalar(select(User.tb_account_id).where(User.id == user_id))
+    if account_id is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "user not found")
+
+    async def body():
+        pages = get_statement_exporter(get_tb_client_pool()).pages(
+            account_id, timestamp_min=_ns(start), timestamp_max=_ns(end)
+        )
+        chunks = csv_chunks(pages) if format == "csv" else ndjson_chunks(pages)
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="statement-{user_id}.{format}"'},
+    )
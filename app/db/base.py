@@ -1,5 +1,7 @@
+from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase
 
 
-class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+class Base(AsyncAttrs, DeclarativeBase):
+    # AsyncAttrs: lazy relationships load with `await obj.awaitable_attrs.<name>`.
+    pass
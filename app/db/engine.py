@@ -1,17 +1,115 @@
 import os
+import time
+from typing import Any
 
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-from app.settings.config import settings
+from app.metrics import instrument_engine
+from app.settings.config import Settings, settings
 
-#Fix of error is coming from asyncpg trying to reuse a pooled connection after the loop is closed.
-#Nullpool gives you a fresh connection every time, which avoids loop reuse issues.
+# Fix of error is coming from asyncpg trying to reuse a pooled connection after the loop is closed.
+# Nullpool gives you a fresh connection every time, which avoids loop reuse issues.
 _use_null_pool = os.getenv("PYTEST_CURRENT_TEST") is not None
 
-engine = create_async_engine(
-	settings.database_url,
-	pool_pre_ping=True,
-	echo=True,
-	poolclass=NullPool if _use_null_pool else None,
-)
\ No newline at end of file
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that also records how long checkouts wait for a connection.
+
+    The wait is the time spent getting a connection out of the queue, not the time to
+    open a new one (counted separately as connects) or to pre-ping it on checkout.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.connects = 0
+        self.connect_total_s = 0.0
+
+    def _create_connection(self) -> Any:
+        start = time.perf_counter()
+        record = super()._create_connection()
+        connect_s = time.perf_counter() - start
+        # Kept on the record, not the pool: checkouts interleave across greenlets.
+        record.__dict__["_connect_s"] = connect_s
+        self.connects += 1
+        self.connect_total_s += connect_s
+        return record
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        connect_s = 0.0
+        try:
+            record = super()._do_get()
+            connect_s = record.__dict__.pop("_connect_s", 0.0)
+            return record
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start - connect_s
+            self.checkouts += 1
+            self.wait_total_s += waited
+            self.wait_max_s = max(self.wait_max_s, waited)
+
+
+def build_engine(cfg: Settings) -> AsyncEngine:
+    connect_args: dict[str, Any] = {
+        # asyncpg's per-connection prepared statement LRU.
+        "statement_cache_size": cfg.db_statement_cache_size,
+    }
+    if cfg.db_statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(cfg.db_statement_timeout_ms)}
+
+    pool_kwargs: dict[str, Any]
+    if _use_null_pool:
+        pool_kwargs = {"poolclass": NullPool}
+    else:
+        pool_kwargs = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": cfg.db_pool_size,
+            "max_overflow": cfg.db_max_overflow,
+            "pool_timeout": cfg.db_pool_timeout_s,
+            "pool_recycle": cfg.db_pool_recycle_s,
+        }
+
+    return create_async_engine(
+        cfg.database_url,
+        pool_pre_ping=cfg.db_pool_pre_ping,
+        echo=cfg.db_echo,
+        connect_args=connect_args,
+        **pool_kwargs,
+    )
+
+
+engine = build_engine(settings)
+instrument_engine(engine.sync_engine)
+
+
+def pool_stats() -> dict[str, Any]:
+    """Live pool numbers, for sizing db_pool_size against the number of uvicorn workers."""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "checkouts": pool.checkouts,
+        "checkout_timeouts": pool.checkout_timeouts,
+        "wait_avg_ms": (
+            round(pool.wait_total_s / pool.checkouts * 1000, 3) if pool.checkouts else 0.0
+        ),
+        "wait_max_ms": round(pool.wait_max_s * 1000, 3),
+        "connects": pool.connects,
+        "connect_avg_ms": (
+            round(pool.connect_total_s / pool.connects * 1000, 3) if pool.connects else 0.0
+        ),
+    }
@@ -0,0 +1,127 @@
+"""
+Helpers for tables range-partitioned by month on a timestamptz column.
+
+Partitions are named `<parent>_yYYYYmMM` and cover [first of month, first of next
+month) in UTC. A `<parent>_default` partition catches rows no month covers, so an
+insert never fails if maintenance falls behind; tables that are archived by detaching
+partitions (deposits) go without one, since it rules out DETACH ... CONCURRENTLY.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    # None for MINVALUE / MAXVALUE (and for the default partition).
+    lower: datetime | None
+    upper: datetime | None
+    is_default: bool = False
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        if self.is_default:
+            return False
+        return (self.lower is None or self.lower < end) and (
+            self.upper is None or start < self.upper
+        )
+
+
+_RANGE_BOUND = re.compile(r"FOR VALUES FROM \((.+)\) TO \((.+)\)")
+
+
+def _bound(value: str) -> datetime | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def parse_partition_bound(name: str, expr: str) -> Partition:
+    """Parse pg_get_expr(relpartbound) of a range partition on a timestamptz column."""
+    if expr == "DEFAULT":
+        return Partition(name, None, None, is_default=True)
+    match = _RANGE_BOUND.fullmatch(expr)
+    if match is None:
+        raise ValueError(f"unsupported partition bound for {name}: {expr}")
+    return Partition(name, _bound(match[1]), _bound(match[2]))
+
+
+async def list_partitions(conn: AsyncConnection, parent: str) -> list[Partition]:
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+        ),
+        {"parent": parent},
+    )
+    return [parse_partition_bound(name, expr) for name, expr in rows]
+
+
+def partitions_older_than(partitions: list[Partition], cutoff: datetime) -> list[Partition]:
+    """Range partitions whose every row is older than `cutoff`."""
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def _utc(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def monthly_partition_name(parent: str, start: date) -> str:
+    return f"{parent}_y{start.year:04d}m{start.month:02d}"
+
+
+def monthly_partition_ddl(parent: str, start: date) -> str:
+    start = month_start(start)
+    end = add_months(start, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {monthly_partition_name(parent, start)} "
+        f"PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def default_partition_ddl(parent: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {parent}_default PARTITION OF {parent} DEFAULT"
+
+
+def months_between(first: date, last: date) -> list[date]:
+    """Month starts from first's month through last's month, inclusive."""
+    months, current, last = [], month_start(first), month_start(last)
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+async def ensure_monthly_partitions(
+    conn: AsyncConnection, parent: str, *, months_ahead: int, today: date | None = None
+) -> list[str]:
+    """
+    Create monthly partitions through `months_ahead` months from now, skipping months
+    an existing partition already covers. Returns the names of the created ones.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    existing = await list_partitions(conn, parent)
+    created = []
+    for start in months_between(today, add_months(today, months_ahead)):
+        if any(p.overlaps(_utc(start), _utc(add_months(start, 1))) for p in existing):
+            continue
+        await conn.execute(text(monthly_partition_ddl(parent, start)))
+        created.append(monthly_partition_name(parent, start))
+    return created
@@ -1,8 +1,21 @@
-from sqlalchemy import func, update
+from sqlalchemy import String, func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.admission import DB_ADMISSION, admitted
+from app.db.types import UInt128Bytes
+from app.deadline import statement_deadline
+from app.ledger.ids import deposit_transfer_id
+from app.metrics import sql_label
 from app.models.deposit import Deposit
+from app.models.deposit_callback import DepositCallback
+from app.models.deposit_outbox import DepositOutbox
+from app.models.enums import DepositStatus
+from app.models.user import User
+
+# Once a deposit reaches one of these, callbacks must not change it again.
+TERMINAL_DEPOSIT_STATUSES = (DepositStatus.SUCCESS.value, DepositStatus.FAILED.value)
 
 
 class DuplicateCheckoutRequestIDError(Exception):
@@ -11,6 +24,26 @@ class DuplicateCheckoutRequestIDError(Exception):
 class DepositNotFoundError(Exception):
     pass
 
+
+def outbox_insert_from(deposits, transfer_id):
+    """
+    INSERT INTO deposit_outbox selecting from `deposits` (a table or CTE with id,
+    user_id, amount and status columns) for the rows that became SUCCESS.
+    """
+    rows = (
+        select(deposits.c.id, transfer_id, User.tb_account_id, deposits.c.amount)
+        .join(User, User.id == deposits.c.user_id)
+        .where(deposits.c.status == DepositStatus.SUCCESS.value)
+    )
+    return (
+        insert(DepositOutbox)
+        .from_select(["deposit_id", "transfer_id", "credit_account_id", "amount"], rows)
+        .on_conflict_do_nothing(index_elements=["deposit_id"])
+    )
+
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
 async def create_deposit_attempt(
         session:AsyncSession,
         deposit_id:str,
@@ -37,6 +70,9 @@ async def create_deposit_attempt(
         raise DuplicateCheckoutRequestIDError("checkout_request_id already exists") from e
     
 
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
 async def update_deposit_status(session:AsyncSession,
                                 checkout_request_id:str,
                                 status:str,
@@ -49,21 +85,91 @@ async def update_deposit_status(session:AsyncSession,
             .values(status=status,receipt=receipt,updated_at=func.now())
             .returning(Deposit.id)
         )
-    row = result.first()
+        row = result.first()
+        if row is not None and status == DepositStatus.SUCCESS.value:
+            # Same transaction as the status change: the settlement worker credits it later.
+            await session.execute(outbox_insert_from(
+                select(Deposit).where(Deposit.id == row.id).subquery(),
+                literal(deposit_transfer_id(checkout_request_id), UInt128Bytes),
+            ))
     if row is None:
             raise DepositNotFoundError(checkout_request_id)
     
+def callback_log_insert(rows):
+    """
+    INSERT INTO deposit_callbacks from `rows`, a select of (deposit_id,
+    checkout_request_id, status, payload). Returns the logged checkout_request_ids.
+    """
+    return (
+        insert(DepositCallback)
+        .from_select(["deposit_id", "checkout_request_id", "status", "payload"], rows)
+        .returning(DepositCallback.checkout_request_id)
+    )
+
+
+def _log_one(checkout_request_id: str, status: str | None, payload: dict):
+    return callback_log_insert(
+        select(
+            Deposit.id,
+            Deposit.checkout_request_id,
+            literal(status, String),
+            literal(payload, JSONB),
+        ).where(Deposit.checkout_request_id == checkout_request_id)
+    )
+
+
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
 async def store_callback_payload(
             session: AsyncSession, *, 
             checkout_request_id: str,
               payload: dict) -> None:
-        
+        # Appended to the callback log; the deposit row itself is not rewritten.
         async with session.begin():
-            result = await session.execute(
-            update(Deposit)
-            .where(Deposit.checkout_request_id == checkout_request_id)
-            .values(raw_callback_json=payload,updated_at=func.now())
-            .returning(Deposit.id)
-        )
+            result = await session.execute(_log_one(checkout_request_id, None, payload))
         if result.first() is None:
-            raise DepositNotFoundError(checkout_request_id)
\ No newline at end of file
+            raise DepositNotFoundError(checkout_request_id)
+
+
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
+async def apply_callback(
+        session: AsyncSession, *,
+        checkout_request_id: str,
+        status: str,
+        receipt: str | None,
+        payload: dict) -> bool:
+    """
+    Write an M-Pesa callback (status, receipt, payload) in a single statement.
+
+    The payload is always appended to deposit_callbacks; the UPDATE only touches
+    deposits that are not terminal yet. Returns True if the row changed, False for a
+    duplicate callback on an already-terminal deposit.
+    """
+    changed = (
+        update(Deposit)
+        .where(Deposit.checkout_request_id == checkout_request_id)
+        .where(Deposit.status.not_in(TERMINAL_DEPOSIT_STATUSES))
+        .values(status=status, receipt=receipt, updated_at=func.now())
+        .returning(Deposit.id, Deposit.user_id, Deposit.amount, Deposit.status)
+        .cte("changed")
+    )
+    # Queued for settlement by the same statement when the deposit turns SUCCESS.
+    outbox = outbox_insert_from(
+        changed, literal(deposit_transfer_id(checkout_request_id), UInt128Bytes)
+    ).cte("outbox")
+    # The log insert only matches an existing deposit, so its count also tells
+    # "duplicate" from "not found" without a second round trip.
+    logged = _log_one(checkout_request_id, status, payload).cte("logged")
+    stmt = select(
+        select(func.count()).select_from(logged).scalar_subquery(),
+        select(func.count()).select_from(changed).scalar_subquery(),
+    ).add_cte(outbox)
+
+    async with session.begin():
+        found, updated = (await session.execute(stmt)).one()
+    if not found:
+        raise DepositNotFoundError(checkout_request_id)
+    return bool(updated)
@@ -1,20 +1,51 @@
-import tigerbeetle as tb
+from typing import Callable, Sequence
+
+from sqlalchemy import func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.admission import DB_ADMISSION, admitted
+from app.deadline import statement_deadline
+from app.ledger.ids import wallet_account_id
+from app.metrics import sql_label
 from app.models.user import User
 
 
 class DuplicatePhoneError(Exception):
     pass
 
+class UserNotFoundError(Exception):
+    pass
+
+
+# Called with the affected phone numbers after a commit that adds or changes them
+# (e.g. to drop cached phone -> wallet resolutions).
+PhoneChangeListener = Callable[[Sequence[str]], None]
+_phone_change_listeners: list[PhoneChangeListener] = []
+
+
+def add_phone_change_listener(listener: PhoneChangeListener) -> None:
+    _phone_change_listeners.append(listener)
+
+
+def remove_phone_change_listener(listener: PhoneChangeListener) -> None:
+    _phone_change_listeners.remove(listener)
+
+
+def _notify_phone_change(phones: Sequence[str]) -> None:
+    for listener in _phone_change_listeners:
+        listener(phones)
+
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
 async def create_user(session:AsyncSession,user_id:str,full_name:str,phone_number:str)->User:
     """
     Docstring for create_user
     
-      # Generate TB-style time-based uint128 now (we persist it; TigerBeetle account creation happens later).
+      # Wallet account id derived from user_id (persisted; TigerBeetle account created later).
     """
-    tb_account_id=tb.id()
+    tb_account_id=wallet_account_id(user_id)
 
     user=User(
         id=user_id,
@@ -27,8 +58,31 @@ async def create_user(session:AsyncSession,user_id:str,full_name:str,phone_numbe
     try:
         async with session.begin():
             session.add(user)
-        return user
     except IntegrityError as e:
         raise DuplicatePhoneError("Phone number already exists") from e
+    # A number that resolved to nobody until now (negative cache entries).
+    _notify_phone_change([phone_number])
+    return user
+
+
+@admitted(DB_ADMISSION)
+@statement_deadline
+@sql_label
+async def update_phone_number(session:AsyncSession,user_id:str,phone_number:str)->None:
+    try:
+        async with session.begin():
+            old_phone = await session.scalar(
+                select(User.phone_number).where(User.id==user_id).with_for_update()
+            )
+            if old_phone is None:
+                raise UserNotFoundError(user_id)
+            await session.execute(
+                update(User)
+                .where(User.id==user_id)
+                .values(phone_number=phone_number,updated_at=func.now())
+            )
+    except IntegrityError as e:
+        raise DuplicatePhoneError("Phone number already exists") from e
+    _notify_phone_change([old_phone,phone_number])
 
 
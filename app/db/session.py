@@ -1,11 +1,15 @@
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.db.engine import engine
+from app.deadline import apply_statement_timeout
 
 SessionLocal=async_sessionmaker(bind=engine,
                                 class_=AsyncSession,expire_on_commit=False)
+# Transactions opened under a request deadline get it as their statement_timeout.
+event.listen(AsyncSession.sync_session_class, "after_begin", apply_statement_timeout)
 
 async def get_session()->AsyncGenerator[AsyncSession,None]:
     async with SessionLocal() as session:
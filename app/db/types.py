@@ -4,7 +4,7 @@ from decimal import Decimal
 from typing import Any
 
 from sqlalchemy import Dialect
-from sqlalchemy.types import Numeric, TypeDecorator
+from sqlalchemy.types import LargeBinary, Numeric, TypeDecorator
 
 
 class UInt128Numeric(TypeDecorator):
@@ -22,4 +22,24 @@ class UInt128Numeric(TypeDecorator):
     def process_result_value(self, value: Any | None, dialect: Dialect) -> Any | None:
         if value is None:
             return None
-        return int(value)
\ No newline at end of file
+        return int(value)
+
+class UInt128Bytes(TypeDecorator):
+    """
+    Store uint128 as a 16-byte big-endian bytea and expose it as Python int.
+
+    Fixed width and memcmp-ordered (big-endian keeps numeric order), so comparisons
+    and the unique index are cheaper than NUMERIC; int <-> bytes needs no Decimal.
+    """
+    impl = LargeBinary
+    cache_ok=True
+
+    def process_bind_param(self, value: Any | None, dialect: Dialect) -> Any:
+        if value is None:
+            return None
+        return value.to_bytes(16, "big")
+
+    def process_result_value(self, value: Any | None, dialect: Dialect) -> Any | None:
+        if value is None:
+            return None
+        return int.from_bytes(value, "big")
@@ -0,0 +1,167 @@
+"""
+Per-request deadlines, carried in a contextvar from the HTTP edge to Postgres and
+TigerBeetle.
+
+DeadlineMiddleware starts the budget when a request arrives: the client's
+`request_deadline_header` (milliseconds, capped at `request_deadline_max_ms`), else the
+route's default (`route_deadline`), else `request_deadline_default_ms` (0: none).
+Within it, every transaction runs with the remaining budget as its statement_timeout,
+and repository and ledger calls are not started once it is spent. Either way the call
+raises DeadlineExceeded (504), so a request the client has already given up on stops
+using capacity instead of running to completion.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import time
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.metrics import DEADLINE_EXCEEDED, F
+from app.settings.config import settings
+
+# Absolute time.monotonic() by which the current request has to be done.
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+# Postgres query_canceled, which is what a statement_timeout raises.
+_QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, layer: str):
+        super().__init__(f"request deadline exceeded in {layer}")
+        self.layer = layer
+
+
+def remaining_s() -> float | None:
+    """Seconds left in the current request's budget, or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check(layer: str) -> float | None:
+    """remaining_s(), raising DeadlineExceeded (and counting it) if nothing is left."""
+    remaining = remaining_s()
+    if remaining is not None and remaining <= 0:
+        DEADLINE_EXCEEDED.labels(layer).inc()
+        raise DeadlineExceeded(layer)
+    return remaining
+
+
+def set_deadline(budget_s: float | None) -> contextvars.Token:
+    """Start a budget of `budget_s` from now (None: no deadline); reset with the token."""
+    return _deadline.set(None if budget_s is None else time.monotonic() + budget_s)
+
+
+def without_deadline() -> contextvars.Context:
+    """A copy of the current context with no deadline, for tasks that outlive a request."""
+    ctx = contextvars.copy_context()
+    ctx.run(_deadline.set, None)
+    return ctx
+
+
+def within_deadline(layer: str) -> Callable[[F], F]:
+    """Refuse to start the decorated coroutine function once the budget is spent."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            check(layer)
+            return await fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def statement_deadline(fn: F) -> F:
+    """
+    within_deadline("db"), and a statement cancelled by the deadline's statement_timeout
+    surfaces as DeadlineExceeded rather than a database error.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        check("db")
+        try:
+            return await fn(*args, **kwargs)
+        except DBAPIError as exc:
+            if _deadline.get() is None or getattr(exc.orig, "sqlstate", None) != _QUERY_CANCELED:
+                raise
+            DEADLINE_EXCEEDED.labels("db").inc()
+            raise DeadlineExceeded("db") from exc
+
+    return wrapper  # type: ignore[return-value]
+
+
+def apply_statement_timeout(session: Any, transaction: Any, connection: Any) -> None:
+    """
+    Session after_begin listener: under a deadline, set the transaction's (local)
+    statement_timeout to the remaining budget (never above db_statement_timeout_ms).
+    One extra round trip per transaction, and only while a deadline is set.
+    """
+    remaining = remaining_s()
+    if remaining is None:
+        return
+    timeout_ms = max(1, int(remaining * 1000))
+    if settings.db_statement_timeout_ms:
+        timeout_ms = min(timeout_ms, settings.db_statement_timeout_ms)
+    # set_config keeps the statement text constant for asyncpg's prepared statement cache.
+    connection.execute(
+        text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(timeout_ms)}
+    )
+
+
+def route_deadline(budget_ms: float | None) -> Callable[[Request], Awaitable[None]]:
+    """
+    A dependency giving a route its own default budget (None: no deadline), used when
+    the client sent no deadline header; e.g. for streaming routes that run long.
+    """
+
+    async def dependency(request: Request) -> None:
+        if settings.request_deadline_header not in request.headers:
+            set_deadline(None if budget_ms is None else budget_ms / 1000)
+
+    return dependency
+
+
+class DeadlineMiddleware:
+    """Plain ASGI middleware that sets the request's deadline for everything below it."""
+
+    def __init__(
+        self,
+        app: Any,
+        *,
+        header: str = settings.request_deadline_header,
+        default_ms: float = settings.request_deadline_default_ms,
+        max_ms: float = settings.request_deadline_max_ms,
+    ):
+        self.app = app
+        self.header = header.lower().encode()
+        self.default_ms = default_ms
+        self.max_ms = max_ms
+
+    def _budget_ms(self, scope: dict) -> float | None:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                try:
+                    return min(max(float(value), 0.0), self.max_ms)
+                except ValueError:
+                    break
+        return self.default_ms or None
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget_ms = self._budget_ms(scope)
+        token = set_deadline(None if budget_ms is None else budget_ms / 1000)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any, Protocol
+
+import tigerbeetle as tb
+
+
+class LedgerBackend(Protocol):
+    """The part of tb.ClientAsync the ledger layer uses; InMemoryLedger implements it too."""
+
+    async def create_accounts(
+        self, accounts: list[tb.Account]
+    ) -> list[tb.CreateAccountsResult]: ...
+
+    async def create_transfers(
+        self, transfers: list[tb.Transfer]
+    ) -> list[tb.CreateTransfersResult]: ...
+
+    async def lookup_accounts(self, ids: list[int]) -> list[tb.Account]: ...
+
+    async def lookup_transfers(self, ids: list[int]) -> list[tb.Transfer]: ...
+
+    async def get_account_transfers(self, filter: tb.AccountFilter) -> list[tb.Transfer]: ...
+
+    async def close(self) -> None: ...
+
+    async def __aenter__(self) -> Any: ...
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None: ...
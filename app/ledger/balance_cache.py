@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping, Sequence
+
+import tigerbeetle as tb
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class BalanceCache:
+    """
+    Bounded LRU + TTL cache of TigerBeetle accounts (balances) by account id.
+
+    Reads take a `token()` before going to the ledger and hand it back to `put()`;
+    a fill is dropped if the account was invalidated after the token was taken, so an
+    in-flight read can never resurrect a balance that a concurrent write made stale.
+
+    `ttl_overrides` gives per-account TTLs; a TTL of 0 means "never cache" (hot
+    system accounts whose balance changes on every transfer).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        ttl_s: float = 5.0,
+        ttl_overrides: Mapping[int, float] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.ttl_overrides = dict(ttl_overrides or {})
+        self.clock = clock
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[int, tuple[float, tb.Account]] = OrderedDict()
+        self._generation = 0
+        # account id -> generation of its last invalidation (bounded like the entries).
+        self._invalidated: OrderedDict[int, int] = OrderedDict()
+        self._invalidated_floor = 0
+        # pending transfer id -> (debit, credit), so post/void legs know what they touch.
+        self._pending_accounts: OrderedDict[int, tuple[int, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ttl(self, account_id: int) -> float:
+        return self.ttl_overrides.get(account_id, self.ttl_s)
+
+    def get(self, account_id: int) -> tb.Account | None:
+        entry = self._entries.get(account_id)
+        if entry is not None:
+            expires_at, account = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(account_id)
+                self.stats.hits += 1
+                return account
+            del self._entries[account_id]
+        self.stats.misses += 1
+        return None
+
+    def token(self) -> int:
+        return self._generation
+
+    def put(self, account: tb.Account, token: int) -> None:
+        ttl = self._ttl(account.id)
+        if ttl <= 0:
+            return
+        if token < self._invalidated_floor or self._invalidated.get(account.id, -1) > token:
+            return
+
+        self._entries[account.id] = (self.clock() + ttl, account)
+        self._entries.move_to_end(account.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, account_ids: Iterable[int]) -> None:
+        self._generation += 1
+        for account_id in account_ids:
+            if account_id == 0:
+                continue
+            self._entries.pop(account_id, None)
+            self._invalidated[account_id] = self._generation
+            self._invalidated.move_to_end(account_id)
+            self.stats.invalidations += 1
+
+        while len(self._invalidated) > self.max_entries:
+            _, generation = self._invalidated.popitem(last=False)
+            # Forgetting a tombstone: reject any fill older than it instead.
+            self._invalidated_floor = max(self._invalidated_floor, generation)
+
+    def invalidate_transfers(
+        self,
+        transfers: Sequence[tb.Transfer],
+        results: Iterable[tb.CreateTransfersResult] | None = None,
+    ) -> None:
+        """
+        Invalidate every account a batch of transfers may have touched. `results` are
+        create_transfers' failures for the batch, None if the call itself failed; a
+        pending transfer is forgotten only once a post or void of it went through (or
+        found it already resolved), so a rejected one can be retried.
+        """
+        failures = None if results is None else {r.index: r.result for r in results}
+        touched: list[int] = []
+        for i, t in enumerate(transfers):
+            if t.flags & (
+                tb.TransferFlags.POST_PENDING_TRANSFER | tb.TransferFlags.VOID_PENDING_TRANSFER
+            ):
+                # A post/void may carry zero account ids; use the pending transfer's too.
+                touched.extend(self._pending_accounts.get(t.pending_id, ()))
+                if failures is not None and (i not in failures or failures[i] in _PENDING_RESOLVED):
+                    self._pending_accounts.pop(t.pending_id, None)
+            elif t.flags & tb.TransferFlags.PENDING:
+                self._pending_accounts[t.id] = (t.debit_account_id, t.credit_account_id)
+                while len(self._pending_accounts) > self.max_entries:
+                    self._pending_accounts.popitem(last=False)
+            touched.append(t.debit_account_id)
+            touched.append(t.credit_account_id)
+        self.invalidate(touched)
+
+
+# A post/void failing with one of these leaves nothing pending to post or void later.
+_PENDING_RESOLVED = frozenset(
+    {
+        tb.CreateTransferResult.EXISTS,
+        tb.CreateTransferResult.PENDING_TRANSFER_ALREADY_POSTED,
+        tb.CreateTransferResult.PENDING_TRANSFER_ALREADY_VOIDED,
+        tb.CreateTransferResult.PENDING_TRANSFER_EXPIRED,
+    }
+)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from typing import Generic, Sequence, TypeVar
+
+import tigerbeetle as tb
+
+from app.ledger.backend import LedgerBackend
+from app.ledger.constants import TB_BATCH_MAX
+from app.metrics import LEDGER_BATCH_SIZE
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _MicroBatcher(Generic[T, R]):
+    """
+    Collects groups of events from concurrent callers and dispatches them together.
+
+    A batch is flushed when `window_s` has elapsed since its first group arrived or
+    when it reaches `max_size` events, whichever comes first. Groups are never split.
+    """
+
+    def __init__(self, *, window_s: float, max_size: int = TB_BATCH_MAX):
+        if max_size < 1 or max_size > TB_BATCH_MAX:
+            raise ValueError(f"max_size must be between 1 and {TB_BATCH_MAX}")
+        self.window_s = window_s
+        self.max_size = max_size
+        self._pending: list[tuple[Sequence[T], asyncio.Future[R]]] = []
+        self._pending_size = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+
+    async def _submit(self, group: Sequence[T]) -> R:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[R] = loop.create_future()
+
+        if len(group) > self.max_size:
+            # Too big to share a request with anyone else; send it on its own.
+            await self._dispatch([(group, fut)])
+            return fut.result()
+
+        if self._pending_size + len(group) > self.max_size:
+            self._flush()
+
+        self._pending.append((group, fut))
+        self._pending_size += len(group)
+
+        if self._pending_size >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        groups = self._pending
+        self._pending = []
+        self._pending_size = 0
+
+        task = asyncio.create_task(self._run(groups))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, groups: list[tuple[Sequence[T], asyncio.Future[R]]]) -> None:
+        try:
+            await self._dispatch(groups)
+        except BaseException as exc:
+            for _, fut in groups:
+                if not fut.done():
+                    fut.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+
+    async def _dispatch(self, groups: list[tuple[Sequence[T], asyncio.Future[R]]]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Flush anything still waiting and wait for in-flight requests to finish."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+
+class TransferBatcher(_MicroBatcher[tb.Transfer, list]):
+    """
+    Merges concurrent create_transfers calls into a single request.
+
+    Each caller submits a contiguous group (a single transfer or a whole linked chain)
+    and gets back only its own errors, re-indexed relative to its group.
+    """
+
+    def __init__(self, client: LedgerBackend, *, window_s: float, max_size: int = TB_BATCH_MAX):
+        super().__init__(window_s=window_s, max_size=max_size)
+        self.client = client
+
+    async def create_transfers(self, transfers: Sequence[tb.Transfer]) -> list:
+        if not transfers:
+            return []
+        if transfers[-1].flags & tb.TransferFlags.LINKED:
+            # An open chain would swallow the next caller's transfers; fail it like the
+            # server would without sending anything.
+            return [
+                tb.CreateTransfersResult(
+                    index=len(transfers) - 1,
+                    result=tb.CreateTransferResult.LINKED_EVENT_CHAIN_OPEN,
+                )
+            ]
+        return await self._submit(transfers)
+
+    async def _dispatch(
+        self, groups: list[tuple[Sequence[tb.Transfer], asyncio.Future[list]]]
+    ) -> None:
+        batch: list[tb.Transfer] = []
+        offsets: list[int] = []
+        for transfers, _ in groups:
+            offsets.append(len(batch))
+            batch.extend(transfers)
+
+        LEDGER_BATCH_SIZE.labels("create_transfers").observe(len(batch))
+        errors = await self.client.create_transfers(batch)
+
+        per_group: list[list] = [[] for _ in groups]
+        for e in errors:
+            g = bisect_right(offsets, e.index) - 1
+            per_group[g].append(
+                tb.CreateTransfersResult(index=e.index - offsets[g], result=e.result)
+            )
+
+        for (_, fut), group_errors in zip(groups, per_group):
+            if not fut.done():
+                fut.set_result(group_errors)
+
+
+class LookupBatcher(_MicroBatcher[int, dict]):
+    """
+    Coalesces concurrent single-account lookups into one lookup_accounts request.
+
+    Every caller in a batch receives the same id -> Account mapping.
+    """
+
+    def __init__(self, client: LedgerBackend, *, window_s: float, max_size: int = TB_BATCH_MAX):
+        super().__init__(window_s=window_s, max_size=max_size)
+        self.client = client
+
+    async def lookup_account(self, account_id: int) -> tb.Account | None:
+        accounts = await self._submit((account_id,))
+        return accounts.get(account_id)
+
+    async def _dispatch(self, groups: list[tuple[Sequence[int], asyncio.Future[dict]]]) -> None:
+        ids = list(dict.fromkeys(i for account_ids, _ in groups for i in account_ids))
+        LEDGER_BATCH_SIZE.labels("lookup_accounts").observe(len(ids))
+        accounts = {a.id: a for a in await self.client.lookup_accounts(ids)}
+
+        for _, fut in groups:
+            if not fut.done():
+                fut.set_result(accounts)
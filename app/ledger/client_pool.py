@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+import tigerbeetle as tb
+
+from app.ledger.backend import LedgerBackend
+
+
+class PoolClosed(RuntimeError):
+    pass
+
+
+@dataclass
+class _Slot:
+    client: LedgerBackend
+    semaphore: asyncio.Semaphore
+    in_flight: int = 0
+    waiting: int = 0
+    requests: int = 0
+
+
+class TBClientPool:
+    """
+    A fixed set of ledger clients shared by the whole process, itself a LedgerBackend.
+
+    Each call goes to the client with the fewest requests in flight or queued (ties go
+    round-robin), and holds one of that client's `max_in_flight` permits until it
+    returns, so a burst queues here instead of overrunning the client's request limit.
+    Clients are created once by `open()` and closed by `close()`, which waits (up to
+    `drain_timeout_s`) for requests already running; calls made after `close()` raise
+    PoolClosed.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], LedgerBackend],
+        *,
+        size: int = 1,
+        max_in_flight: int = 64,
+        drain_timeout_s: float = 5.0,
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.client_factory = client_factory
+        self.size = size
+        self.max_in_flight = max_in_flight
+        self.drain_timeout_s = drain_timeout_s
+        self._slots: list[_Slot] = []
+        self._next = 0
+        self._closed = False
+
+    def open(self) -> TBClientPool:
+        if self._closed:
+            raise PoolClosed("ledger client pool is closed")
+        if not self._slots:
+            self._slots = [
+                _Slot(self.client_factory(), asyncio.Semaphore(self.max_in_flight))
+                for _ in range(self.size)
+            ]
+        return self
+
+    def _pick(self) -> _Slot:
+        n = len(self._slots)
+        start = self._next
+        self._next = (start + 1) % n
+        best = self._slots[start]
+        for i in range(1, n):
+            slot = self._slots[(start + i) % n]
+            if slot.in_flight + slot.waiting < best.in_flight + best.waiting:
+                best = slot
+        return best
+
+    @asynccontextmanager
+    async def _lease(self) -> AsyncIterator[LedgerBackend]:
+        if self._closed:
+            raise PoolClosed("ledger client pool is closed")
+        self.open()
+        slot = self._pick()
+        slot.waiting += 1
+        try:
+            await slot.semaphore.acquire()
+        finally:
+            slot.waiting -= 1
+        slot.in_flight += 1
+        slot.requests += 1
+        try:
+            yield slot.client
+        finally:
+            slot.in_flight -= 1
+            slot.semaphore.release()
+
+    async def create_accounts(self, accounts: list[tb.Account]) -> list[tb.CreateAccountsResult]:
+        async with self._lease() as client:
+            return await client.create_accounts(accounts)
+
+    async def create_transfers(
+        self, transfers: list[tb.Transfer]
+    ) -> list[tb.CreateTransfersResult]:
+        async with self._lease() as client:
+            return await client.create_transfers(transfers)
+
+    async def lookup_accounts(self, ids: list[int]) -> list[tb.Account]:
+        async with self._lease() as client:
+            return await client.lookup_accounts(ids)
+
+    async def lookup_transfers(self, ids: list[int]) -> list[tb.Transfer]:
+        async with self._lease() as client:
+            return await client.lookup_transfers(ids)
+
+    async def get_account_transfers(self, filter: tb.AccountFilter) -> list[tb.Transfer]:
+        async with self._lease() as client:
+            return await client.get_account_transfers(filter)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "max_in_flight": self.max_in_flight,
+            "closed": self._closed,
+            "clients": [
+                {"in_flight": s.in_flight, "waiting": s.waiting, "requests": s.requests}
+                for s in self._slots
+            ],
+        }
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        slots = self._slots
+
+        async def drain(slot: _Slot) -> None:
+            for _ in range(self.max_in_flight):
+                await slot.semaphore.acquire()
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(drain(s) for s in slots)), self.drain_timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        # The memory backend hands out one shared instance; close each client once.
+        for client in {id(s.client): s.client for s in slots}.values():
+            await client.close()
+
+    async def __aenter__(self) -> TBClientPool:
+        return self.open()
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
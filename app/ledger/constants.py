@@ -11,5 +11,13 @@ ACCOUNT_CODE_WALLET = 100
 
 # Transfer Codes (must be non-zero)
 TRANSFER_CODE_MPESA_DEPOSIT = 100
+# Pending clearing -> wallet hold while an STK push awaits its callback.
+TRANSFER_CODE_MPESA_DEPOSIT_HOLD = 101
 TRANSFER_CODE_P2P = 200
-TRANSFER_CODE_P2P_FEE = 201
\ No newline at end of file
+TRANSFER_CODE_P2P_FEE = 201
+TRANSFER_CODE_PAYOUT = 300
+TRANSFER_CODE_PAYOUT_FEE = 301
+
+# Protocol limits
+# Max events per create_transfers/lookup_accounts request (1 MiB message).
+TB_BATCH_MAX = 8189
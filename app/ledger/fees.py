@@ -0,0 +1,205 @@
+"""
+Tiered P2P fee schedule (M-Pesa style: a flat fee per amount band).
+
+A tariff is compiled once into two parallel tuples, the bands' inclusive upper bounds
+in ascending order and their fees, so a lookup is one bisect over a tuple of ints.
+Reloading builds a new FeeSchedule off the event loop and swaps the reference;
+callers that already hold the old one keep a consistent tariff.
+
+Tariff files are JSON: [{"up_to": 100, "fee": 0}, {"up_to": 500, "fee": 7}, ...],
+amounts and fees in the ledger's unit (whole KES).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_left
+from typing import Iterable, Sequence
+
+from app.ledger.constants import (
+    FEES_REVENUE_ACCOUNT_ID,
+    TRANSFER_CODE_P2P,
+    TRANSFER_CODE_P2P_FEE,
+)
+from app.ledger.ids import p2p_transfer_id
+from app.ledger.ledger_client import TransferSpec
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Used when no p2p_fee_schedule_path is configured: (up_to, fee).
+DEFAULT_P2P_TARIFF: tuple[tuple[int, int], ...] = (
+    (100, 0),
+    (500, 7),
+    (1_000, 13),
+    (1_500, 23),
+    (2_500, 33),
+    (3_500, 53),
+    (5_000, 57),
+    (7_500, 78),
+    (10_000, 90),
+    (15_000, 100),
+    (20_000, 105),
+    (250_000, 108),
+)
+
+
+class FeeScheduleError(ValueError): ...
+
+
+class FeeSchedule:
+    __slots__ = ("bounds", "fees", "max_amount")
+
+    def __init__(self, tiers: Iterable[tuple[int, int]]):
+        tiers = list(tiers)
+        if not tiers:
+            raise FeeScheduleError("fee schedule has no tiers")
+        bounds = tuple(int(up_to) for up_to, _ in tiers)
+        fees = tuple(int(fee) for _, fee in tiers)
+        if bounds[0] < 1 or any(a >= b for a, b in zip(bounds, bounds[1:])):
+            raise FeeScheduleError("tier upper bounds must be positive and strictly increasing")
+        if any(f < 0 for f in fees):
+            raise FeeScheduleError("fees must not be negative")
+        self.bounds = bounds
+        self.fees = fees
+        self.max_amount = bounds[-1]
+
+    @classmethod
+    def from_json(cls, text: str) -> FeeSchedule:
+        try:
+            return cls((t["up_to"], t["fee"]) for t in json.loads(text))
+        except FeeScheduleError:
+            raise
+        # ValueError covers malformed JSON and non-numeric bounds or fees.
+        except (KeyError, TypeError, ValueError) as exc:
+            raise FeeScheduleError(f"invalid fee schedule: {exc}") from exc
+
+    def _check(self, amount: int) -> None:
+        if not 1 <= amount <= self.max_amount:
+            raise FeeScheduleError(f"amount {amount} outside 1..{self.max_amount}")
+
+    def fee(self, amount: int) -> int:
+        self._check(amount)
+        return self.fees[bisect_left(self.bounds, amount)]
+
+    def compute_fees(self, amounts: Sequence[int]) -> list[int]:
+        """fee(a) for each amount, with the range checked once for the whole batch."""
+        if not amounts:
+            return []
+        self._check(min(amounts))
+        self._check(max(amounts))
+        bounds, fees = self.bounds, self.fees
+        return [fees[bisect_left(bounds, a)] for a in amounts]
+
+
+def p2p_transfer_specs(
+    request_id: str, *, sender: int, recipient: int, amount: int, fee: int
+) -> list[TransferSpec]:
+    """
+    The legs of one P2P payment for create_linked_transfers: sender -> recipient, then
+    sender -> fees revenue. A zero fee leg is left out. Ids derive from `request_id`,
+    so a retried payment is answered with EXISTS.
+    """
+    specs = [
+        TransferSpec(
+            id=p2p_transfer_id(request_id, "main"),
+            debit_account_id=sender,
+            credit_account_id=recipient,
+            amount=amount,
+            code=TRANSFER_CODE_P2P,
+        )
+    ]
+    if fee:
+        specs.append(
+            TransferSpec(
+                id=p2p_transfer_id(request_id, "fee"),
+                debit_account_id=sender,
+                credit_account_id=FEES_REVENUE_ACCOUNT_ID,
+                amount=fee,
+                code=TRANSFER_CODE_P2P_FEE,
+            )
+        )
+    return specs
+
+
+def _read_schedule(path: str) -> tuple[float, FeeSchedule]:
+    with open(path) as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        return mtime, FeeSchedule.from_json(f.read())
+
+
+def _read_schedule_if_changed(path: str, mtime: float | None) -> tuple[float, FeeSchedule] | None:
+    """_read_schedule(path), or None while the file's mtime is still `mtime`."""
+    if os.stat(path).st_mtime == mtime:
+        return None
+    return _read_schedule(path)
+
+
+class FeeScheduleSource:
+    """
+    The current FeeSchedule, reloaded from `path` when the file changes.
+
+    `reload()` stats, reads and compiles in a worker thread. A file that fails to parse
+    is logged and the previous schedule stays in use. `start()` polls every
+    `interval_s` in a background task; without a path the default tariff is used and
+    never reloaded.
+    """
+
+    def __init__(self, path: str = "", *, interval_s: float = 30.0):
+        self.path = path
+        self.interval_s = interval_s
+        self.current = FeeSchedule(DEFAULT_P2P_TARIFF)
+        self._mtime: float | None = None
+        self._task: asyncio.Task | None = None
+        if path:
+            self._mtime, self.current = _read_schedule(path)
+
+    async def reload(self) -> bool:
+        if not self.path:
+            return False
+        try:
+            # The stat runs in the thread too: a slow or hung mount must not block the loop.
+            loaded = await asyncio.to_thread(_read_schedule_if_changed, self.path, self._mtime)
+        except (OSError, FeeScheduleError):
+            logger.exception("fee schedule reload from %s failed", self.path)
+            return False
+        if loaded is None:
+            return False
+        self._mtime, self.current = loaded
+        logger.info("fee schedule reloaded from %s", self.path)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.reload()
+            except Exception:
+                # Keep polling: the next change to the file may well be the fix.
+                logger.exception("fee schedule reload from %s failed", self.path)
+
+    def start(self) -> None:
+        if self.path and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+_source: FeeScheduleSource | None = None
+
+
+def get_fee_schedule_source() -> FeeScheduleSource:
+    global _source
+    if _source is None:
+        _source = FeeScheduleSource(
+            settings.p2p_fee_schedule_path,
+            interval_s=settings.p2p_fee_schedule_reload_interval_s,
+        )
+    return _source
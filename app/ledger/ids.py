@@ -0,0 +1,90 @@
+"""
+Stable u128 ledger ids derived from business keys.
+
+An id is a keyed BLAKE2b-128 hash of the key, namespaced per kind of object. Retrying
+a write after a crash therefore needs no lookup of the id used last time: the same key
+yields the same id and TigerBeetle answers the duplicate with EXISTS.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, Literal
+
+# Namespaces (BLAKE2b personalisation, at most 16 bytes). Never change an existing one:
+# every id derived under it would change with it.
+NS_DEPOSIT = b"mpesa-deposit"
+NS_DEPOSIT_HOLD = b"mpesa-hold"
+NS_P2P = b"p2p"
+NS_PAYOUT = b"payout"
+NS_PENDING_POST = b"pending-post"
+NS_PENDING_VOID = b"pending-void"
+NS_WALLET = b"wallet"
+
+P2PLeg = Literal["main", "fee"]
+PayoutLeg = Literal["main", "fee"]
+
+# 0 and 2^128-1 are reserved by TigerBeetle.
+_ID_SPACE = (1 << 128) - 2
+
+
+def _encode(parts: tuple[str | int, ...]) -> bytes:
+    # NUL cannot appear in Postgres text keys, so joining on it is unambiguous.
+    return b"\x00".join(str(p).encode() for p in parts)
+
+
+def derive_id(namespace: bytes, *parts: str | int) -> int:
+    digest = hashlib.blake2b(_encode(parts), digest_size=16, person=namespace).digest()
+    return int.from_bytes(digest, "big") % _ID_SPACE + 1
+
+
+def derive_ids(namespace: bytes, keys: Iterable[str]) -> list[int]:
+    """derive_id(namespace, key) for each key, without the per-call overhead."""
+    blake2b = hashlib.blake2b
+    from_bytes = int.from_bytes
+    return [
+        from_bytes(blake2b(k.encode(), digest_size=16, person=namespace).digest(), "big")
+        % _ID_SPACE
+        + 1
+        for k in keys
+    ]
+
+
+def deposit_transfer_id(checkout_request_id: str) -> int:
+    """Transfer crediting an M-Pesa deposit (clearing -> wallet)."""
+    return derive_id(NS_DEPOSIT, checkout_request_id)
+
+
+def deposit_hold_id(checkout_request_id: str) -> int:
+    """Pending transfer holding an M-Pesa deposit until its callback (clearing -> wallet)."""
+    return derive_id(NS_DEPOSIT_HOLD, checkout_request_id)
+
+
+def p2p_transfer_id(request_id: str, leg: P2PLeg) -> int:
+    """One leg (main amount or fee) of a P2P transfer request."""
+    return derive_id(NS_P2P, request_id, leg)
+
+
+def payout_transfer_id(job_id: str, row_no: int, leg: PayoutLeg) -> int:
+    """One leg (main amount or fee) of row `row_no` of a bulk payout job."""
+    return derive_id(NS_PAYOUT, job_id, row_no, leg)
+
+
+def payout_transfer_ids(job_id: str, row_nos: Iterable[int], leg: PayoutLeg) -> list[int]:
+    """payout_transfer_id(job_id, n, leg) for each row number n, in bulk."""
+    return derive_ids(NS_PAYOUT, (f"{job_id}\x00{n}\x00{leg}" for n in row_nos))
+
+
+def post_transfer_id(pending_id: int) -> int:
+    """The transfer that posts pending transfer `pending_id`."""
+    return derive_id(NS_PENDING_POST, pending_id)
+
+
+def void_transfer_id(pending_id: int) -> int:
+    """The transfer that voids pending transfer `pending_id`."""
+    return derive_id(NS_PENDING_VOID, pending_id)
+
+
+def wallet_account_id(user_id: str) -> int:
+    """A user's wallet account."""
+    return derive_id(NS_WALLET, user_id)
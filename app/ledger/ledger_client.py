@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from typing import Iterable, Sequence
 
 import tigerbeetle as tb
 
+from app.admission import LEDGER_ADMISSION, admitted
+from app.deadline import within_deadline
+from app.ledger.backend import LedgerBackend
+from app.ledger.balance_cache import BalanceCache
+from app.ledger.batcher import LookupBatcher, TransferBatcher
 from app.ledger.constants import (
     LEDGER_KES,
     ACCOUNT_CODE_SYSTEM,
     ACCOUNT_CODE_WALLET,
+    TB_BATCH_MAX,
 )
+from app.ledger.ids import void_transfer_id
+from app.metrics import LEDGER_BATCH_SIZE, LEDGER_REQUEST_SECONDS, LEDGER_RESULTS, timed
+
+
+_LINKED = int(tb.TransferFlags.LINKED)
 
 
 class LedgerError(Exception): ...
@@ -34,11 +46,18 @@ class TransferSpec:
     ledger: int = LEDGER_KES
 
 
+def _count_results(errors) -> None:
+    for e in errors:
+        op = "transfer" if isinstance(e.result, tb.CreateTransferResult) else "account"
+        LEDGER_RESULTS.labels(op, e.result.name).inc()
+
+
 def _raise_unless_only(errors, allowed_results: set) -> None:
     """
     TigerBeetle returns an array of error objects (index + result).
     We treat EXISTS as success for idempotency/crash recovery. <!--citation:4-->
     """
+    _count_results(errors)
     for e in errors:
         if e.result in allowed_results:
             continue
@@ -48,11 +67,82 @@ def _raise_unless_only(errors, allowed_results: set) -> None:
         raise LedgerConflict(str(e.result))
 
 
+def _chain_errors(errors) -> list:
+    """
+    The results that say why a linked chain failed. TigerBeetle reports the event that
+    broke the chain with its own result and every other event as LINKED_EVENT_FAILED;
+    if that result is EXISTS, an earlier attempt created the whole chain (chains are
+    atomic), so a retry comes back as [EXISTS, LINKED_EVENT_FAILED, ...].
+    """
+    breaking = [e for e in errors if e.result != tb.CreateTransferResult.LINKED_EVENT_FAILED]
+    return breaking or list(errors)
+
+
+def _to_tb_transfer(spec: TransferSpec, flags: int | None = None) -> tb.Transfer:
+    return tb.Transfer(
+        id=spec.id,
+        debit_account_id=spec.debit_account_id,
+        credit_account_id=spec.credit_account_id,
+        amount=spec.amount,
+        pending_id=spec.pending_id,
+        user_data_128=spec.user_data_128,
+        user_data_64=spec.user_data_64,
+        user_data_32=spec.user_data_32,
+        timeout=spec.timeout,
+        ledger=spec.ledger,
+        code=spec.code,
+        flags=spec.flags if flags is None else flags,
+        timestamp=0,
+    )
+
+
 class LedgerClient:
-    def __init__(self, client: tb.ClientAsync):
+    def __init__(
+        self,
+        client: LedgerBackend,
+        *,
+        batcher: TransferBatcher | None = None,
+        lookup_batcher: LookupBatcher | None = None,
+        balance_cache: BalanceCache | None = None,
+    ):
         self.client = client
+        # Optional: share create_transfers / lookup_accounts requests with other callers.
+        self.batcher = batcher
+        self.lookup_batcher = lookup_batcher
+        # Optional: read-through account cache, invalidated by this client's own writes.
+        self.balance_cache = balance_cache
 
-    async def create_account(self, account_id: int, *, is_wallet: bool) -> None:
+    async def close(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self.lookup_batcher is not None:
+            await self.lookup_batcher.close()
+
+    async def _submit_transfers(self, batch: list[tb.Transfer]) -> list:
+        results = None
+        try:
+            if self.batcher is not None:
+                # Observed by the batcher, once per merged request.
+                results = await self.batcher.create_transfers(batch)
+            else:
+                LEDGER_BATCH_SIZE.labels("create_transfers").observe(len(batch))
+                results = await self.client.create_transfers(batch)
+            return results
+        finally:
+            # After the write (whatever its outcome), so in-flight reads can't refill stale data.
+            if self.balance_cache is not None:
+                self.balance_cache.invalidate_transfers(batch, results)
+
+    async def _fetch_account(self, account_id: int) -> tb.Account | None:
+        if self.lookup_batcher is not None:
+            return await self.lookup_batcher.lookup_account(account_id)
+        LEDGER_BATCH_SIZE.labels("lookup_accounts").observe(1)
+        accounts = await self.client.lookup_accounts([account_id])
+        # lookup returns matched accounts only (missing ids are omitted)
+        return accounts[0] if accounts else None
+
+    @staticmethod
+    def _account(account_id: int, *, is_wallet: bool) -> tb.Account:
         flags = 0
         code = ACCOUNT_CODE_SYSTEM
 
@@ -61,7 +151,7 @@ class LedgerClient:
             # No overdraft: debits must not exceed credits. <!--citation:2-->
             flags = tb.AccountFlags.DEBITS_MUST_NOT_EXCEED_CREDITS
 
-        account = tb.Account(
+        return tb.Account(
             id=account_id,
             debits_pending=0,
             debits_posted=0,
@@ -76,41 +166,132 @@ class LedgerClient:
             timestamp=0,
         )
 
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_account")
+    async def create_account(self, account_id: int, *, is_wallet: bool) -> None:
+        account = self._account(account_id, is_wallet=is_wallet)
+        LEDGER_BATCH_SIZE.labels("create_accounts").observe(1)
         errors = await self.client.create_accounts([account])
         # exists should be treated like ok for crash-safe retries. <!--citation:4-->
         _raise_unless_only(errors, allowed_results={tb.CreateAccountResult.EXISTS})
 
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "lookup_account")
     async def lookup_account(self, account_id: int) -> tb.Account | None:
-        accounts = await self.client.lookup_accounts([account_id])
-        if not accounts:
-            return None
-        # lookup returns matched accounts; order not guaranteed
-        for a in accounts:
-            if a.id == account_id:
-                return a
-        return None
+        cache = self.balance_cache
+        if cache is None:
+            return await self._fetch_account(account_id)
 
-    async def create_transfer(self, spec: TransferSpec) -> None:
-        t = tb.Transfer(
-            id=spec.id,
-            debit_account_id=spec.debit_account_id,
-            credit_account_id=spec.credit_account_id,
-            amount=spec.amount,
-            pending_id=spec.pending_id,
-            user_data_128=spec.user_data_128,
-            user_data_64=spec.user_data_64,
-            user_data_32=spec.user_data_32,
-            timeout=spec.timeout,
-            ledger=spec.ledger,
-            code=spec.code,
-            flags=spec.flags,
-            timestamp=0,
-        )
+        account = cache.get(account_id)
+        if account is not None:
+            return account
+        token = cache.token()
+        account = await self._fetch_account(account_id)
+        if account is not None:
+            cache.put(account, token)
+        return account
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "lookup_accounts_many")
+    async def lookup_accounts_many(
+        self, account_ids: Iterable[int]
+    ) -> dict[int, tb.Account | None]:
+        """
+        Look up many accounts at once. Ids are chunked to the protocol limit and the
+        chunks are sent concurrently; missing ids map to None.
+        """
+        ids = list(dict.fromkeys(account_ids))
+        found: dict[int, tb.Account | None] = dict.fromkeys(ids)
 
-        errors = await self.client.create_transfers([t])
+        cache = self.balance_cache
+        if cache is not None:
+            for i in ids:
+                found[i] = cache.get(i)
+            ids = [i for i in ids if found[i] is None]
+            token = cache.token()
+
+        chunks = [ids[i : i + TB_BATCH_MAX] for i in range(0, len(ids), TB_BATCH_MAX)]
+        for c in chunks:
+            LEDGER_BATCH_SIZE.labels("lookup_accounts").observe(len(c))
+        pages = await asyncio.gather(*(self.client.lookup_accounts(c) for c in chunks))
+
+        for page in pages:
+            for a in page:
+                found[a.id] = a
+                if cache is not None:
+                    cache.put(a, token)
+        return found
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_transfer")
+    async def create_transfer(self, spec: TransferSpec) -> None:
+        errors = await self._submit_transfers([_to_tb_transfer(spec)])
         # exists should be treated like ok for crash-safe retries. <!--citation:6-->
         _raise_unless_only(errors, allowed_results={tb.CreateTransferResult.EXISTS})
 
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_accounts_many")
+    async def create_accounts_many(
+        self, account_ids: Sequence[int], *, is_wallet: bool
+    ) -> dict[int, tb.CreateAccountResult]:
+        """
+        Create many accounts, chunked to the protocol limit. Returns the failures by
+        index into `account_ids`; EXISTS counts as success.
+        """
+        accounts = [self._account(i, is_wallet=is_wallet) for i in account_ids]
+        chunks = range(0, len(accounts), TB_BATCH_MAX)
+        for i in chunks:
+            size = min(TB_BATCH_MAX, len(accounts) - i)
+            LEDGER_BATCH_SIZE.labels("create_accounts").observe(size)
+        pages = await asyncio.gather(
+            *(self.client.create_accounts(accounts[i : i + TB_BATCH_MAX]) for i in chunks)
+        )
+        for errors in pages:
+            _count_results(errors)
+        return {
+            start + e.index: e.result
+            for start, errors in zip(chunks, pages)
+            for e in errors
+            if e.result != tb.CreateAccountResult.EXISTS
+        }
+
+    async def _create_many(
+        self, specs: Sequence[TransferSpec]
+    ) -> dict[int, tb.CreateTransferResult]:
+        transfers = [_to_tb_transfer(s) for s in specs]
+        chunks = range(0, len(transfers), TB_BATCH_MAX)
+        pages = await asyncio.gather(
+            *(self._submit_transfers(transfers[i : i + TB_BATCH_MAX]) for i in chunks)
+        )
+        for errors in pages:
+            _count_results(errors)
+        return {
+            start + e.index: e.result
+            for start, errors in zip(chunks, pages)
+            for e in errors
+            if e.result != tb.CreateTransferResult.EXISTS
+        }
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_transfers_many")
+    async def create_transfers_many(
+        self, specs: Sequence[TransferSpec]
+    ) -> dict[int, tb.CreateTransferResult]:
+        """
+        Create many independent (unlinked) transfers, chunked to the protocol limit.
+        Returns the failures by index into `specs`; EXISTS counts as success.
+        """
+        return await self._create_many(specs)
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_linked_transfers")
     async def create_linked_transfers(self, specs: Sequence[TransferSpec]) -> None:
         """
         Linked chain rule: all except last must have LINKED flag; last must not. <!--citation:1-->
@@ -123,63 +304,183 @@ class LedgerClient:
             else:
                 flags &= ~tb.TransferFlags.LINKED
 
-            batch.append(
-                tb.Transfer(
-                    id=s.id,
-                    debit_account_id=s.debit_account_id,
-                    credit_account_id=s.credit_account_id,
-                    amount=s.amount,
-                    pending_id=s.pending_id,
-                    user_data_128=s.user_data_128,
-                    user_data_64=s.user_data_64,
-                    user_data_32=s.user_data_32,
-                    timeout=s.timeout,
-                    ledger=s.ledger,
-                    code=s.code,
-                    flags=flags,
-                    timestamp=0,
-                )
-            )
+            batch.append(_to_tb_transfer(s, flags))
 
-        errors = await self.client.create_transfers(batch)
-        _raise_unless_only(errors, allowed_results={tb.CreateTransferResult.EXISTS})
+        errors = await self._submit_transfers(batch)
+        _raise_unless_only(_chain_errors(errors), allowed_results={tb.CreateTransferResult.EXISTS})
 
-    async def two_phase_pending(self, *, transfer_id: int, debit: int, credit: int, amount: int, code: int) -> None:
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "create_chains_many")
+    async def create_chains_many(
+        self, chains: Sequence[Sequence[TransferSpec]], *, max_batch: int = TB_BATCH_MAX
+    ) -> dict[int, tb.CreateTransferResult]:
+        """
+        Create many independent linked chains, packed into as few requests of at most
+        `max_batch` transfers as possible without splitting a chain; the requests are
+        sent concurrently. Returns the result that failed each failed chain, by index
+        into `chains`; a chain that already exists counts as success.
+        """
+        batches: list[tuple[list[tb.Transfer], list[int]]] = []
+        transfers: list[tb.Transfer] = []
+        owners: list[int] = []
+        for n, chain in enumerate(chains):
+            if len(chain) > max_batch:
+                raise ValueError(f"chain {n} has more than {max_batch} transfers")
+            if len(transfers) + len(chain) > max_batch:
+                batches.append((transfers, owners))
+                transfers, owners = [], []
+            last = len(chain) - 1
+            for i, s in enumerate(chain):
+                flags = s.flags | _LINKED if i < last else s.flags & ~_LINKED
+                transfers.append(_to_tb_transfer(s, flags))
+                owners.append(n)
+        if transfers:
+            batches.append((transfers, owners))
+
+        pages = await asyncio.gather(*(self._submit_transfers(t) for t, _ in batches))
+        by_chain: dict[int, list] = {}
+        for (_, owners), errors in zip(batches, pages):
+            _count_results(errors)
+            for e in errors:
+                by_chain.setdefault(owners[e.index], []).append(e)
+        failures = {}
+        for n, errors in by_chain.items():
+            breaking = _chain_errors(errors)[0].result
+            if breaking != tb.CreateTransferResult.EXISTS:
+                failures[n] = breaking
+        return failures
+
+    async def two_phase_pending(
+        self, *, transfer_id: int, debit: int, credit: int, amount: int, code: int, timeout: int = 0
+    ) -> None:
+        """
+        `timeout` is in seconds; 0 holds until posted or voided. Once it runs out the
+        ledger voids the hold itself and a later post or void fails with
+        PENDING_TRANSFER_EXPIRED.
+        """
         # Pending reserves debits_pending/credits_pending. <!--citation:3-->
         await self.create_transfer(
-            TransferSpec(
-                id=transfer_id,
-                debit_account_id=debit,
-                credit_account_id=credit,
-                amount=amount,
-                code=code,
-                flags=tb.TransferFlags.PENDING,
+            pending_spec(
+                transfer_id, debit=debit, credit=credit, amount=amount, code=code, timeout=timeout
             )
         )
 
-    async def two_phase_post(self, *, post_id: int, pending_id: int, code: int) -> None:
+    async def two_phase_post(
+        self, *, post_id: int, pending_id: int, code: int, debit: int = 0, credit: int = 0
+    ) -> None:
         # Post resolves pending -> posted; amount_max posts full amount. <!--citation:3-->
         await self.create_transfer(
-            TransferSpec(
-                id=post_id,
-                debit_account_id=0,
-                credit_account_id=0,
-                amount=tb.amount_max,
-                pending_id=pending_id,
-                code=code,
-                flags=tb.TransferFlags.POST_PENDING_TRANSFER,
-            )
+            post_spec(post_id, pending_id, code=code, debit=debit, credit=credit)
         )
 
-    async def two_phase_void(self, *, void_id: int, pending_id: int, code: int) -> None:
+    async def two_phase_void(
+        self, *, void_id: int, pending_id: int, code: int, debit: int = 0, credit: int = 0
+    ) -> None:
         await self.create_transfer(
-            TransferSpec(
-                id=void_id,
-                debit_account_id=0,
-                credit_account_id=0,
-                amount=0,
-                pending_id=pending_id,
-                code=code,
-                flags=tb.TransferFlags.VOID_PENDING_TRANSFER,
-            )
-        )
\ No newline at end of file
+            void_spec(void_id, pending_id, code=code, debit=debit, credit=credit)
+        )
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "two_phase_post_many")
+    async def two_phase_post_many(
+        self,
+        posts: Sequence[tuple[int, int]],
+        *,
+        code: int,
+        accounts: Sequence[tuple[int, int]] | None = None,
+    ) -> dict[int, tb.CreateTransferResult]:
+        """
+        Post many pending transfers in full, one create_transfers request per
+        TB_BATCH_MAX. `posts` are (post_id, pending_id) pairs; `accounts`, if given,
+        the (debit, credit) account ids of each pending transfer, sent with the post
+        so the ledger checks them and the balance cache drops them. Returns the
+        failures by index into `posts`; a post that already exists counts as success.
+        Holds that were released before they could be posted come back with one of
+        RELEASED_RESULTS.
+        """
+        pairs = accounts or [(0, 0)] * len(posts)
+        return await self._create_many(
+            [
+                post_spec(post_id, pending_id, code=code, debit=debit, credit=credit)
+                for (post_id, pending_id), (debit, credit) in zip(posts, pairs, strict=True)
+            ]
+        )
+
+    @admitted(LEDGER_ADMISSION)
+    @within_deadline("ledger")
+    @timed(LEDGER_REQUEST_SECONDS, "two_phase_void_many")
+    async def two_phase_void_many(
+        self,
+        pending_ids: Sequence[int],
+        *,
+        code: int,
+        accounts: Sequence[tuple[int, int]] | None = None,
+    ) -> dict[int, tb.CreateTransferResult]:
+        """
+        Void many pending transfers, each under void_transfer_id(pending_id), chunked
+        to the protocol limit. `accounts` is as for two_phase_post_many. Returns the
+        failures by index into `pending_ids`; a void that already exists counts as
+        success. Holds that were released some other way come back with one of
+        RELEASED_RESULTS.
+        """
+        pairs = accounts or [(0, 0)] * len(pending_ids)
+        return await self._create_many(
+            [
+                void_spec(void_transfer_id(p), p, code=code, debit=debit, credit=credit)
+                for p, (debit, credit) in zip(pending_ids, pairs, strict=True)
+            ]
+        )
+
+
+# A post or void that fails with one of these finds the hold's funds already released.
+RELEASED_RESULTS = frozenset(
+    {
+        tb.CreateTransferResult.PENDING_TRANSFER_ALREADY_VOIDED,
+        tb.CreateTransferResult.PENDING_TRANSFER_EXPIRED,
+    }
+)
+
+
+def pending_spec(
+    transfer_id: int, *, debit: int, credit: int, amount: int, code: int, timeout: int = 0
+) -> TransferSpec:
+    return TransferSpec(
+        id=transfer_id,
+        debit_account_id=debit,
+        credit_account_id=credit,
+        amount=amount,
+        code=code,
+        flags=tb.TransferFlags.PENDING,
+        timeout=timeout,
+    )
+
+
+def post_spec(
+    post_id: int, pending_id: int, *, code: int, debit: int = 0, credit: int = 0
+) -> TransferSpec:
+    """`debit`/`credit` are the pending transfer's accounts; 0 leaves them to the ledger."""
+    return TransferSpec(
+        id=post_id,
+        debit_account_id=debit,
+        credit_account_id=credit,
+        amount=tb.amount_max,
+        pending_id=pending_id,
+        code=code,
+        flags=tb.TransferFlags.POST_PENDING_TRANSFER,
+    )
+
+
+def void_spec(
+    void_id: int, pending_id: int, *, code: int, debit: int = 0, credit: int = 0
+) -> TransferSpec:
+    return TransferSpec(
+        id=void_id,
+        debit_account_id=debit,
+        credit_account_id=credit,
+        amount=0,
+        pending_id=pending_id,
+        code=code,
+        flags=tb.TransferFlags.VOID_PENDING_TRANSFER,
+    )
@@ -0,0 +1,491 @@
+from __future__ import annotations
+
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from copy import copy
+from dataclasses import replace
+from typing import Any, Callable, Sequence
+
+import tigerbeetle as tb
+
+U128_MAX = 2**128 - 1
+
+_AccountResult = tb.CreateAccountResult
+_TransferResult = tb.CreateTransferResult
+
+# Plain ints: enum.Flag arithmetic dominates the per-event cost otherwise.
+_LINKED = int(tb.TransferFlags.LINKED)
+_PENDING_FLAG = int(tb.TransferFlags.PENDING)
+_POST_FLAG = int(tb.TransferFlags.POST_PENDING_TRANSFER)
+_VOID_FLAG = int(tb.TransferFlags.VOID_PENDING_TRANSFER)
+_TWO_PHASE_FLAGS = _PENDING_FLAG | _POST_FLAG | _VOID_FLAG
+_ACCOUNT_LINKED = int(tb.AccountFlags.LINKED)
+_DEBITS_MUST_NOT_EXCEED_CREDITS = int(tb.AccountFlags.DEBITS_MUST_NOT_EXCEED_CREDITS)
+_CREDITS_MUST_NOT_EXCEED_DEBITS = int(tb.AccountFlags.CREDITS_MUST_NOT_EXCEED_DEBITS)
+
+# Failures that depend on ledger state rather than on the event itself. TigerBeetle
+# remembers the id of a transfer that failed this way and answers ID_ALREADY_FAILED
+# on retry, so the same id can never succeed later with a different outcome.
+_TRANSIENT_RESULTS = frozenset(
+    {
+        _TransferResult.DEBIT_ACCOUNT_NOT_FOUND,
+        _TransferResult.CREDIT_ACCOUNT_NOT_FOUND,
+        _TransferResult.PENDING_TRANSFER_NOT_FOUND,
+        _TransferResult.EXCEEDS_CREDITS,
+        _TransferResult.EXCEEDS_DEBITS,
+    }
+)
+
+_PENDING, _POSTED, _VOIDED, _EXPIRED = range(4)
+
+
+class InMemoryLedger:
+    """
+    In-process stand-in for tb.ClientAsync, for benchmarks and load tests.
+
+    Implements the subset of TigerBeetle semantics this codebase relies on: linked
+    chains (all-or-nothing, LINKED_EVENT_FAILED / LINKED_EVENT_CHAIN_OPEN), two-phase
+    PENDING / POST / VOID transfers with timeouts, DEBITS_MUST_NOT_EXCEED_CREDITS and
+    CREDITS_MUST_NOT_EXCEED_DEBITS limits, EXISTS / EXISTS_WITH_DIFFERENT_* idempotency
+    and ID_ALREADY_FAILED for transient failures. Balancing and closing transfers,
+    imported events and account history are not supported.
+
+    Nothing is persisted and nothing is asynchronous under the hood: every call
+    completes synchronously, so measurements reflect client-side costs only.
+    """
+
+    def __init__(self, clock: Callable[[], int] = time.time_ns):
+        self.clock = clock
+        self._last_timestamp = 0
+
+        self._accounts: dict[int, tb.Account] = {}
+        self._transfers: dict[int, tb.Transfer] = {}
+        # As submitted, for EXISTS checks (post/void events may leave fields zero).
+        self._events: dict[int, tb.Transfer] = {}
+        self._failed: dict[int, Any] = {}
+
+        self._pending_status: dict[int, int] = {}
+        self._expiries: list[tuple[int, int]] = []
+
+        # account id -> transfers touching it, in timestamp order.
+        self._account_timestamps: dict[int, list[int]] = {}
+        self._account_transfers: dict[int, list[tb.Transfer]] = {}
+
+    async def __aenter__(self) -> InMemoryLedger:
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        # State is shared by every user of the backend; nothing to release.
+        return None
+
+    def _next_timestamp(self) -> int:
+        self._last_timestamp = max(self._last_timestamp + 1, self.clock())
+        return self._last_timestamp
+
+    # ---------- batches and linked chains ----------
+
+    def _execute(
+        self,
+        events: Sequence[Any],
+        apply: Callable[[Any, list[Callable[[], None]] | None], Any],
+        ok: Any,
+        linked_flag: int,
+        result_type: type,
+    ) -> list:
+        n = len(events)
+        results: list[Any] = [ok] * n
+
+        i = 0
+        while i < n:
+            start = i
+            while i < n - 1 and events[i].flags & linked_flag:
+                i += 1
+            end = i
+            i += 1
+
+            if events[end].flags & linked_flag:
+                # Chain still open at the end of the batch.
+                for j in range(start, end):
+                    results[j] = type(ok).LINKED_EVENT_FAILED
+                results[end] = type(ok).LINKED_EVENT_CHAIN_OPEN
+                continue
+
+            if start == end:
+                results[start] = apply(events[start], None)
+                continue
+
+            undo: list[Callable[[], None]] = []
+            for j in range(start, end + 1):
+                result = apply(events[j], undo)
+                if result != ok:
+                    for action in reversed(undo):
+                        action()
+                    for k in range(start, end + 1):
+                        results[k] = type(ok).LINKED_EVENT_FAILED
+                    results[j] = result
+                    break
+
+        return [result_type(index=j, result=r) for j, r in enumerate(results) if r != ok]
+
+    # ---------- accounts ----------
+
+    async def create_accounts(self, accounts: list[tb.Account]) -> list[tb.CreateAccountsResult]:
+        return self._execute(
+            accounts,
+            self._create_account,
+            _AccountResult.OK,
+            _ACCOUNT_LINKED,
+            tb.CreateAccountsResult,
+        )
+
+    def _create_account(self, a: tb.Account, undo: list | None) -> _AccountResult:
+        if a.timestamp != 0:
+            return _AccountResult.TIMESTAMP_MUST_BE_ZERO
+        if a.id == 0:
+            return _AccountResult.ID_MUST_NOT_BE_ZERO
+        if a.id == U128_MAX:
+            return _AccountResult.ID_MUST_NOT_BE_INT_MAX
+        flags = int(a.flags)
+        if (flags & _DEBITS_MUST_NOT_EXCEED_CREDITS) and (flags & _CREDITS_MUST_NOT_EXCEED_DEBITS):
+            return _AccountResult.FLAGS_ARE_MUTUALLY_EXCLUSIVE
+        if a.debits_pending:
+            return _AccountResult.DEBITS_PENDING_MUST_BE_ZERO
+        if a.debits_posted:
+            return _AccountResult.DEBITS_POSTED_MUST_BE_ZERO
+        if a.credits_pending:
+            return _AccountResult.CREDITS_PENDING_MUST_BE_ZERO
+        if a.credits_posted:
+            return _AccountResult.CREDITS_POSTED_MUST_BE_ZERO
+        if a.ledger == 0:
+            return _AccountResult.LEDGER_MUST_NOT_BE_ZERO
+        if a.code == 0:
+            return _AccountResult.CODE_MUST_NOT_BE_ZERO
+
+        existing = self._accounts.get(a.id)
+        if existing is not None:
+            if existing.flags != flags & ~_ACCOUNT_LINKED:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_FLAGS
+            if existing.user_data_128 != a.user_data_128:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_USER_DATA_128
+            if existing.user_data_64 != a.user_data_64:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_USER_DATA_64
+            if existing.user_data_32 != a.user_data_32:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_USER_DATA_32
+            if existing.ledger != a.ledger:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_LEDGER
+            if existing.code != a.code:
+                return _AccountResult.EXISTS_WITH_DIFFERENT_CODE
+            return _AccountResult.EXISTS
+
+        self._accounts[a.id] = replace(
+            a, flags=tb.AccountFlags(flags & ~_ACCOUNT_LINKED), timestamp=self._next_timestamp()
+        )
+        if undo is not None:
+            undo.append(lambda: self._accounts.pop(a.id, None))
+        return _AccountResult.OK
+
+    async def lookup_accounts(self, ids: list[int]) -> list[tb.Account]:
+        self._expire_pending()
+        return [replace(self._accounts[i]) for i in ids if i in self._accounts]
+
+    # ---------- transfers ----------
+
+    async def create_transfers(
+        self, transfers: list[tb.Transfer]
+    ) -> list[tb.CreateTransfersResult]:
+        self._expire_pending()
+        return self._execute(
+            transfers,
+            self._create_transfer,
+            _TransferResult.OK,
+            _LINKED,
+            tb.CreateTransfersResult,
+        )
+
+    def _create_transfer(self, t: tb.Transfer, undo: list | None) -> _TransferResult:
+        result = self._validate_and_apply(t, undo)
+        if result in _TRANSIENT_RESULTS:
+            self._failed[t.id] = result
+            if undo is not None:
+                undo.append(lambda: self._failed.pop(t.id, None))
+        return result
+
+    def _validate_and_apply(self, t: tb.Transfer, undo: list | None) -> _TransferResult:
+        if t.timestamp != 0:
+            return _TransferResult.TIMESTAMP_MUST_BE_ZERO
+        if t.id == 0:
+            return _TransferResult.ID_MUST_NOT_BE_ZERO
+        if t.id == U128_MAX:
+            return _TransferResult.ID_MUST_NOT_BE_INT_MAX
+
+        flags = int(t.flags)
+        two_phase = flags & _TWO_PHASE_FLAGS
+        if two_phase and two_phase & (two_phase - 1):
+            return _TransferResult.FLAGS_ARE_MUTUALLY_EXCLUSIVE
+
+        resolves_pending = bool(flags & (_POST_FLAG | _VOID_FLAG))
+        if resolves_pending:
+            if t.pending_id == 0:
+                return _TransferResult.PENDING_ID_MUST_NOT_BE_ZERO
+            if t.pending_id == U128_MAX:
+                return _TransferResult.PENDING_ID_MUST_NOT_BE_INT_MAX
+            if t.pending_id == t.id:
+                return _TransferResult.PENDING_ID_MUST_BE_DIFFERENT
+            if t.timeout != 0:
+                return _TransferResult.TIMEOUT_RESERVED_FOR_PENDING_TRANSFER
+        else:
+            if t.debit_account_id == 0:
+                return _TransferResult.DEBIT_ACCOUNT_ID_MUST_NOT_BE_ZERO
+            if t.debit_account_id == U128_MAX:
+                return _TransferResult.DEBIT_ACCOUNT_ID_MUST_NOT_BE_INT_MAX
+            if t.credit_account_id == 0:
+                return _TransferResult.CREDIT_ACCOUNT_ID_MUST_NOT_BE_ZERO
+            if t.credit_account_id == U128_MAX:
+                return _TransferResult.CREDIT_ACCOUNT_ID_MUST_NOT_BE_INT_MAX
+            if t.debit_account_id == t.credit_account_id:
+                return _TransferResult.ACCOUNTS_MUST_BE_DIFFERENT
+            if t.pending_id != 0:
+                return _TransferResult.PENDING_ID_MUST_BE_ZERO
+            if t.timeout != 0 and not flags & _PENDING_FLAG:
+                return _TransferResult.TIMEOUT_RESERVED_FOR_PENDING_TRANSFER
+            if t.ledger == 0:
+                return _TransferResult.LEDGER_MUST_NOT_BE_ZERO
+            if t.code == 0:
+                return _TransferResult.CODE_MUST_NOT_BE_ZERO
+
+        existing = self._events.get(t.id)
+        if existing is not None:
+            return _transfer_exists(t, existing)
+        if t.id in self._failed:
+            return _TransferResult.ID_ALREADY_FAILED
+
+        if resolves_pending:
+            return self._resolve_pending(t, flags, undo)
+
+        dr = self._accounts.get(t.debit_account_id)
+        if dr is None:
+            return _TransferResult.DEBIT_ACCOUNT_NOT_FOUND
+        cr = self._accounts.get(t.credit_account_id)
+        if cr is None:
+            return _TransferResult.CREDIT_ACCOUNT_NOT_FOUND
+        if dr.ledger != cr.ledger:
+            return _TransferResult.ACCOUNTS_MUST_HAVE_THE_SAME_LEDGER
+        if t.ledger != dr.ledger:
+            return _TransferResult.TRANSFER_MUST_HAVE_THE_SAME_LEDGER_AS_ACCOUNTS
+
+        amount = t.amount
+        pending = bool(flags & _PENDING_FLAG)
+        if pending:
+            if dr.debits_pending + amount > U128_MAX:
+                return _TransferResult.OVERFLOWS_DEBITS_PENDING
+            if cr.credits_pending + amount > U128_MAX:
+                return _TransferResult.OVERFLOWS_CREDITS_PENDING
+        else:
+            if dr.debits_posted + amount > U128_MAX:
+                return _TransferResult.OVERFLOWS_DEBITS_POSTED
+            if cr.credits_posted + amount > U128_MAX:
+                return _TransferResult.OVERFLOWS_CREDITS_POSTED
+        if dr.flags & _DEBITS_MUST_NOT_EXCEED_CREDITS:
+            if dr.debits_pending + dr.debits_posted + amount > dr.credits_posted:
+                return _TransferResult.EXCEEDS_CREDITS
+        if cr.flags & _CREDITS_MUST_NOT_EXCEED_DEBITS:
+            if cr.credits_pending + cr.credits_posted + amount > cr.debits_posted:
+                return _TransferResult.EXCEEDS_DEBITS
+
+        if undo is not None:
+            undo.append(_balance_restorer(dr))
+            undo.append(_balance_restorer(cr))
+        if pending:
+            dr.debits_pending += amount
+            cr.credits_pending += amount
+        else:
+            dr.debits_posted += amount
+            cr.credits_posted += amount
+
+        stored = copy(t)
+        stored.flags = flags & ~_LINKED  # type: ignore[assignment]
+        stored.timestamp = self._next_timestamp()
+        self._store(t, stored, undo)
+        if pending:
+            self._pending_status[t.id] = _PENDING
+            if undo is not None:
+                undo.append(lambda: self._pending_status.pop(t.id, None))
+            if t.timeout:
+                heapq.heappush(self._expiries, (stored.timestamp + t.timeout * 10**9, t.id))
+        return _TransferResult.OK
+
+    def _resolve_pending(self, t: tb.Transfer, flags: int, undo: list | None) -> _TransferResult:
+        p = self._transfers.get(t.pending_id)
+        if p is None:
+            return _TransferResult.PENDING_TRANSFER_NOT_FOUND
+        if not p.flags & _PENDING_FLAG:
+            return _TransferResult.PENDING_TRANSFER_NOT_PENDING
+        if t.debit_account_id and t.debit_account_id != p.debit_account_id:
+            return _TransferResult.PENDING_TRANSFER_HAS_DIFFERENT_DEBIT_ACCOUNT_ID
+        if t.credit_account_id and t.credit_account_id != p.credit_account_id:
+            return _TransferResult.PENDING_TRANSFER_HAS_DIFFERENT_CREDIT_ACCOUNT_ID
+        if t.ledger and t.ledger != p.ledger:
+            return _TransferResult.PENDING_TRANSFER_HAS_DIFFERENT_LEDGER
+        if t.code and t.code != p.code:
+            return _TransferResult.PENDING_TRANSFER_HAS_DIFFERENT_CODE
+
+        post = bool(flags & _POST_FLAG)
+        if post:
+            amount = p.amount if t.amount == U128_MAX else t.amount
+            if amount > p.amount:
+                return _TransferResult.EXCEEDS_PENDING_TRANSFER_AMOUNT
+        else:
+            if t.amount not in (0, p.amount, U128_MAX):
+                return _TransferResult.PENDING_TRANSFER_HAS_DIFFERENT_AMOUNT
+            amount = p.amount
+
+        status = self._pending_status[p.id]
+        if status == _POSTED:
+            return _TransferResult.PENDING_TRANSFER_ALREADY_POSTED
+        if status == _VOIDED:
+            return _TransferResult.PENDING_TRANSFER_ALREADY_VOIDED
+        if status == _EXPIRED:
+            return _TransferResult.PENDING_TRANSFER_EXPIRED
+
+        dr = self._accounts[p.debit_account_id]
+        cr = self._accounts[p.credit_account_id]
+        if undo is not None:
+            undo.append(_balance_restorer(dr))
+            undo.append(_balance_restorer(cr))
+            undo.append(lambda: self._pending_status.__setitem__(p.id, _PENDING))
+
+        dr.debits_pending -= p.amount
+        cr.credits_pending -= p.amount
+        if post:
+            dr.debits_posted += amount
+            cr.credits_posted += amount
+        self._pending_status[p.id] = _POSTED if post else _VOIDED
+
+        stored = replace(
+            t,
+            debit_account_id=p.debit_account_id,
+            credit_account_id=p.credit_account_id,
+            amount=amount,
+            ledger=p.ledger,
+            code=t.code or p.code,
+            flags=tb.TransferFlags(flags & ~_LINKED),
+            timestamp=self._next_timestamp(),
+        )
+        self._store(t, stored, undo)
+        return _TransferResult.OK
+
+    def _store(self, event: tb.Transfer, stored: tb.Transfer, undo: list | None) -> None:
+        self._events[stored.id] = event
+        self._transfers[stored.id] = stored
+        for account_id in (stored.debit_account_id, stored.credit_account_id):
+            self._account_timestamps.setdefault(account_id, []).append(stored.timestamp)
+            self._account_transfers.setdefault(account_id, []).append(stored)
+
+        if undo is not None:
+
+            def _unstore() -> None:
+                del self._events[stored.id]
+                del self._transfers[stored.id]
+                for account_id in (stored.debit_account_id, stored.credit_account_id):
+                    self._account_timestamps[account_id].pop()
+                    self._account_transfers[account_id].pop()
+
+            undo.append(_unstore)
+
+    def _expire_pending(self) -> None:
+        now = self.clock()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, pending_id = heapq.heappop(self._expiries)
+            if self._pending_status.get(pending_id) != _PENDING:
+                continue
+            p = self._transfers[pending_id]
+            self._accounts[p.debit_account_id].debits_pending -= p.amount
+            self._accounts[p.credit_account_id].credits_pending -= p.amount
+            self._pending_status[pending_id] = _EXPIRED
+
+    async def lookup_transfers(self, ids: list[int]) -> list[tb.Transfer]:
+        return [replace(self._transfers[i]) for i in ids if i in self._transfers]
+
+    async def get_account_transfers(self, filter: tb.AccountFilter) -> list[tb.Transfer]:
+        self._expire_pending()
+        want_debits = bool(filter.flags & tb.AccountFilterFlags.DEBITS)
+        want_credits = bool(filter.flags & tb.AccountFilterFlags.CREDITS)
+        if filter.limit == 0 or not (want_debits or want_credits):
+            return []
+
+        timestamps = self._account_timestamps.get(filter.account_id, [])
+        transfers = self._account_transfers.get(filter.account_id, [])
+        lo = bisect_left(timestamps, filter.timestamp_min) if filter.timestamp_min else 0
+        hi = bisect_right(timestamps, filter.timestamp_max) if filter.timestamp_max else None
+        window = transfers[lo:hi]
+        if filter.flags & tb.AccountFilterFlags.REVERSED:
+            window = window[::-1]
+
+        out: list[tb.Transfer] = []
+        for t in window:
+            if not want_debits and t.debit_account_id == filter.account_id:
+                continue
+            if not want_credits and t.credit_account_id == filter.account_id:
+                continue
+            if filter.code and t.code != filter.code:
+                continue
+            if filter.user_data_128 and t.user_data_128 != filter.user_data_128:
+                continue
+            if filter.user_data_64 and t.user_data_64 != filter.user_data_64:
+                continue
+            if filter.user_data_32 and t.user_data_32 != filter.user_data_32:
+                continue
+            out.append(replace(t))
+            if len(out) == filter.limit:
+                break
+        return out
+
+
+def _balance_restorer(a: tb.Account) -> Callable[[], None]:
+    saved = (a.debits_pending, a.debits_posted, a.credits_pending, a.credits_posted)
+
+    def _restore() -> None:
+        a.debits_pending, a.debits_posted, a.credits_pending, a.credits_posted = saved
+
+    return _restore
+
+
+def _transfer_exists(t: tb.Transfer, e: tb.Transfer) -> _TransferResult:
+    if (int(t.flags) & ~_LINKED) != (int(e.flags) & ~_LINKED):
+        return _TransferResult.EXISTS_WITH_DIFFERENT_FLAGS
+    if t.pending_id != e.pending_id:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_PENDING_ID
+    if t.timeout != e.timeout:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_TIMEOUT
+    if t.debit_account_id != e.debit_account_id:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_DEBIT_ACCOUNT_ID
+    if t.credit_account_id != e.credit_account_id:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_CREDIT_ACCOUNT_ID
+    if t.amount != e.amount:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_AMOUNT
+    if t.user_data_128 != e.user_data_128:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_USER_DATA_128
+    if t.user_data_64 != e.user_data_64:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_USER_DATA_64
+    if t.user_data_32 != e.user_data_32:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_USER_DATA_32
+    if t.ledger != e.ledger:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_LEDGER
+    if t.code != e.code:
+        return _TransferResult.EXISTS_WITH_DIFFERENT_CODE
+    return _TransferResult.EXISTS
+
+
+_shared: InMemoryLedger | None = None
+
+
+def get_memory_ledger() -> InMemoryLedger:
+    # One ledger per process, so every "client" sees the same accounts and transfers.
+    global _shared
+    if _shared is None:
+        _shared = InMemoryLedger()
+    return _shared
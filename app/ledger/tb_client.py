@@ -1,9 +1,80 @@
 import tigerbeetle as tb
+
+from app.ledger.backend import LedgerBackend
+from app.ledger.balance_cache import BalanceCache
+from app.ledger.batcher import LookupBatcher, TransferBatcher
+from app.ledger.client_pool import TBClientPool
+from app.ledger.constants import FEES_REVENUE_ACCOUNT_ID, MPESA_CLEARING_ACCOUNT_ID
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import get_memory_ledger
 from app.settings.config import settings
 
-def get_tb_client_async() -> tb.ClientAsync:
+
+def get_tb_client_async() -> LedgerBackend:
+    if settings.ledger_backend == "memory":
+        return get_memory_ledger()
     # replica_addresses can be "host:port" or just "3000" (localhost default)
     return tb.ClientAsync(
         cluster_id=settings.tb_cluster_id,
         replica_addresses=settings.tb_address,
-    )
\ No newline at end of file
+    )
+
+
+_pool: TBClientPool | None = None
+
+
+def get_tb_client_pool() -> TBClientPool:
+    # Process-wide; opened and closed by the app lifespan. Scripts build their own.
+    global _pool
+    if _pool is None:
+        _pool = new_tb_client_pool()
+    return _pool
+
+
+async def close_tb_client_pool() -> None:
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+
+def new_tb_client_pool() -> TBClientPool:
+    return TBClientPool(
+        get_tb_client_async,
+        size=settings.tb_client_pool_size,
+        max_in_flight=settings.tb_client_max_in_flight,
+    )
+
+
+def get_ledger_client(client: LedgerBackend) -> LedgerClient:
+    # Wrap a TigerBeetle client with whatever ledger features are enabled in settings.
+    batcher = None
+    lookup_batcher = None
+    if settings.ledger_batch_enabled:
+        batcher = TransferBatcher(
+            client,
+            window_s=settings.ledger_batch_window_ms / 1000,
+            max_size=settings.ledger_batch_max_size,
+        )
+        lookup_batcher = LookupBatcher(
+            client,
+            window_s=settings.ledger_batch_window_ms / 1000,
+            max_size=settings.ledger_batch_max_size,
+        )
+    balance_cache = None
+    if settings.ledger_balance_cache_enabled:
+        system_ttl = settings.ledger_balance_cache_system_ttl_s
+        balance_cache = BalanceCache(
+            max_entries=settings.ledger_balance_cache_size,
+            ttl_s=settings.ledger_balance_cache_ttl_s,
+            ttl_overrides={
+                MPESA_CLEARING_ACCOUNT_ID: system_ttl,
+                FEES_REVENUE_ACCOUNT_ID: system_ttl,
+            },
+        )
+    return LedgerClient(
+        client,
+        batcher=batcher,
+        lookup_batcher=lookup_batcher,
+        balance_cache=balance_cache,
+    )
@@ -1,8 +1,57 @@
-from fastapi import FastAPI, status
+from contextlib import asynccontextmanager
 
-from app.services.health import readiness
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, Response
 
-app = FastAPI(title="Resilient Mobile Wallet")
+from app.admission import DB_ADMISSION, LEDGER_ADMISSION, Overloaded
+from app.api import statements
+from app.db.engine import pool_stats
+from app.deadline import DeadlineExceeded, DeadlineMiddleware
+from app.ledger.fees import get_fee_schedule_source
+from app.ledger.tb_client import close_tb_client_pool, get_tb_client_pool
+from app.metrics import CONTENT_TYPE, REGISTRY, HTTPMetricsMiddleware
+from app.services.callback_ingest import get_callback_ingestor
+from app.services.health import get_readiness_prober
+from app.services.partition_maintenance import get_partition_maintainer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_tb_client_pool().open()
+    prober = get_readiness_prober()
+    prober.start()
+    fees = get_fee_schedule_source()
+    fees.start()
+    partitions = get_partition_maintainer()
+    partitions.start()
+    yield
+    await get_callback_ingestor().close()
+    await partitions.stop()
+    await fees.stop()
+    await prober.stop()
+    await close_tb_client_pool()
+
+
+app = FastAPI(title="Resilient Mobile Wallet", lifespan=lifespan)
+app.add_middleware(HTTPMetricsMiddleware)
+app.add_middleware(DeadlineMiddleware)
+app.include_router(statements.router)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Shed by admission control: cheap to answer, and tells the caller when to retry
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    # The request's budget ran out before its database or ledger work could finish
+    return JSONResponse({"detail": str(exc)}, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
 
 
 @app.get("/health")
@@ -13,12 +62,46 @@ async def health():
 
 @app.get("/ready")
 async def ready():
-    # Readiness: dependencies reachable
-    r = await readiness()
-    if not (r.postgres_ok and r.tigerbeetle_ok):
-        return (
-            {"ready": False, "postgres_ok": r.postgres_ok, "tigerbeetle_ok": r.tigerbeetle_ok},
-            status.HTTP_503_SERVICE_UNAVAILABLE,
-        )
-
-    return {"ready": True, "postgres_ok": True, "tigerbeetle_ok": True}
\ No newline at end of file
+    # Readiness: last background probe of the dependencies, if recent enough
+    prober = get_readiness_prober()
+    r = prober.last
+    body = {"ready": prober.is_ready(), "age_s": prober.age_s()}
+    if r is not None:
+        body |= {
+            "postgres_ok": r.postgres_ok,
+            "tigerbeetle_ok": r.tigerbeetle_ok,
+            "postgres_latency_ms": r.postgres_latency_ms,
+            "tigerbeetle_latency_ms": r.tigerbeetle_latency_ms,
+        }
+    code = status.HTTP_200_OK if body["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(body, status_code=code)
+
+
+@app.get("/stats/db-pool")
+async def db_pool():
+    # Connection pool usage for this worker process
+    return pool_stats()
+
+
+@app.get("/stats/callback-ingest")
+async def callback_ingest():
+    # Callback queue depth and lag for this worker process
+    return get_callback_ingestor().stats()
+
+
+@app.get("/stats/ledger-pool")
+async def ledger_pool():
+    # TigerBeetle client pool usage for this worker process
+    return get_tb_client_pool().stats()
+
+
+@app.get("/stats/admission")
+async def admission():
+    # Admission limits, queue depth and rejections for this worker process
+    return {"ledger": LEDGER_ADMISSION.stats(), "db": DB_ADMISSION.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text format, for this worker process
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,334 @@
+"""
+In-process metrics, rendered in the Prometheus text exposition format at /metrics.
+
+Kept deliberately small so it can stay on under full load: a labelled child is looked up
+once per call in a dict and updating it is a few integer/float operations, with no
+locks (everything runs on the event loop thread). Histograms store per-bucket counts
+and only cumulate them when rendered.
+
+Every uvicorn worker has its own registry; scrape each worker (or run one per pod).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+# Seconds; from 50µs (an in-memory ledger call) to 10s (a statement timeout).
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+# Items per request, up to the TigerBeetle batch limit.
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8189)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; cumulated at render time.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: tuple[str, ...], child: Any) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _render_child(self, values: tuple[str, ...], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def _render_child(self, values: tuple[str, ...], child: _GaugeChild) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        lines, cumulative = [], 0
+        for bound, n in zip((*self.buckets, float("inf")), child.counts):
+            cumulative += n
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(child.sum)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LEDGER_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram("ledger_request_seconds", "LedgerClient call latency.", ["method"])
+)
+LEDGER_BATCH_SIZE: Histogram = REGISTRY.register(
+    Histogram(
+        "ledger_batch_size",
+        "Accounts or transfers per ledger request, after micro-batching.",
+        ["method"],
+        buckets=BATCH_SIZE_BUCKETS,
+    )
+)
+LEDGER_RESULTS: Counter = REGISTRY.register(
+    Counter(
+        "ledger_results_total",
+        "Non-OK TigerBeetle create results seen by the ledger client.",
+        ["op", "result"],
+    )
+)
+DB_STATEMENT_SECONDS: Histogram = REGISTRY.register(
+    Histogram("db_statement_seconds", "SQL statement latency by caller.", ["function"])
+)
+DB_STATEMENT_ERRORS: Counter = REGISTRY.register(
+    Counter("db_statement_errors_total", "SQL statements that raised, by caller.", ["function"])
+)
+HTTP_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "http_request_seconds",
+        "HTTP request latency, until the response body is sent.",
+        ["method", "route", "status"],
+    )
+)
+ADMISSION_REJECTED: Counter = REGISTRY.register(
+    Counter(
+        "admission_rejected_total",
+        "Calls shed by admission control, by reason (queue_full, queue_timeout).",
+        ["controller", "reason"],
+    )
+)
+ADMISSION_QUEUE_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "admission_queue_seconds",
+        "Time admitted calls spent queued for an in-flight slot.",
+        ["controller"],
+    )
+)
+DEADLINE_EXCEEDED: Counter = REGISTRY.register(
+    Counter(
+        "deadline_exceeded_total",
+        "Calls abandoned because the request deadline was spent, by layer (db, ledger).",
+        ["layer"],
+    )
+)
+PARTITION_MAINTENANCE_FAILURES: Counter = REGISTRY.register(
+    Counter(
+        "partition_maintenance_failures_total",
+        "Rounds of upcoming-partition creation that failed, by table (empty: the whole round).",
+        ["table"],
+    )
+)
+CALLBACK_QUEUE_DEPTH: Gauge = REGISTRY.register(
+    Gauge("callback_queue_depth", "Deposit callbacks waiting to be applied.")
+)
+CALLBACK_LAG_SECONDS: Histogram = REGISTRY.register(
+    Histogram(
+        "callback_lag_seconds",
+        "Time the oldest callback of each applied batch waited in the queue.",
+    )
+)
+
+# The repository or service function whose SQL is running (see `sql_label`).
+_sql_label: contextvars.ContextVar[str] = contextvars.ContextVar("sql_label", default="other")
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def sql_label(fn: F) -> F:
+    """Attribute the statements `fn` runs to `<module>.<qualname>` in db_statement_seconds."""
+    label = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _sql_label.set(label)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _sql_label.reset(token)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable[[F], F]:
+    """Observe how long each call of the decorated coroutine function takes."""
+    child = histogram.labels(*labels)
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def instrument_engine(sync_engine: Any) -> None:
+    """Time every statement on `sync_engine` (an AsyncEngine's .sync_engine)."""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        elapsed = time.perf_counter() - context._metrics_start
+        DB_STATEMENT_SECONDS.labels(_sql_label.get()).observe(elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):  # type: ignore[no-untyped-def]
+        DB_STATEMENT_ERRORS.labels(_sql_label.get()).inc()
+
+
+class HTTPMetricsMiddleware:
+    """
+    Plain ASGI middleware (no per-request task, unlike BaseHTTPMiddleware). Requests
+    are labelled with the matched route template, never the raw path.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), status
+            ).observe(time.perf_counter() - start)
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, String, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String, func, text
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, foreign, mapped_column, relationship
 
 from app.db.base import Base
+from app.models.deposit_callback import DepositCallback
 
 
 class Deposit(Base):
     __tablename__="deposits"
+    __table_args__=(
+        # Only pending deposits are indexed, so the expiry sweep stays small.
+        Index("ix_deposits_pending_created_at","created_at",
+              postgresql_where=text("status = 'PENDING_CALLBACK'")),
+        Index("ix_deposits_user_id_created_at","user_id","created_at"),
+        # Per-partition lookup index; uniqueness is enforced through deposit_keys.
+        Index("ix_deposits_checkout_request_id","checkout_request_id"),
+        # Monthly range partitions (app/db/partitions.py), no default partition.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
+    # The primary key has to include the partition key; id alone is unique through
+    # deposit_keys (see app/models/deposit_key.py).
     id: Mapped[str] = mapped_column(String, primary_key=True)
     user_id: Mapped[str] = mapped_column(String, ForeignKey("users.id"), nullable=False)
 
@@ -17,15 +30,26 @@ class Deposit(Base):
     status:Mapped[str]=mapped_column(String,nullable=False,
                                      default='PENDING_CALLBACK')
     
-    checkout_request_id:Mapped[str]=mapped_column(String,nullable=False,unique=True)
+    checkout_request_id:Mapped[str]=mapped_column(String,nullable=False)
     merchant_request_id:Mapped[str | None]=mapped_column(String,nullable=True)
 
     receipt:Mapped[str |None]=mapped_column(String,nullable=True)
-    raw_callback_json:Mapped[dict | None]=mapped_column(JSONB,nullable=True)
+    # Legacy: payloads are appended to deposit_callbacks now. Deferred so loading a
+    # Deposit never pulls the JSON.
+    raw_callback_json:Mapped[dict | None]=mapped_column(JSONB,nullable=True,deferred=True)
 
-    created_at: Mapped[object] = mapped_column(DateTime(timezone=True),
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True),primary_key=True,
                                                 server_default=func.now())
     
     updated_at: Mapped[object] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
-    )
\ No newline at end of file
+    )
+
+    # Every callback received for this deposit, oldest first (lazy; await
+    # deposit.awaitable_attrs.callbacks under asyncio).
+    callbacks:Mapped[list[DepositCallback]]=relationship(
+        primaryjoin=lambda: Deposit.id==foreign(DepositCallback.deposit_id),
+        order_by=lambda: DepositCallback.received_at,
+        viewonly=True,
+        lazy="select",
+    )
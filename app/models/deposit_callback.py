@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, DateTime, Index, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DepositCallback(Base):
+    """
+    Append-only log of raw M-Pesa callbacks, duplicates included.
+
+    Range-partitioned by month on received_at (see app/db/partitions.py), so old
+    months can be detached or dropped without touching the deposits table.
+    """
+
+    __tablename__ = "deposit_callbacks"
+    __table_args__ = (
+        Index("ix_deposit_callbacks_deposit_id", "deposit_id", "received_at"),
+        {"postgresql_partition_by": "RANGE (received_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    received_at: Mapped[object] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+
+    deposit_id: Mapped[str] = mapped_column(String, nullable=False)
+    checkout_request_id: Mapped[str] = mapped_column(String, nullable=False)
+    # Status the callback reported; None when only the payload was stored.
+    status: Mapped[str | None] = mapped_column(String, nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
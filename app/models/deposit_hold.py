@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import UInt128Bytes
+from app.models.deposit_key import DepositKey  # noqa: F401  (deposit_id FK target)
+
+
+class DepositHold(Base):
+    """
+    A pending clearing -> wallet transfer reserving a deposit while its STK push
+    waits for the callback (released_at IS NULL while the hold is open).
+
+    The hold carries a ledger timeout, so funds are released even if nothing here
+    runs; `resolution` records how it ended: SETTLED (posted when settlement credited
+    the deposit), VOIDED (the deposit failed or was abandoned) or EXPIRED (the ledger
+    timed it out first).
+    """
+
+    __tablename__ = "deposit_holds"
+    __table_args__ = (
+        # Only open holds are indexed, so the sweep stays small.
+        Index(
+            "ix_deposit_holds_open_expires_at",
+            "expires_at",
+            postgresql_where=text("released_at IS NULL"),
+        ),
+        CheckConstraint("octet_length(pending_id) = 16", name="deposit_holds_pending_id_len_check"),
+        CheckConstraint(
+            "octet_length(credit_account_id) = 16",
+            name="deposit_holds_credit_account_id_len_check",
+        ),
+    )
+
+    deposit_id: Mapped[str] = mapped_column(String, ForeignKey("deposit_keys.id"), primary_key=True)
+
+    # deposit_hold_id(checkout_request_id), so placing a hold again hits EXISTS.
+    pending_id: Mapped[int] = mapped_column(UInt128Bytes, nullable=False, unique=True)
+    credit_account_id: Mapped[int] = mapped_column(UInt128Bytes, nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    expires_at: Mapped[object] = mapped_column(DateTime(timezone=True), nullable=False)
+    released_at: Mapped[object | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    resolution: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DepositKey(Base):
+    """
+    Global registry of deposit ids and checkout request ids.
+
+    `deposits` is partitioned by created_at, and Postgres can only enforce a unique
+    key on a partitioned table if it includes the partition key. A BEFORE INSERT
+    trigger on `deposits` registers every new row here, so a reused id or
+    checkout_request_id still fails the insert. Rows stay after their deposit
+    partition is archived, and deposit_outbox references this table.
+    """
+
+    __tablename__ = "deposit_keys"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    checkout_request_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), nullable=False)
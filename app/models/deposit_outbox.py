@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import UInt128Bytes
+from app.models.deposit_key import DepositKey  # noqa: F401  (deposit_id FK target)
+
+
+class DepositOutbox(Base):
+    """A SUCCESS deposit waiting to be credited on the ledger (processed_at IS NULL)."""
+
+    __tablename__ = "deposit_outbox"
+    __table_args__ = (
+        Index(
+            "ix_deposit_outbox_unprocessed",
+            "id",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+        CheckConstraint(
+            "octet_length(transfer_id) = 16", name="deposit_outbox_transfer_id_len_check"
+        ),
+        CheckConstraint(
+            "octet_length(credit_account_id) = 16",
+            name="deposit_outbox_credit_account_id_len_check",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    deposit_id: Mapped[str] = mapped_column(
+        String, ForeignKey("deposit_keys.id"), nullable=False, unique=True
+    )
+
+    # Deterministic per deposit, so a re-post after a crash is answered with EXISTS.
+    transfer_id: Mapped[int] = mapped_column(UInt128Bytes, nullable=False, unique=True)
+    credit_account_id: Mapped[int] = mapped_column(UInt128Bytes, nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[object | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -10,4 +10,16 @@ class DepositStatus(str,Enum):
     PENDING_CALLBACK="PENDING_CALLBACK"
     SUCCESS="SUCCESS"
     FAILED="FAILED"
-    
\ No newline at end of file
+
+class PayoutJobStatus(str,Enum):
+    RUNNING="RUNNING"
+    DONE="DONE"
+
+class PayoutRowStatus(str,Enum):
+    POSTED="POSTED"
+    FAILED="FAILED"
+
+class HoldResolution(str,Enum):
+    SETTLED="SETTLED"
+    VOIDED="VOIDED"
+    EXPIRED="EXPIRED"
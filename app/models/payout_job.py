@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import UInt128Bytes
+
+
+class PayoutJob(Base):
+    """
+    One bulk payout file being paid out of `source_account_id`.
+
+    Rows are numbered from 1 in file order. Everything before `next_row` has its
+    result in payout_rows and is skipped when the job is run again, so a rerun of an
+    interrupted job picks up where it stopped.
+    """
+
+    __tablename__ = "payout_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "octet_length(source_account_id) = 16",
+            name="payout_jobs_source_account_id_len_check",
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    source_account_id: Mapped[int] = mapped_column(UInt128Bytes, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+
+    next_row: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="1")
+    posted: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    failed: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[object] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
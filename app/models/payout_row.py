@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, ForeignKey, Index, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import UInt128Bytes
+from app.models.payout_job import PayoutJob  # noqa: F401  (job_id FK target)
+
+
+class PayoutRow(Base):
+    """The outcome of one row of a payout file (POSTED or FAILED, with the reason)."""
+
+    __tablename__ = "payout_rows"
+    __table_args__ = (
+        Index(
+            "ix_payout_rows_failed",
+            "job_id",
+            "row_no",
+            postgresql_where=text("status = 'FAILED'"),
+        ),
+    )
+
+    job_id: Mapped[str] = mapped_column(String, ForeignKey("payout_jobs.id"), primary_key=True)
+    row_no: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    recipient: Mapped[str] = mapped_column(String, nullable=False)
+    amount: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    fee: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # The main leg's (deterministic) transfer id; None for rows never sent to the ledger.
+    transfer_id: Mapped[int | None] = mapped_column(UInt128Bytes, nullable=True)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import CheckConstraint, DateTime, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
-from app.db.types import UInt128Numeric
+from app.db.types import UInt128Bytes
 
 
 class User(Base):
     __tablename__="users"
+    __table_args__=(
+        CheckConstraint("octet_length(tb_account_id) = 16",name="users_tb_account_id_len_check"),
+    )
 
     id:Mapped[str]=mapped_column(String,primary_key=True)
     full_name:Mapped[str]=mapped_column(String,nullable=False)
@@ -16,7 +19,7 @@ class User(Base):
     phone_number:Mapped[str]=mapped_column(String,nullable=False,unique=True)
     kycStatus:Mapped[str]=mapped_column(String,nullable=False,default='PENDING')
 
-    tb_account_id:Mapped[int]=mapped_column(UInt128Numeric,nullable=False,
+    tb_account_id:Mapped[int]=mapped_column(UInt128Bytes,nullable=False,
                                             unique=True)
     
     created_at: Mapped[object] = mapped_column(DateTime(timezone=True), 
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import String, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.repositories.deposits import (
+    TERMINAL_DEPOSIT_STATUSES,
+    DepositNotFoundError,
+    callback_log_insert,
+    outbox_insert_from,
+)
+from app.db.session import SessionLocal
+from app.db.types import UInt128Bytes
+from app.deadline import without_deadline
+from app.ledger.ids import deposit_transfer_id
+from app.metrics import CALLBACK_LAG_SECONDS, CALLBACK_QUEUE_DEPTH, sql_label
+from app.models.deposit import Deposit
+from app.settings.config import settings
+
+_QUEUE_DEPTH = CALLBACK_QUEUE_DEPTH.labels()
+_LAG_SECONDS = CALLBACK_LAG_SECONDS.labels()
+
+
+@dataclass(frozen=True)
+class IncomingCallback:
+    checkout_request_id: str
+    status: str
+    receipt: str | None
+    payload: dict
+
+
+@dataclass
+class _Queued:
+    callback: IncomingCallback
+    enqueued_at: float
+    future: asyncio.Future[bool]
+
+
+class CallbackIngestor:
+    """
+    Applies deposit callbacks in micro-batches, one bulk UPDATE per batch.
+
+    `submit` waits on a bounded queue (backpressure once `queue_depth` callbacks are
+    waiting) and resolves like `apply_callback`: True if the deposit changed, False
+    for a duplicate on a terminal deposit, DepositNotFoundError for an unknown id.
+    A batch is flushed at `flush_size` callbacks or `flush_interval_s` after its
+    first one arrived.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        flush_size: int,
+        flush_interval_s: float,
+        queue_depth: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if flush_size < 1:
+            raise ValueError("flush_size must be at least 1")
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval_s = flush_interval_s
+        self.clock = clock
+        self._queue: asyncio.Queue[_Queued] = asyncio.Queue(maxsize=queue_depth)
+        # Later callbacks for a checkout id already in the batch wait for the next one.
+        self._carry: list[_Queued] = []
+        self._worker: asyncio.Task[None] | None = None
+        self._waiting: set[asyncio.Future[bool]] = set()
+
+        self.batches = 0
+        self.applied = 0
+        self.last_lag_s = 0.0
+        self.max_lag_s = 0.0
+
+    async def submit(self, callback: IncomingCallback) -> bool:
+        if self._worker is None or self._worker.done():
+            # The worker serves every later caller, so it must not inherit this
+            # caller's request deadline.
+            self._worker = asyncio.create_task(self._run(), context=without_deadline())
+        fut: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._waiting.add(fut)
+        fut.add_done_callback(self._waiting.discard)
+        await self._queue.put(_Queued(callback, self.clock(), fut))
+        _QUEUE_DEPTH.set(self._depth())
+        return await fut
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                await self._flush(batch)
+            except Exception as exc:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+
+    async def _collect(self) -> list[_Queued]:
+        pending = self._carry
+        self._carry = []
+        if not pending:
+            pending.append(await self._queue.get())
+
+        deadline = self.clock() + self.flush_interval_s
+        while len(pending) < self.flush_size:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        batch: list[_Queued] = []
+        seen: set[str] = set()
+        for item in pending:
+            cid = item.callback.checkout_request_id
+            if cid in seen:
+                self._carry.append(item)
+            else:
+                seen.add(cid)
+                batch.append(item)
+        _QUEUE_DEPTH.set(self._depth())
+        return batch
+
+    @sql_label
+    async def _flush(self, batch: list[_Queued]) -> None:
+        now = self.clock()
+        self.last_lag_s = max(now - item.enqueued_at for item in batch)
+        self.max_lag_s = max(self.max_lag_s, self.last_lag_s)
+        _LAG_SECONDS.observe(self.last_lag_s)
+
+        # Referenced by both the UPDATE and the log INSERT, so bind the VALUES once.
+        rows = select(
+            values(
+                column("checkout_request_id", String),
+                column("status", String),
+                column("receipt", String),
+                column("payload", JSONB),
+                column("transfer_id", UInt128Bytes),
+                name="v",
+            ).data(
+                [
+                    (
+                        c.checkout_request_id,
+                        c.status,
+                        c.receipt,
+                        c.payload,
+                        deposit_transfer_id(c.checkout_request_id),
+                    )
+                    for c in (item.callback for item in batch)
+                ]
+            )
+        ).cte("cb")
+        changed_rows = (
+            update(Deposit)
+            .where(Deposit.checkout_request_id == rows.c.checkout_request_id)
+            .where(Deposit.status.not_in(TERMINAL_DEPOSIT_STATUSES))
+            .values(
+                status=rows.c.status,
+                receipt=rows.c.receipt,
+                updated_at=func.now(),
+            )
+            .returning(
+                Deposit.id,
+                Deposit.user_id,
+                Deposit.amount,
+                Deposit.status,
+                Deposit.checkout_request_id,
+                rows.c.transfer_id,
+            )
+            .cte("changed")
+        )
+        # SUCCESS rows are queued for settlement by the same statement.
+        outbox = outbox_insert_from(changed_rows, changed_rows.c.transfer_id).cte("outbox")
+        # Every payload that matches a deposit is logged, duplicates included; what was
+        # logged but not changed is a duplicate, what wasn't logged is unknown.
+        logged = callback_log_insert(
+            select(Deposit.id, rows.c.checkout_request_id, rows.c.status, rows.c.payload).join(
+                Deposit, Deposit.checkout_request_id == rows.c.checkout_request_id
+            )
+        ).cte("logged")
+        stmt = (
+            select(
+                logged.c.checkout_request_id,
+                changed_rows.c.checkout_request_id.is_not(None),
+            )
+            .select_from(
+                logged.outerjoin(
+                    changed_rows,
+                    changed_rows.c.checkout_request_id == logged.c.checkout_request_id,
+                )
+            )
+            .add_cte(outbox)
+        )
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                result: dict[str, bool] = dict((await session.execute(stmt)).all())
+        existing = set(result)
+        changed = {cid for cid, was_changed in result.items() if was_changed}
+
+        self.batches += 1
+        self.applied += len(changed)
+        for item in batch:
+            if item.future.done():
+                continue
+            cid = item.callback.checkout_request_id
+            if cid in changed:
+                item.future.set_result(True)
+            elif cid in existing:
+                item.future.set_result(False)
+            else:
+                item.future.set_exception(DepositNotFoundError(cid))
+
+    def _depth(self) -> int:
+        return self._queue.qsize() + len(self._carry)
+
+    def stats(self) -> dict:
+        """Queue depth and lag (time the oldest callback of the last batch waited)."""
+        return {
+            "queue_depth": self._depth(),
+            "queue_capacity": self._queue.maxsize,
+            "batches": self.batches,
+            "applied": self.applied,
+            "lag_ms": round(self.last_lag_s * 1000, 3),
+            "max_lag_ms": round(self.max_lag_s * 1000, 3),
+        }
+
+    async def close(self) -> None:
+        """Apply everything already queued, then stop the worker."""
+        if self._waiting:
+            await asyncio.gather(*self._waiting, return_exceptions=True)
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+
+_ingestor: CallbackIngestor | None = None
+
+
+def get_callback_ingestor() -> CallbackIngestor:
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = CallbackIngestor(
+            flush_size=settings.callback_flush_size,
+            flush_interval_s=settings.callback_flush_interval_ms / 1000,
+            queue_depth=settings.callback_queue_depth,
+        )
+    return _ingestor
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.metrics import sql_label
+from app.models.deposit import Deposit
+from app.models.enums import DepositStatus
+from app.settings.config import settings
+
+
+class DepositExpirySweeper:
+    """
+    Marks deposits that stayed PENDING_CALLBACK for longer than `ttl_s` as FAILED.
+
+    Expired deposits are walked in (created_at, id) keyset order over the partial
+    pending index, one short transaction per batch of `batch_size`. Rows a callback
+    is writing are skipped (SKIP LOCKED) and picked up by the next sweep.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        ttl_s: float,
+        batch_size: int,
+        pause_s: float = 0.0,
+    ):
+        self.session_factory = session_factory
+        self.ttl_s = ttl_s
+        self.batch_size = batch_size
+        # Optional breather between batches, to leave room for callback writes.
+        self.pause_s = pause_s
+
+    @sql_label
+    async def sweep_once(self) -> int:
+        """Expire everything older than the TTL as of now; returns how many rows."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_s)
+        after: tuple[datetime, str] | None = None
+        expired = 0
+
+        while True:
+            batch = (
+                select(Deposit.id)
+                .where(Deposit.status == DepositStatus.PENDING_CALLBACK.value)
+                .where(Deposit.created_at < cutoff)
+                .order_by(Deposit.created_at, Deposit.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            if after is not None:
+                batch = batch.where(tuple_(Deposit.created_at, Deposit.id) > tuple_(*after))
+            claimed = batch.cte("batch")
+
+            async with self.session_factory() as session:
+                async with session.begin():
+                    rows = (
+                        await session.execute(
+                            update(Deposit)
+                            .where(Deposit.id == claimed.c.id)
+                            .values(status=DepositStatus.FAILED.value, updated_at=func.now())
+                            .returning(Deposit.created_at, Deposit.id)
+                        )
+                    ).all()
+
+            if not rows:
+                return expired
+            expired += len(rows)
+            after = max((r.created_at, r.id) for r in rows)
+            if len(rows) < self.batch_size:
+                return expired
+            if self.pause_s:
+                await asyncio.sleep(self.pause_s)
+
+    async def run_forever(self, *, interval_s: float) -> None:
+        while True:
+            await self.sweep_once()
+            await asyncio.sleep(interval_s)
+
+
+def get_deposit_expiry_sweeper() -> DepositExpirySweeper:
+    return DepositExpirySweeper(
+        ttl_s=settings.deposit_pending_ttl_s,
+        batch_size=settings.deposit_expiry_batch_size,
+        pause_s=settings.deposit_expiry_pause_ms / 1000,
+    )
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Mapping, Sequence
+
+import tigerbeetle as tb
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID, TRANSFER_CODE_MPESA_DEPOSIT_HOLD
+from app.ledger.ids import NS_DEPOSIT_HOLD, derive_ids
+from app.ledger.ledger_client import LedgerClient, pending_spec
+from app.metrics import sql_label
+from app.models.deposit import Deposit
+from app.models.deposit_hold import DepositHold
+from app.models.enums import DepositStatus, HoldResolution
+from app.settings.config import settings
+
+
+@dataclass(frozen=True)
+class HoldRequest:
+    deposit_id: str
+    checkout_request_id: str
+    credit_account_id: int
+    amount: int
+
+
+@dataclass(frozen=True)
+class HoldSweepResult:
+    voided: int
+    expired: int
+    failed: int
+
+
+# How a hold ended when posting or voiding it found it already resolved.
+_RESOLVED_BY = {
+    tb.CreateTransferResult.PENDING_TRANSFER_ALREADY_POSTED: HoldResolution.SETTLED,
+    tb.CreateTransferResult.PENDING_TRANSFER_ALREADY_VOIDED: HoldResolution.VOIDED,
+    tb.CreateTransferResult.PENDING_TRANSFER_EXPIRED: HoldResolution.EXPIRED,
+}
+
+
+async def release_holds(
+    session: AsyncSession,
+    deposit_ids: Sequence[str],
+    failures: Mapping[int, tb.CreateTransferResult],
+    *,
+    released_as: HoldResolution,
+) -> int:
+    """
+    Record the outcome of posting or voiding the holds of `deposit_ids` (failures by
+    index, as two_phase_post_many / two_phase_void_many return them): holds that went
+    through as `released_as`, ones found already resolved as what resolved them. Holds
+    that failed any other way stay open for the next sweep. Returns how many stay open.
+    """
+    by_resolution: dict[str, list[str]] = {}
+    still_open = 0
+    for i, deposit_id in enumerate(deposit_ids):
+        result = failures.get(i)
+        resolution = released_as if result is None else _RESOLVED_BY.get(result)
+        if resolution is None:
+            still_open += 1
+            continue
+        by_resolution.setdefault(resolution.value, []).append(deposit_id)
+    for value, ids in by_resolution.items():
+        await session.execute(
+            update(DepositHold)
+            .where(DepositHold.deposit_id.in_(ids))
+            .values(released_at=func.now(), resolution=value)
+        )
+    return still_open
+
+
+class DepositHolds:
+    """
+    Places a pending clearing -> wallet hold for deposits whose STK push was sent, so
+    the incoming amount shows as credits_pending until the callback arrives.
+
+    Each hold times out on the ledger after `timeout_s`, so a callback that never
+    comes cannot reserve funds forever. The hold is recorded in deposit_holds after
+    the ledger accepted it; placing the same deposit again is answered with EXISTS.
+    """
+
+    def __init__(
+        self,
+        ledger: LedgerClient,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        timeout_s: int,
+    ):
+        if timeout_s < 1:
+            raise ValueError("timeout_s must be at least 1")
+        self.ledger = ledger
+        self.session_factory = session_factory
+        self.timeout_s = timeout_s
+
+    @sql_label
+    async def place(self, requests: Sequence[HoldRequest]) -> dict[int, tb.CreateTransferResult]:
+        """Returns the failures by index into `requests`; those deposits have no hold."""
+        if not requests:
+            return {}
+        failures: dict[int, tb.CreateTransferResult] = {}
+
+        # As in settlement: a transfer to a missing wallet would burn its id.
+        account_ids = list(dict.fromkeys(r.credit_account_id for r in requests))
+        account_failures = await self.ledger.create_accounts_many(account_ids, is_wallet=True)
+        bad_accounts = {account_ids[i] for i in account_failures}
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.timeout_s)
+        to_hold = [
+            (n, r) for n, r in enumerate(requests) if r.credit_account_id not in bad_accounts
+        ]
+        for n, r in enumerate(requests):
+            if r.credit_account_id in bad_accounts:
+                failures[n] = tb.CreateTransferResult.CREDIT_ACCOUNT_NOT_FOUND
+        pending_ids = derive_ids(NS_DEPOSIT_HOLD, (r.checkout_request_id for _, r in to_hold))
+        transfer_failures = await self.ledger.create_transfers_many(
+            [
+                pending_spec(
+                    pending_id,
+                    debit=MPESA_CLEARING_ACCOUNT_ID,
+                    credit=r.credit_account_id,
+                    amount=r.amount,
+                    code=TRANSFER_CODE_MPESA_DEPOSIT_HOLD,
+                    timeout=self.timeout_s,
+                )
+                for (_, r), pending_id in zip(to_hold, pending_ids)
+            ]
+        )
+        for i, res in transfer_failures.items():
+            failures[to_hold[i][0]] = res
+
+        held = [
+            {
+                "deposit_id": r.deposit_id,
+                "pending_id": pending_id,
+                "credit_account_id": r.credit_account_id,
+                "amount": r.amount,
+                "expires_at": expires_at,
+            }
+            for (n, r), pending_id in zip(to_hold, pending_ids)
+            if n not in failures
+        ]
+        if held:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await session.execute(
+                        insert(DepositHold)
+                        .values(held)
+                        .on_conflict_do_nothing(index_elements=["deposit_id"])
+                    )
+        return failures
+
+
+class HoldSweeper:
+    """
+    Releases the holds of deposits that will not be credited through them.
+
+    Open holds whose deposit FAILED, or whose timeout has passed (abandoned: the
+    callback never came), are walked in (expires_at, deposit_id) keyset order over
+    the partial open-hold index. Holds of SUCCESS deposits are left to settlement,
+    which posts them. Each batch of `batch_size` is claimed with FOR UPDATE SKIP
+    LOCKED and voided with a single two_phase_void_many call, so any number of
+    sweepers can run beside settlement.
+    """
+
+    def __init__(
+        self,
+        ledger: LedgerClient,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        batch_size: int,
+    ):
+        self.ledger = ledger
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+
+    @sql_label
+    async def sweep_once(self) -> HoldSweepResult:
+        after: tuple[datetime, str] | None = None
+        voided = expired = failed = 0
+
+        while True:
+            batch = (
+                select(
+                    DepositHold.deposit_id,
+                    DepositHold.pending_id,
+                    DepositHold.credit_account_id,
+                    DepositHold.expires_at,
+                )
+                .join(Deposit, Deposit.id == DepositHold.deposit_id)
+                .where(DepositHold.released_at.is_(None))
+                .where(Deposit.status != DepositStatus.SUCCESS.value)
+                .where(
+                    or_(
+                        Deposit.status == DepositStatus.FAILED.value,
+                        DepositHold.expires_at <= func.now(),
+                    )
+                )
+                .order_by(DepositHold.expires_at, DepositHold.deposit_id)
+                .limit(self.batch_size)
+                .with_for_update(of=DepositHold, skip_locked=True)
+            )
+            if after is not None:
+                batch = batch.where(
+                    tuple_(DepositHold.expires_at, DepositHold.deposit_id) > tuple_(*after)
+                )
+
+            async with self.session_factory() as session:
+                async with session.begin():
+                    rows = (await session.execute(batch)).all()
+                    if not rows:
+                        return HoldSweepResult(voided=voided, expired=expired, failed=failed)
+                    failures = await self.ledger.two_phase_void_many(
+                        [r.pending_id for r in rows],
+                        code=TRANSFER_CODE_MPESA_DEPOSIT_HOLD,
+                        accounts=[(MPESA_CLEARING_ACCOUNT_ID, r.credit_account_id) for r in rows],
+                    )
+                    still_open = await release_holds(
+                        session,
+                        [r.deposit_id for r in rows],
+                        failures,
+                        released_as=HoldResolution.VOIDED,
+                    )
+
+            n_expired = sum(
+                1
+                for res in failures.values()
+                if res == tb.CreateTransferResult.PENDING_TRANSFER_EXPIRED
+            )
+            expired += n_expired
+            failed += still_open
+            voided += len(rows) - n_expired - still_open
+            after = max((r.expires_at, r.deposit_id) for r in rows)
+            if len(rows) < self.batch_size:
+                return HoldSweepResult(voided=voided, expired=expired, failed=failed)
+
+    async def run_forever(self, *, interval_s: float) -> None:
+        while True:
+            await self.sweep_once()
+            await asyncio.sleep(interval_s)
+
+
+def get_deposit_holds(ledger: LedgerClient) -> DepositHolds:
+    return DepositHolds(ledger, timeout_s=settings.deposit_hold_timeout_s)
+
+
+def get_hold_sweeper(ledger: LedgerClient) -> HoldSweeper:
+    return HoldSweeper(ledger, batch_size=settings.deposit_hold_sweep_batch_size)
@@ -1,9 +1,15 @@
 import asyncio
+import time
 from dataclasses import dataclass
+from typing import Any, Callable
 
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
 
-from app.db.engine import engine
+from app.db.engine import engine as default_engine
+from app.ledger.backend import LedgerBackend
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID
+from app.ledger.tb_client import get_tb_client_async
 from app.settings.config import settings
 
 
@@ -11,30 +17,128 @@ from app.settings.config import settings
 class Readiness:
     postgres_ok: bool
     tigerbeetle_ok: bool
+    postgres_latency_ms: float
+    tigerbeetle_latency_ms: float
+    # Monotonic time the probe finished.
+    checked_at: float
 
 
-async def check_postgres() -> bool:
+async def _timed(check: Any, timeout_s: float) -> tuple[bool, float]:
+    start = time.perf_counter()
     try:
-        async with engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
-        return True
+        ok = bool(await asyncio.wait_for(check, timeout_s))
     except Exception:
-        return False
+        ok = False
+    return ok, round((time.perf_counter() - start) * 1000, 3)
 
 
-async def check_tigerbeetle_tcp() -> bool:
-    # Phase 3: just check the port is reachable (no ledger semantics yet).
-    try:
-        host, port_str = settings.tb_address.split(":")
-        port = int(port_str)
-        reader, writer = await asyncio.open_connection(host, port)
-        writer.close()
-        await writer.wait_closed()
+class ReadinessProber:
+    """
+    Probes Postgres and the ledger every `interval_s` in a background task and keeps
+    the latest result, so /ready answers from memory instead of dialling both on
+    every load balancer probe.
+
+    The ledger check is a lookup of the M-Pesa clearing account over one long-lived
+    client: the cluster has to answer and be bootstrapped. A lookup still in flight
+    when its probe times out is not repeated until it finishes, so a hung cluster
+    doesn't pile up requests. A result older than `max_staleness_s` (the prober
+    stalled or died) counts as not ready.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], LedgerBackend] = get_tb_client_async,
+        engine: AsyncEngine = default_engine,
+        *,
+        interval_s: float = 2.0,
+        timeout_s: float = 1.0,
+        max_staleness_s: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client_factory = client_factory
+        self.engine = engine
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.max_staleness_s = max_staleness_s
+        self.clock = clock
+        self.last: Readiness | None = None
+
+        self._client: LedgerBackend | None = None
+        self._lookup: asyncio.Task | None = None
+        self._task: asyncio.Task | None = None
+
+    async def check_postgres(self) -> bool:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return True
-    except Exception:
-        return False
+
+    async def check_tigerbeetle(self) -> bool:
+        if self._lookup is None:
+            if self._client is None:
+                self._client = self.client_factory()
+            self._lookup = asyncio.ensure_future(
+                self._client.lookup_accounts([MPESA_CLEARING_ACCOUNT_ID])
+            )
+        # Shielded: a timeout leaves the lookup running for a later probe to collect.
+        accounts = await asyncio.shield(self._lookup)
+        self._lookup = None
+        return bool(accounts)
+
+    async def probe_once(self) -> Readiness:
+        (pg_ok, pg_ms), (tb_ok, tb_ms) = await asyncio.gather(
+            _timed(self.check_postgres(), self.timeout_s),
+            _timed(self.check_tigerbeetle(), self.timeout_s),
+        )
+        if self._lookup is not None and self._lookup.done():
+            # Failed rather than timed out; start afresh next time.
+            self._lookup = None
+        self.last = Readiness(pg_ok, tb_ok, pg_ms, tb_ms, self.clock())
+        return self.last
+
+    def age_s(self) -> float | None:
+        return None if self.last is None else self.clock() - self.last.checked_at
+
+    def is_ready(self) -> bool:
+        age = self.age_s()
+        return (
+            self.last is not None
+            and age is not None
+            and age <= self.max_staleness_s
+            and self.last.postgres_ok
+            and self.last.tigerbeetle_ok
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._lookup is not None:
+            self._lookup.cancel()
+            self._lookup = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+_prober: ReadinessProber | None = None
 
 
-async def readiness() -> Readiness:
-    pg_ok, tb_ok = await asyncio.gather(check_postgres(), check_tigerbeetle_tcp())
-    return Readiness(postgres_ok=pg_ok, tigerbeetle_ok=tb_ok)
\ No newline at end of file
+def get_readiness_prober() -> ReadinessProber:
+    global _prober
+    if _prober is None:
+        _prober = ReadinessProber(
+            interval_s=settings.readiness_probe_interval_s,
+            timeout_s=settings.readiness_probe_timeout_s,
+            max_staleness_s=settings.readiness_max_staleness_s,
+        )
+    return _prober
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import gzip
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.engine import engine as default_engine
+from app.db.partitions import list_partitions, partitions_older_than
+
+
+@dataclass(frozen=True)
+class ArchivedPartition:
+    name: str
+    path: str
+    # None when the export already existed from an earlier, interrupted run.
+    rows: int | None
+
+
+class PartitionArchiver:
+    """
+    Moves old partitions of a range-partitioned table out of the database.
+
+    Each partition whose upper bound is at or before the cutoff is detached (CONCURRENTLY
+    when the table has no default partition, so reads and writes on the parent carry
+    on), exported with COPY to `<archive_dir>/<partition>.csv.gz` and then dropped,
+    unless `keep` is set. The export is written to a temporary file and fsynced before
+    it is renamed into place, and a table is only dropped once its export exists, so an
+    interrupted run is finished by the next one.
+    """
+
+    def __init__(
+        self, archive_dir: str, *, keep: bool = False, engine: AsyncEngine = default_engine
+    ):
+        self.archive_dir = archive_dir
+        self.keep = keep
+        self.engine = engine
+
+    def archive_path(self, name: str) -> str:
+        return os.path.join(self.archive_dir, f"{name}.csv.gz")
+
+    async def archive(self, parent: str, cutoff: datetime) -> list[ArchivedPartition]:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await self._finalize_pending_detach(conn, parent)
+
+            partitions = await list_partitions(conn, parent)
+            concurrently = "" if any(p.is_default for p in partitions) else " CONCURRENTLY"
+            for partition in partitions_older_than(partitions, cutoff):
+                await conn.execute(
+                    text(f"ALTER TABLE {parent} DETACH PARTITION {partition.name}{concurrently}")
+                )
+
+            # Everything detached so far, including leftovers of an interrupted run.
+            archived = []
+            for name in await self._detached(conn, parent):
+                path = self.archive_path(name)
+                rows = None
+                if not os.path.exists(path):
+                    rows = await self._export(conn, name, path)
+                elif self.keep:
+                    continue
+                if not self.keep:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                archived.append(ArchivedPartition(name, path, rows))
+        return archived
+
+    async def _finalize_pending_detach(self, conn: AsyncConnection, parent: str) -> None:
+        # A DETACH ... CONCURRENTLY that was cancelled leaves the partition half detached.
+        pending = await conn.execute(
+            text(
+                "SELECT i.inhrelid::regclass::text FROM pg_inherits i "
+                "WHERE i.inhparent = CAST(:parent AS regclass) AND i.inhdetachpending"
+            ),
+            {"parent": parent},
+        )
+        for (name,) in pending.all():
+            await conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name} FINALIZE"))
+
+    async def _detached(self, conn: AsyncConnection, parent: str) -> list[str]:
+        rows = await conn.execute(
+            text(
+                "SELECT relname FROM pg_class "
+                "WHERE relkind = 'r' AND NOT relispartition "
+                "AND relnamespace = CAST(current_schema() AS regnamespace) "
+                "AND relname ~ ('^' || CAST(:parent AS text) || '_(y[0-9]{4}m[0-9]{2}|legacy)$') "
+                "ORDER BY relname"
+            ),
+            {"parent": parent},
+        )
+        return list(rows.scalars())
+
+    async def _export(self, conn: AsyncConnection, name: str, path: str) -> int:
+        raw = (await conn.get_raw_connection()).driver_connection
+        assert raw is not None
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            with gzip.GzipFile(filename=f"{name}.csv", mode="wb", fileobj=f) as gz:
+
+                async def write(chunk: bytes) -> None:
+                    gz.write(chunk)
+
+                status = await raw.copy_from_table(name, output=write, format="csv", header=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        dir_fd = os.open(self.archive_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        # asyncpg returns the command tag, "COPY <rows>".
+        return int(status.split()[-1])
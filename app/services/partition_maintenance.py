@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.engine import engine as default_engine
+from app.db.partitions import ensure_monthly_partitions
+from app.metrics import PARTITION_MAINTENANCE_FAILURES
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ["deposits", "deposit_callbacks"]
+
+# pg_advisory_xact_lock(PARTITION_LOCK_CLASS, 0) is held while partitions are created.
+PARTITION_LOCK_CLASS = 0x7074
+
+
+class PartitionMaintainer:
+    """
+    Keeps `months_ahead` months of partitions in place for the partitioned tables.
+
+    `start()` runs `run_once` right away and then every `interval_s` in a background
+    task, so a running app creates next month's partitions itself; scripts/
+    maintain_partitions.py does the same from cron as a backup. Only one process does
+    the DDL at a time (an advisory lock; the others skip that round), and it gives up
+    after `lock_timeout_ms` rather than queueing inserts behind its lock on the parent.
+    A table that fails is logged, counted in partition_maintenance_failures_total and
+    retried on the next round.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = default_engine,
+        *,
+        tables: list[str] = PARTITIONED_TABLES,
+        months_ahead: int,
+        interval_s: float = 3600.0,
+        lock_timeout_ms: int = 5000,
+    ):
+        self.engine = engine
+        self.tables = tables
+        self.months_ahead = months_ahead
+        self.interval_s = interval_s
+        self.lock_timeout_ms = lock_timeout_ms
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self, today: date | None = None) -> dict[str, list[str]] | None:
+        """Created partition names by table, or None if another process holds the lock."""
+        created: dict[str, list[str]] = {}
+        async with self.engine.begin() as conn:
+            claimed = await conn.scalar(
+                select(func.pg_try_advisory_xact_lock(PARTITION_LOCK_CLASS, 0))
+            )
+            if not claimed:
+                return None
+            await conn.execute(
+                text("SELECT set_config('lock_timeout', :ms, true)"),
+                {"ms": str(self.lock_timeout_ms)},
+            )
+            for table in self.tables:
+                try:
+                    async with conn.begin_nested():
+                        created[table] = await ensure_monthly_partitions(
+                            conn, table, months_ahead=self.months_ahead, today=today
+                        )
+                except Exception:
+                    PARTITION_MAINTENANCE_FAILURES.labels(table).inc()
+                    logger.exception("creating partitions of %s failed", table)
+        return created
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                PARTITION_MAINTENANCE_FAILURES.labels("").inc()
+                logger.exception("partition maintenance failed")
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def get_partition_maintainer() -> PartitionMaintainer:
+    return PartitionMaintainer(
+        months_ahead=settings.partition_months_ahead,
+        interval_s=settings.partition_maintenance_interval_s,
+    )
@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Sequence
+
+from sqlalchemy import BigInteger, String, bindparam, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.db.types import UInt128Bytes
+from app.ledger.constants import (
+    FEES_REVENUE_ACCOUNT_ID,
+    TB_BATCH_MAX,
+    TRANSFER_CODE_PAYOUT,
+    TRANSFER_CODE_PAYOUT_FEE,
+)
+from app.ledger.fees import FeeSchedule, get_fee_schedule_source
+from app.ledger.ids import payout_transfer_ids
+from app.ledger.ledger_client import LedgerClient, TransferSpec
+from app.metrics import sql_label
+from app.models.enums import PayoutJobStatus, PayoutRowStatus
+from app.models.payout_job import PayoutJob
+from app.models.payout_row import PayoutRow
+from app.services.phone_resolver import PhoneResolver
+from app.settings.config import settings
+
+POSTED = PayoutRowStatus.POSTED.value
+FAILED = PayoutRowStatus.FAILED.value
+
+# pg_advisory_xact_lock(PAYOUT_LOCK_CLASS, hashtext(job_id)) is held while a job runs.
+PAYOUT_LOCK_CLASS = 0x7061
+
+
+class PayoutJobConflict(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class PayoutItem:
+    row_no: int
+    recipient: str
+    # None when the row could not be parsed.
+    amount: int | None
+
+
+@dataclass(frozen=True)
+class PayoutSummary:
+    job_id: str
+    status: str
+    next_row: int
+    posted: int
+    failed: int
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str | bytes]:
+    """
+    Split a stream of byte chunks into UTF-8 lines without reading it whole. A byte
+    order mark on the first line is dropped; a line that is not valid UTF-8 comes out
+    as its raw bytes, for parse_rows to report as a malformed row.
+    """
+    tail = b""
+    first = True
+    async for chunk in chunks:
+        *lines, tail = (tail + chunk).split(b"\n")
+        for line in lines:
+            yield _decode(line, first)
+            first = False
+    if tail:
+        yield _decode(tail, first)
+
+
+def _decode(raw: bytes, first: bool) -> str | bytes:
+    try:
+        line = raw.decode()
+    except UnicodeDecodeError:
+        return raw
+    return (line.removeprefix("\ufeff") if first else line).rstrip("\r")
+
+
+def _amount(value: object) -> int | None:
+    try:
+        amount = int(str(value))
+    except ValueError:
+        return None
+    return amount if amount > 0 else None
+
+
+async def parse_rows(lines: AsyncIterable[str | bytes], fmt: str) -> AsyncIterator[PayoutItem]:
+    """
+    Payout rows from CSV (a header naming `phone` and `amount` columns) or NDJSON
+    (`{"phone": ..., "amount": ...}` per line). Blank lines are skipped; every other
+    line is a row, numbered from 1, and a malformed one (an undecodable line included,
+    as the repr of its bytes) comes out with amount None. CSV fields must not contain
+    line breaks.
+    """
+    row_no = 0
+    columns: dict[str, int] | None = None
+    async for line in lines:
+        if isinstance(line, bytes):
+            if fmt == "csv" and columns is None:
+                raise ValueError("CSV header is not valid UTF-8")
+            row_no += 1
+            yield PayoutItem(row_no, repr(line), None)
+            continue
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            fields = next(csv.reader([line]))
+            if columns is None:
+                columns = {name.strip(): i for i, name in enumerate(fields)}
+                if "phone" not in columns or "amount" not in columns:
+                    raise ValueError("CSV header must name phone and amount columns")
+                continue
+            row_no += 1
+            try:
+                yield PayoutItem(
+                    row_no, fields[columns["phone"]].strip(), _amount(fields[columns["amount"]])
+                )
+            except IndexError:
+                yield PayoutItem(row_no, line, None)
+        else:
+            row_no += 1
+            try:
+                obj = json.loads(line)
+                yield PayoutItem(row_no, str(obj["phone"]), _amount(obj["amount"]))
+            except (ValueError, KeyError, TypeError):
+                yield PayoutItem(row_no, line, None)
+
+
+class PayoutEngine:
+    """
+    Pays out a stream of rows (phone number, amount) from one source account.
+
+    Rows are handled a chunk at a time: recipients resolved with one query, fees
+    computed in bulk, recipients' wallet accounts created, then each row's payment and
+    fee legs sent as one linked chain with LedgerClient.create_chains_many, which packs
+    chains into full requests and sends them concurrently. Each chunk's results and
+    the job's checkpoint are written in one transaction, while the next chunk is
+    already being sent.
+
+    Transfer ids derive from (job id, row number), so a chunk resent after a crash is
+    answered with EXISTS and its rows are recorded as POSTED, not paid twice. Only one
+    run of a job can be in progress at a time (see _claim).
+    """
+
+    def __init__(
+        self,
+        ledger: LedgerClient,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        fee_schedule: FeeSchedule,
+        concurrency: int = 4,
+        max_batch: int = TB_BATCH_MAX,
+    ):
+        self.ledger = ledger
+        self.session_factory = session_factory
+        self.fee_schedule = fee_schedule
+        self.max_batch = max_batch
+        # Two transfers per row: enough rows per chunk for `concurrency` full requests.
+        self.chunk_rows = max(1, concurrency * max_batch // 2)
+        # Uncached: a payout file would otherwise evict the hot P2P entries.
+        self.resolver = PhoneResolver(session_factory, ttl_s=0, negative_ttl_s=0)
+
+    async def run(
+        self, job_id: str, source_account_id: int, items: AsyncIterable[PayoutItem]
+    ) -> PayoutSummary:
+        async with self._claim(job_id):
+            job = await self._start(job_id, source_account_id)
+            if job.status == PayoutJobStatus.DONE.value:
+                return job
+
+            chunk: list[PayoutItem] = []
+            recording: asyncio.Task[None] | None = None
+            try:
+                async for item in items:
+                    if item.row_no < job.next_row:
+                        continue
+                    chunk.append(item)
+                    if len(chunk) >= self.chunk_rows:
+                        recording = await self._process(job_id, source_account_id, chunk, recording)
+                        chunk = []
+                if chunk:
+                    recording = await self._process(job_id, source_account_id, chunk, recording)
+            finally:
+                # Whatever reached the ledger gets recorded, even if a later chunk failed.
+                if recording is not None:
+                    await recording
+            return await self._finish(job_id)
+
+    @asynccontextmanager
+    async def _claim(self, job_id: str) -> AsyncIterator[None]:
+        """
+        Hold a per-job advisory lock for the whole run, so a second run of the same job
+        fails with PayoutJobConflict instead of paying and counting its rows again.
+        The lock is transaction-scoped: it goes away with the connection however the
+        run ends.
+        """
+        async with self.session_factory() as session:
+            async with session.begin():
+                claimed = await session.scalar(
+                    select(func.pg_try_advisory_xact_lock(PAYOUT_LOCK_CLASS, func.hashtext(job_id)))
+                )
+                if not claimed:
+                    raise PayoutJobConflict(f"payout job {job_id} is already running")
+                yield
+
+    @sql_label
+    async def _start(self, job_id: str, source_account_id: int) -> PayoutSummary:
+        async with self.session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(PayoutJob)
+                    .values(
+                        id=job_id,
+                        source_account_id=source_account_id,
+                        status=PayoutJobStatus.RUNNING.value,
+                    )
+                    .on_conflict_do_nothing(index_elements=["id"])
+                )
+                job = await session.get_one(PayoutJob, job_id)
+        if job.source_account_id != source_account_id:
+            raise PayoutJobConflict(f"payout job {job_id} pays from a different account")
+        return _summary(job)
+
+    async def _process(
+        self,
+        job_id: str,
+        source_account_id: int,
+        chunk: Sequence[PayoutItem],
+        previous: asyncio.Task[None] | None,
+    ) -> asyncio.Task[None]:
+        """Send a chunk to the ledger; returns the task recording its results."""
+        errors: dict[int, str] = {}
+        valid: list[tuple[PayoutItem, int]] = []
+        for item in chunk:
+            if item.amount is None:
+                errors[item.row_no] = "INVALID_ROW"
+            elif item.amount > self.fee_schedule.max_amount:
+                errors[item.row_no] = "AMOUNT_ABOVE_LIMIT"
+            else:
+                valid.append((item, item.amount))
+
+        accounts = await self.resolver.resolve_many(item.recipient for item, _ in valid)
+        # (row number, recipient account, amount) of the rows that can be paid.
+        todo: list[tuple[int, int, int]] = []
+        for item, amount in valid:
+            account_id = accounts[item.recipient]
+            if account_id is None:
+                errors[item.row_no] = "RECIPIENT_NOT_FOUND"
+            else:
+                todo.append((item.row_no, account_id, amount))
+
+        # Wallet accounts are created lazily. Create them before posting: a transfer
+        # that fails with CREDIT_ACCOUNT_NOT_FOUND burns its id.
+        account_ids = list(dict.fromkeys(account_id for _, account_id, _ in todo))
+        account_failures = await self.ledger.create_accounts_many(account_ids, is_wallet=True)
+        bad_accounts = {account_ids[i]: res.name for i, res in account_failures.items()}
+        if bad_accounts:
+            for row_no, account_id, _ in todo:
+                if account_id in bad_accounts:
+                    errors[row_no] = bad_accounts[account_id]
+            todo = [t for t in todo if t[0] not in errors]
+
+        paid = [t[0] for t in todo]
+        fees = dict(zip(paid, self.fee_schedule.compute_fees([t[2] for t in todo])))
+        transfer_ids = dict(zip(paid, payout_transfer_ids(job_id, paid, "main")))
+        chains = [
+            payout_chain(
+                transfer_ids[row_no],
+                fee_transfer_id,
+                source=source_account_id,
+                recipient=account_id,
+                amount=amount,
+                fee=fees[row_no],
+            )
+            for (row_no, account_id, amount), fee_transfer_id in zip(
+                todo, payout_transfer_ids(job_id, paid, "fee")
+            )
+        ]
+        failures = await self.ledger.create_chains_many(chains, max_batch=self.max_batch)
+        for i, res in failures.items():
+            errors[todo[i][0]] = res.name
+
+        # Checkpoints move in order; the next chunk can start while this one is written.
+        if previous is not None:
+            await previous
+        return asyncio.create_task(self._record(job_id, chunk, fees, transfer_ids, errors))
+
+    @sql_label
+    async def _record(
+        self,
+        job_id: str,
+        chunk: Sequence[PayoutItem],
+        fees: dict[int, int],
+        transfer_ids: dict[int, int],
+        errors: dict[int, str],
+    ) -> None:
+        # One array parameter per column: a chunk is far more rows than a VALUES list
+        # can bind (Postgres allows 32767 parameters per statement).
+        columns = {
+            "row_no": ([item.row_no for item in chunk], BigInteger),
+            "recipient": ([item.recipient for item in chunk], String),
+            "amount": ([item.amount for item in chunk], BigInteger),
+            "fee": ([fees.get(item.row_no) for item in chunk], BigInteger),
+            "transfer_id": ([transfer_ids.get(item.row_no) for item in chunk], UInt128Bytes),
+            "status": ([FAILED if item.row_no in errors else POSTED for item in chunk], String),
+            "error": ([errors.get(item.row_no) for item in chunk], String),
+        }
+        rows = (
+            func.unnest(
+                *(bindparam(name, values, type_=ARRAY(t)) for name, (values, t) in columns.items())
+            )
+            .table_valued(*columns)
+            .render_derived()
+        )
+        # Rows already recorded are left alone, and the counters only count the rows
+        # this insert added, so a chunk recorded twice is not counted twice.
+        stmt = (
+            insert(PayoutRow)
+            .from_select(["job_id", *columns], select(literal(job_id, String), *rows.c))
+            .on_conflict_do_nothing(index_elements=["job_id", "row_no"])
+            .returning(PayoutRow.status)
+        )
+        async with self.session_factory() as session:
+            async with session.begin():
+                statuses = (await session.execute(stmt)).scalars().all()
+                failed = statuses.count(FAILED)
+                await session.execute(
+                    update(PayoutJob)
+                    .where(PayoutJob.id == job_id)
+                    .values(
+                        next_row=func.greatest(PayoutJob.next_row, chunk[-1].row_no + 1),
+                        posted=PayoutJob.posted + len(statuses) - failed,
+                        failed=PayoutJob.failed + failed,
+                    )
+                )
+
+    @sql_label
+    async def _finish(self, job_id: str) -> PayoutSummary:
+        async with self.session_factory() as session:
+            async with session.begin():
+                job = (
+                    await session.execute(
+                        update(PayoutJob)
+                        .where(PayoutJob.id == job_id)
+                        .values(status=PayoutJobStatus.DONE.value)
+                        .returning(PayoutJob)
+                    )
+                ).scalar_one()
+                return _summary(job)
+
+    @sql_label
+    async def get(self, job_id: str) -> PayoutSummary | None:
+        async with self.session_factory() as session:
+            job = await session.get(PayoutJob, job_id)
+            return None if job is None else _summary(job)
+
+    @sql_label
+    async def failures(self, job_id: str, *, after_row: int = 0, limit: int = 1000) -> list[dict]:
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(PayoutRow.row_no, PayoutRow.recipient, PayoutRow.amount, PayoutRow.error)
+                .where(PayoutRow.job_id == job_id)
+                .where(PayoutRow.status == FAILED)
+                .where(PayoutRow.row_no > after_row)
+                .order_by(PayoutRow.row_no)
+                .limit(limit)
+            )
+            return [dict(r._mapping) for r in rows]
+
+
+def _summary(job: PayoutJob) -> PayoutSummary:
+    return PayoutSummary(job.id, job.status, job.next_row, job.posted, job.failed)
+
+
+def payout_chain(
+    transfer_id: int,
+    fee_transfer_id: int,
+    *,
+    source: int,
+    recipient: int,
+    amount: int,
+    fee: int,
+) -> list[TransferSpec]:
+    """
+    A payout row's legs: source -> recipient, then source -> fees revenue (left out
+    when the fee is zero). Ids come from payout_transfer_id(job, row, "main" / "fee").
+    """
+    chain = [
+        TransferSpec(
+            id=transfer_id,
+            debit_account_id=source,
+            credit_account_id=recipient,
+            amount=amount,
+            code=TRANSFER_CODE_PAYOUT,
+        )
+    ]
+    if fee:
+        chain.append(
+            TransferSpec(
+                id=fee_transfer_id,
+                debit_account_id=source,
+                credit_account_id=FEES_REVENUE_ACCOUNT_ID,
+                amount=fee,
+                code=TRANSFER_CODE_PAYOUT_FEE,
+            )
+        )
+    return chain
+
+
+def get_payout_engine(ledger: LedgerClient) -> PayoutEngine:
+    return PayoutEngine(
+        ledger,
+        fee_schedule=get_fee_schedule_source().current,
+        concurrency=settings.payout_concurrency,
+    )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.repositories.users import add_phone_change_listener
+from app.db.session import SessionLocal
+from app.ledger.balance_cache import CacheStats
+from app.metrics import sql_label
+from app.models.user import User
+from app.settings.config import settings
+
+
+class PhoneResolver:
+    """
+    Phone number -> wallet account id (User.tb_account_id), with a bounded LRU in front
+    of the users table.
+
+    Unknown numbers are cached too (as None) for `negative_ttl_s`, so repeated sends to
+    a wrong number don't each cost a query. Entries are dropped through
+    `invalidate()`, which the users repository calls when a phone number is added or
+    changed in this process; other processes catch up when the TTL runs out.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        max_entries: int = 100_000,
+        ttl_s: float = 300.0,
+        negative_ttl_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+        self.clock = clock
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[str, tuple[float, int | None]] = OrderedDict()
+        # Bumped on every invalidation; a query started before the bump doesn't fill.
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, phone: str) -> tuple[bool, int | None]:
+        entry = self._entries.get(phone)
+        if entry is not None:
+            expires_at, account_id = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(phone)
+                self.stats.hits += 1
+                return True, account_id
+            del self._entries[phone]
+        self.stats.misses += 1
+        return False, None
+
+    def _put(self, phone: str, account_id: int | None) -> None:
+        ttl = self.ttl_s if account_id is not None else self.negative_ttl_s
+        if ttl <= 0:
+            return
+        self._entries[phone] = (self.clock() + ttl, account_id)
+        self._entries.move_to_end(phone)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def resolve(self, phone: str) -> int | None:
+        return (await self.resolve_many([phone]))[phone]
+
+    @sql_label
+    async def resolve_many(self, phones: Iterable[str]) -> dict[str, int | None]:
+        """Resolve many numbers; all cache misses are fetched with a single query."""
+        found: dict[str, int | None] = {}
+        misses: list[str] = []
+        for phone in dict.fromkeys(phones):
+            hit, account_id = self._get(phone)
+            if hit:
+                found[phone] = account_id
+            else:
+                misses.append(phone)
+        if not misses:
+            return found
+
+        generation = self._generation
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(User.phone_number, User.tb_account_id).where(
+                    User.phone_number == any_(bindparam("phones", misses, type_=ARRAY(String)))
+                )
+            )
+            fetched: dict[str, int | None] = dict(rows.all())
+
+        fill = generation == self._generation
+        for phone in misses:
+            account_id = fetched.get(phone)
+            found[phone] = account_id
+            if fill:
+                self._put(phone, account_id)
+        return found
+
+    def invalidate(self, phones: Iterable[str]) -> None:
+        self._generation += 1
+        for phone in phones:
+            if self._entries.pop(phone, None) is not None:
+                self.stats.invalidations += 1
+
+
+_resolver: PhoneResolver | None = None
+
+
+def get_phone_resolver() -> PhoneResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = PhoneResolver(
+            max_entries=settings.phone_cache_size,
+            ttl_s=settings.phone_cache_ttl_s,
+            negative_ttl_s=settings.phone_cache_negative_ttl_s,
+        )
+        add_phone_change_listener(_resolver.invalidate)
+    return _resolver
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import TextIO
+
+import tigerbeetle as tb
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.ledger.backend import LedgerBackend
+from app.ledger.constants import (
+    MPESA_CLEARING_ACCOUNT_ID,
+    TB_BATCH_MAX,
+    TRANSFER_CODE_MPESA_DEPOSIT,
+)
+from app.ledger.ids import NS_DEPOSIT, derive_ids
+from app.models.deposit import Deposit
+from app.models.deposit_outbox import DepositOutbox
+from app.models.enums import DepositStatus
+from app.models.user import User
+
+
+@dataclass
+class ReconcileCheckpoint:
+    """Where an interrupted run resumes. Saved after every page."""
+
+    phase: str = "deposits"  # "deposits" -> "ledger" -> "done"
+    deposit_after: str = ""
+    timestamp_after: int = 0
+    output_offset: int = 0
+    checked_deposits: int = 0
+    checked_transfers: int = 0
+    mismatches: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> ReconcileCheckpoint:
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+class Reconciler:
+    """
+    Checks SUCCESS deposits against deposit transfers on the clearing account.
+
+    Both sides are walked in bounded pages, so memory does not grow with table size:
+
+    1. Deposits are streamed from a server-side cursor in primary-key order. Each page
+       is checked with one lookup_transfers call on the deposit's derived transfer id
+       (missing, amount_mismatch, account_mismatch).
+    2. Deposit transfers on the clearing account are paged by timestamp with
+       get_account_transfers. Each page is probed against deposit_outbox.transfer_id
+       (orphan).
+
+    Mismatches are written to `out` as NDJSON, one object per line.
+    """
+
+    def __init__(
+        self,
+        client: LedgerBackend,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        page_size: int = TB_BATCH_MAX,
+    ):
+        if not 1 <= page_size <= TB_BATCH_MAX:
+            raise ValueError(f"page_size must be between 1 and {TB_BATCH_MAX}")
+        self.client = client
+        self.session_factory = session_factory
+        self.page_size = page_size
+
+    async def run(
+        self, out: TextIO, checkpoint: ReconcileCheckpoint, checkpoint_path: str | None = None
+    ) -> ReconcileCheckpoint:
+        if checkpoint.phase == "deposits":
+            await self._check_deposits(out, checkpoint, checkpoint_path)
+            checkpoint.phase = "ledger"
+            self._commit_page(out, checkpoint, checkpoint_path)
+        if checkpoint.phase == "ledger":
+            await self._check_ledger(out, checkpoint, checkpoint_path)
+            checkpoint.phase = "done"
+            self._commit_page(out, checkpoint, checkpoint_path)
+        return checkpoint
+
+    def _emit(self, out: TextIO, checkpoint: ReconcileCheckpoint, record: dict) -> None:
+        checkpoint.mismatches += 1
+        out.write(json.dumps(record) + "\n")
+
+    def _commit_page(
+        self, out: TextIO, checkpoint: ReconcileCheckpoint, checkpoint_path: str | None
+    ) -> None:
+        # Output first: a resumed run truncates the file back to output_offset.
+        out.flush()
+        checkpoint.output_offset = out.tell()
+        if checkpoint_path is not None:
+            checkpoint.save(checkpoint_path)
+
+    async def _check_deposits(
+        self, out: TextIO, checkpoint: ReconcileCheckpoint, checkpoint_path: str | None
+    ) -> None:
+        stmt = (
+            select(
+                Deposit.id,
+                Deposit.checkout_request_id,
+                Deposit.amount,
+                User.tb_account_id,
+                DepositOutbox.processed_at,
+            )
+            .join(User, User.id == Deposit.user_id)
+            .outerjoin(DepositOutbox, DepositOutbox.deposit_id == Deposit.id)
+            .where(Deposit.status == DepositStatus.SUCCESS.value)
+            .where(Deposit.id > checkpoint.deposit_after)
+            .order_by(Deposit.id)
+            .execution_options(yield_per=self.page_size)
+        )
+        async with self.session_factory() as session:
+            result = await session.stream(stmt)
+            async for page in result.partitions():
+                transfer_ids = derive_ids(NS_DEPOSIT, (r.checkout_request_id for r in page))
+                found = {t.id: t for t in await self.client.lookup_transfers(transfer_ids)}
+
+                for r, transfer_id in zip(page, transfer_ids):
+                    record = {
+                        "deposit_id": r.id,
+                        "checkout_request_id": r.checkout_request_id,
+                        # u128 does not fit a JSON number safely.
+                        "transfer_id": str(transfer_id),
+                        "amount": r.amount,
+                    }
+                    t = found.get(transfer_id)
+                    if t is None:
+                        self._emit(
+                            out,
+                            checkpoint,
+                            {"kind": "missing", **record, "settled": r.processed_at is not None},
+                        )
+                    elif t.amount != r.amount:
+                        self._emit(
+                            out,
+                            checkpoint,
+                            {"kind": "amount_mismatch", **record, "ledger_amount": t.amount},
+                        )
+                    elif (
+                        t.debit_account_id != MPESA_CLEARING_ACCOUNT_ID
+                        or t.credit_account_id != r.tb_account_id
+                    ):
+                        self._emit(
+                            out,
+                            checkpoint,
+                            {
+                                "kind": "account_mismatch",
+                                **record,
+                                "ledger_debit_account_id": str(t.debit_account_id),
+                                "ledger_credit_account_id": str(t.credit_account_id),
+                            },
+                        )
+
+                checkpoint.deposit_after = page[-1].id
+                checkpoint.checked_deposits += len(page)
+                self._commit_page(out, checkpoint, checkpoint_path)
+
+    async def _check_ledger(
+        self, out: TextIO, checkpoint: ReconcileCheckpoint, checkpoint_path: str | None
+    ) -> None:
+        while True:
+            page = await self.client.get_account_transfers(
+                tb.AccountFilter(
+                    account_id=MPESA_CLEARING_ACCOUNT_ID,
+                    code=TRANSFER_CODE_MPESA_DEPOSIT,
+                    timestamp_min=checkpoint.timestamp_after + 1,
+                    limit=self.page_size,
+                    flags=tb.AccountFilterFlags.DEBITS,
+                )
+            )
+            if not page:
+                return
+
+            # Outbox rows are only written for SUCCESS deposits and are kept when the
+            # deposit's partition is archived, so old credits are not reported as orphans.
+            async with self.session_factory() as session:
+                known = set(
+                    await session.scalars(
+                        select(DepositOutbox.transfer_id).where(
+                            DepositOutbox.transfer_id.in_([t.id for t in page])
+                        )
+                    )
+                )
+            for t in page:
+                if t.id not in known:
+                    self._emit(
+                        out,
+                        checkpoint,
+                        {
+                            "kind": "orphan",
+                            "transfer_id": str(t.id),
+                            "credit_account_id": str(t.credit_account_id),
+                            "ledger_amount": t.amount,
+                            "timestamp": t.timestamp,
+                        },
+                    )
+
+            checkpoint.timestamp_after = page[-1].timestamp
+            checkpoint.checked_transfers += len(page)
+            self._commit_page(out, checkpoint, checkpoint_path)
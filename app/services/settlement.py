@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+import tigerbeetle as tb
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import (
+    MPESA_CLEARING_ACCOUNT_ID,
+    TRANSFER_CODE_MPESA_DEPOSIT,
+    TRANSFER_CODE_MPESA_DEPOSIT_HOLD,
+)
+from app.ledger.ledger_client import RELEASED_RESULTS, LedgerClient, TransferSpec
+from app.metrics import sql_label
+from app.models.deposit_hold import DepositHold
+from app.models.deposit_outbox import DepositOutbox
+from app.models.enums import HoldResolution
+from app.services.deposit_holds import release_holds
+from app.settings.config import settings
+
+# A post failing with one of these leaves the deposit to a direct credit: the hold was
+# released first, or an earlier attempt already credited it directly under that id.
+_CREDIT_INSTEAD = RELEASED_RESULTS | {tb.CreateTransferResult.EXISTS_WITH_DIFFERENT_FLAGS}
+
+
+@dataclass(frozen=True)
+class SettlementResult:
+    claimed: int
+    posted: int
+    failed: int
+
+
+class SettlementWorker:
+    """
+    Credits SUCCESS deposits on the ledger from the deposit_outbox table.
+
+    Each batch is claimed with FOR UPDATE SKIP LOCKED, so any number of workers can
+    run side by side; the claim is held until the ledger has answered. Transfer ids
+    are deterministic, so a batch retried after a crash is answered with EXISTS.
+    A deposit with an open hold is credited by posting the hold (two_phase_post_many,
+    under the deposit's transfer id); the others get a direct clearing -> wallet
+    credit. A hold that was voided or timed out first is replaced by a direct credit.
+    The system accounts are ensured before the first batch: a credit from a missing
+    clearing account would burn its transfer id.
+    """
+
+    def __init__(
+        self,
+        ledger: LedgerClient,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        batch_size: int,
+        max_attempts: int,
+    ):
+        self.ledger = ledger
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._bootstrapped = False
+
+    @sql_label
+    async def run_once(self) -> SettlementResult:
+        if not self._bootstrapped:
+            await ensure_system_accounts(self.ledger)
+            self._bootstrapped = True
+        async with self.session_factory() as session:
+            async with session.begin():
+                rows = (
+                    await session.execute(
+                        select(
+                            DepositOutbox.id,
+                            DepositOutbox.deposit_id,
+                            DepositOutbox.transfer_id,
+                            DepositOutbox.credit_account_id,
+                            DepositOutbox.amount,
+                        )
+                        .where(DepositOutbox.processed_at.is_(None))
+                        .where(DepositOutbox.attempts < self.max_attempts)
+                        .order_by(DepositOutbox.id)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not rows:
+                    return SettlementResult(claimed=0, posted=0, failed=0)
+
+                errors: dict[int, str] = {}
+
+                # Wallet accounts are created lazily. Create them before posting: a
+                # transfer that fails with CREDIT_ACCOUNT_NOT_FOUND burns its id.
+                account_ids = list(dict.fromkeys(r.credit_account_id for r in rows))
+                account_failures = await self.ledger.create_accounts_many(
+                    account_ids, is_wallet=True
+                )
+                bad_accounts = {account_ids[i]: res.name for i, res in account_failures.items()}
+                for r in rows:
+                    if r.credit_account_id in bad_accounts:
+                        errors[r.id] = bad_accounts[r.credit_account_id]
+
+                to_post = [r for r in rows if r.id not in errors]
+                holds: dict[str, int] = dict(
+                    (
+                        await session.execute(
+                            select(DepositHold.deposit_id, DepositHold.pending_id)
+                            .where(DepositHold.deposit_id.in_([r.deposit_id for r in to_post]))
+                            .where(DepositHold.released_at.is_(None))
+                            .with_for_update()
+                        )
+                    ).all()
+                )
+                held = [r for r in to_post if r.deposit_id in holds]
+                direct = [r for r in to_post if r.deposit_id not in holds]
+                post_failures, credit_failures = await asyncio.gather(
+                    self._post_holds(held, holds), self._credit(direct)
+                )
+                # Holds released before settlement got to them: credit those deposits
+                # directly, under the same transfer id.
+                released = [held[i] for i, res in post_failures.items() if res in _CREDIT_INSTEAD]
+                fallback_failures = await self._credit(released)
+
+                for i, res in post_failures.items():
+                    if res not in _CREDIT_INSTEAD:
+                        errors[held[i].id] = res.name
+                for batch, failures in ((direct, credit_failures), (released, fallback_failures)):
+                    for i, res in failures.items():
+                        errors[batch[i].id] = res.name
+                if held:
+                    await release_holds(
+                        session,
+                        [r.deposit_id for r in held],
+                        post_failures,
+                        released_as=HoldResolution.SETTLED,
+                    )
+
+                posted = [r.id for r in rows if r.id not in errors]
+                if posted:
+                    await session.execute(
+                        update(DepositOutbox)
+                        .where(DepositOutbox.id.in_(posted))
+                        .values(
+                            processed_at=func.now(),
+                            attempts=DepositOutbox.attempts + 1,
+                            last_error=None,
+                        )
+                    )
+                for outbox_id, error in errors.items():
+                    await session.execute(
+                        update(DepositOutbox)
+                        .where(DepositOutbox.id == outbox_id)
+                        .values(attempts=DepositOutbox.attempts + 1, last_error=error)
+                    )
+
+        return SettlementResult(claimed=len(rows), posted=len(posted), failed=len(errors))
+
+    async def _post_holds(
+        self, rows: Sequence[Row], holds: Mapping[str, int]
+    ) -> dict[int, tb.CreateTransferResult]:
+        # The post takes the deposit's own transfer id, so the credit looks the same to
+        # reconciliation and statements whichever way it was made.
+        if not rows:
+            return {}
+        return await self.ledger.two_phase_post_many(
+            [(r.transfer_id, holds[r.deposit_id]) for r in rows],
+            code=TRANSFER_CODE_MPESA_DEPOSIT_HOLD,
+            accounts=[(MPESA_CLEARING_ACCOUNT_ID, r.credit_account_id) for r in rows],
+        )
+
+    async def _credit(self, rows: Sequence[Row]) -> dict[int, tb.CreateTransferResult]:
+        if not rows:
+            return {}
+        return await self.ledger.create_transfers_many(
+            [
+                TransferSpec(
+                    id=r.transfer_id,
+                    debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+                    credit_account_id=r.credit_account_id,
+                    amount=r.amount,
+                    code=TRANSFER_CODE_MPESA_DEPOSIT,
+                )
+                for r in rows
+            ]
+        )
+
+    async def run_forever(self, *, idle_sleep_s: float) -> None:
+        while True:
+            result = await self.run_once()
+            if result.claimed < self.batch_size:
+                await asyncio.sleep(idle_sleep_s)
+
+
+def get_settlement_worker(ledger: LedgerClient) -> SettlementWorker:
+    return SettlementWorker(
+        ledger,
+        batch_size=settings.settlement_batch_size,
+        max_attempts=settings.settlement_max_attempts,
+    )
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator
+
+import tigerbeetle as tb
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import SessionLocal
+from app.ledger.backend import LedgerBackend
+from app.ledger.constants import (
+    TB_BATCH_MAX,
+    TRANSFER_CODE_MPESA_DEPOSIT,
+    TRANSFER_CODE_MPESA_DEPOSIT_HOLD,
+)
+from app.metrics import sql_label
+from app.models.deposit import Deposit
+from app.models.deposit_outbox import DepositOutbox
+from app.settings.config import settings
+
+# Holds and their voids never move posted funds: a settled deposit is its credit or post alone.
+_RESERVATION_FLAGS = int(tb.TransferFlags.PENDING | tb.TransferFlags.VOID_PENDING_TRANSFER)
+_DEPOSIT_CODES = (TRANSFER_CODE_MPESA_DEPOSIT, TRANSFER_CODE_MPESA_DEPOSIT_HOLD)
+
+STATEMENT_FIELDS = [
+    "timestamp",
+    "transfer_id",
+    "direction",
+    "counterparty_account_id",
+    "amount",
+    "code",
+    "deposit_id",
+    "checkout_request_id",
+    "receipt",
+]
+
+
+class StatementExporter:
+    """
+    A wallet account's transfer history, oldest first, one page at a time.
+
+    Pages come from get_account_transfers with a timestamp cursor, so memory stays at
+    one page however long the history is. Only posted movements are listed: pending
+    transfers (holds) and voids are left out. Deposit credits in a page are enriched
+    with their deposit row by a single query; the session is only held for that query,
+    not while the caller is writing the page out.
+    """
+
+    def __init__(
+        self,
+        client: LedgerBackend,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        *,
+        page_size: int = TB_BATCH_MAX,
+    ):
+        self.client = client
+        self.session_factory = session_factory
+        self.page_size = min(page_size, TB_BATCH_MAX)
+
+    async def pages(
+        self, account_id: int, *, timestamp_min: int = 0, timestamp_max: int = 0
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        cursor = timestamp_min
+        while True:
+            page = await self.client.get_account_transfers(
+                tb.AccountFilter(
+                    account_id=account_id,
+                    timestamp_min=cursor,
+                    timestamp_max=timestamp_max,
+                    limit=self.page_size,
+                    flags=tb.AccountFilterFlags.DEBITS | tb.AccountFilterFlags.CREDITS,
+                )
+            )
+            if not page:
+                return
+            records = await self._enrich(account_id, page)
+            if records:
+                yield records
+            if len(page) < self.page_size:
+                return
+            cursor = page[-1].timestamp + 1
+
+    @sql_label
+    async def _enrich(self, account_id: int, page: list[tb.Transfer]) -> list[dict[str, Any]]:
+        page = [t for t in page if not t.flags & _RESERVATION_FLAGS]
+        # A held deposit is credited by posting its hold, under the same transfer id.
+        deposit_ids = [t.id for t in page if t.code in _DEPOSIT_CODES]
+        deposits: dict[int, Any] = {}
+        if deposit_ids:
+            async with self.session_factory() as session:
+                rows = await session.execute(
+                    select(
+                        DepositOutbox.transfer_id,
+                        Deposit.id,
+                        Deposit.checkout_request_id,
+                        Deposit.receipt,
+                    )
+                    .join(Deposit, Deposit.id == DepositOutbox.deposit_id)
+                    .where(DepositOutbox.transfer_id.in_(deposit_ids))
+                )
+                deposits = {r.transfer_id: r for r in rows}
+
+        records = []
+        for t in page:
+            credit = t.credit_account_id == account_id
+            deposit = deposits.get(t.id)
+            records.append(
+                {
+                    "timestamp": t.timestamp,
+                    "transfer_id": str(t.id),
+                    "direction": "credit" if credit else "debit",
+                    "counterparty_account_id": str(
+                        t.debit_account_id if credit else t.credit_account_id
+                    ),
+                    "amount": t.amount,
+                    "code": t.code,
+                    "deposit_id": deposit.id if deposit else None,
+                    "checkout_request_id": deposit.checkout_request_id if deposit else None,
+                    "receipt": deposit.receipt if deposit else None,
+                }
+            )
+        return records
+
+
+async def ndjson_chunks(pages: AsyncIterator[list[dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for records in pages:
+        yield "".join(json.dumps(r) + "\n" for r in records).encode()
+
+
+async def csv_chunks(pages: AsyncIterator[list[dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=STATEMENT_FIELDS)
+    writer.writeheader()
+    async for records in pages:
+        writer.writerows(records)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def get_statement_exporter(client: LedgerBackend) -> StatementExporter:
+    return StatementExporter(client, page_size=settings.statement_page_size)
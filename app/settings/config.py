@@ -13,8 +13,109 @@ class Settings(BaseSettings):
     port: int = 8000
 
     database_url: str="postgresql+asyncpg://postgres:postgres@db:5432/wallet"
+    # Per process: size against uvicorn workers x Postgres max_connections.
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
+    db_pool_timeout_s: float = 10.0
+    db_pool_recycle_s: int = 1800
+    db_pool_pre_ping: bool = True
+    db_echo: bool = False
+    db_statement_cache_size: int = 512
+    # Server-side statement_timeout for every connection; 0 disables it.
+    db_statement_timeout_ms: int = 15_000
+
     tb_cluster_id: int = 0
     tb_address: str = "tigerbeetle:3000"
+    # "tigerbeetle" or "memory" (in-process backend for benchmarks and load tests).
+    ledger_backend: str = "tigerbeetle"
+    # Clients shared by the app process (see app/ledger/client_pool.py), and how many
+    # requests each may have outstanding before callers queue.
+    tb_client_pool_size: int = 1
+    tb_client_max_in_flight: int = 64
+
+    # /ready answers from a background probe of Postgres and the ledger.
+    readiness_probe_interval_s: float = 2.0
+    readiness_probe_timeout_s: float = 1.0
+    # A probe result older than this (the prober stalled) reports not ready.
+    readiness_max_staleness_s: float = 10.0
+
+    # Opt-in (API processes): cap concurrent ledger / repository calls and shed the
+    # excess with 429 / 503 instead of queueing without bound (see app/admission.py).
+    admission_enabled: bool = False
+    admission_ledger_limit: int = 256
+    admission_db_limit: int = 64
+    admission_min_limit: int = 4
+    admission_queue_size: int = 128
+    admission_queue_timeout_ms: float = 100.0
+    # Calls slower than this shrink the limit; 0 keeps it fixed.
+    admission_ledger_target_latency_ms: float = 50.0
+    admission_db_target_latency_ms: float = 100.0
+
+    # Per-request deadline budget (see app/deadline.py): the client's header in ms, capped
+    # at the max, else the route's default, else this default (0: no deadline).
+    request_deadline_header: str = "x-request-deadline-ms"
+    request_deadline_default_ms: float = 0.0
+    request_deadline_max_ms: float = 30_000.0
+
+    # Opt-in: merge concurrent create_transfers / single lookup_account calls into one request.
+    ledger_batch_enabled: bool = False
+    ledger_batch_window_ms: float = 1.0
+    ledger_batch_max_size: int = 8189
+
+    # Opt-in: read-through cache of account balances in front of the ledger.
+    ledger_balance_cache_enabled: bool = False
+    ledger_balance_cache_size: int = 100_000
+    ledger_balance_cache_ttl_s: float = 5.0
+    # TTL for hot system accounts (clearing, fees); 0 keeps them out of the cache.
+    ledger_balance_cache_system_ttl_s: float = 0.0
+
+    # M-Pesa callbacks are applied in bulk: one UPDATE per flush.
+    callback_flush_size: int = 500
+    callback_flush_interval_ms: float = 5.0
+    callback_queue_depth: int = 10_000
+
+    # Deposit settlement worker (deposit_outbox -> ledger).
+    settlement_batch_size: int = 1000
+    settlement_idle_sleep_ms: int = 200
+    # Rows that keep failing are left for manual review after this many tries.
+    settlement_max_attempts: int = 10
+
+    # Ledger transfers fetched (and held in memory) per page of a streamed statement.
+    statement_page_size: int = 1000
+
+    # PENDING_CALLBACK deposits older than this are marked FAILED by the expiry sweeper.
+    deposit_pending_ttl_s: float = 3600.0
+    deposit_expiry_batch_size: int = 500
+    deposit_expiry_pause_ms: int = 0
+    deposit_expiry_interval_s: float = 60.0
+
+    # Pending clearing -> wallet holds placed for STK pushes time out on the ledger
+    # after this long; the hold sweeper voids holds of failed or abandoned deposits.
+    deposit_hold_timeout_s: int = 3600
+    deposit_hold_sweep_batch_size: int = 1000
+    deposit_hold_sweep_interval_s: float = 30.0
+
+    # P2P fee tariff (JSON, see app/ledger/fees.py); empty uses the built-in tariff.
+    # The file is re-read when it changes, checked every interval.
+    p2p_fee_schedule_path: str = ""
+    p2p_fee_schedule_reload_interval_s: float = 30.0
+
+    # Bulk payouts: full create_transfers requests in flight at once per job.
+    payout_concurrency: int = 4
+
+    # Phone number -> wallet resolution cache (P2P recipients).
+    phone_cache_size: int = 100_000
+    phone_cache_ttl_s: float = 300.0
+    # Unknown numbers; short, since other processes only see new users when it expires.
+    phone_cache_negative_ttl_s: float = 30.0
+
+    # Monthly partitions created ahead of time, by the app every
+    # partition_maintenance_interval_s and by scripts/maintain_partitions.py.
+    partition_months_ahead: int = 3
+    partition_maintenance_interval_s: float = 3600.0
+    # Partitions whose rows are all older than this are exported and dropped by
+    # scripts/archive_partitions.py.
+    partition_archive_after_months: int = 12
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import random
+
+from app.ledger.fees import DEFAULT_P2P_TARIFF, FeeSchedule, p2p_transfer_specs
+from benchmarks.harness import BenchResult, bench_sync
+
+BULK_SIZE = 10_000
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    # A fee lookup should cost well under a microsecond: at tens of thousands of
+    # payments per second it must stay invisible next to one ledger round trip.
+    schedule = FeeSchedule(DEFAULT_P2P_TARIFF)
+    rng = random.Random(0)
+    amounts = [rng.randint(1, schedule.max_amount) for _ in range(BULK_SIZE)]
+
+    return [
+        bench_sync("fee", lambda i: schedule.fee(amounts[i % BULK_SIZE]), iterations=iterations),
+        bench_sync(
+            "compute_fees_bulk",
+            lambda i: schedule.compute_fees(amounts),
+            iterations=max(1, iterations // BULK_SIZE),
+            ops_per_call=BULK_SIZE,
+            batch_size=BULK_SIZE,
+        ),
+        bench_sync(
+            "p2p_transfer_specs",
+            lambda i: p2p_transfer_specs(
+                str(i),
+                sender=10,
+                recipient=11,
+                amount=amounts[i % BULK_SIZE],
+                fee=schedule.fee(amounts[i % BULK_SIZE]),
+            ),
+            iterations=iterations,
+        ),
+    ]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import tigerbeetle as tb
+
+from app.ledger.ids import NS_DEPOSIT, deposit_transfer_id, derive_ids, p2p_transfer_id
+from benchmarks.harness import BenchResult, bench_sync
+
+BULK_SIZE = 1000
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    # Compare against create_transfer in the ledger suite: a single round trip to a
+    # cluster costs hundreds of microseconds; a derivation should cost about one.
+    keys = [f"ws_CO_{n:012d}" for n in range(BULK_SIZE)]
+
+    return [
+        bench_sync("tb_id", lambda i: tb.id(), iterations=iterations),
+        bench_sync(
+            "deposit_transfer_id",
+            lambda i: deposit_transfer_id(keys[i % BULK_SIZE]),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "p2p_transfer_id",
+            lambda i: p2p_transfer_id(keys[i % BULK_SIZE], "fee"),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "derive_ids_bulk",
+            lambda i: derive_ids(NS_DEPOSIT, keys),
+            iterations=max(1, iterations // BULK_SIZE),
+            ops_per_call=BULK_SIZE,
+            batch_size=BULK_SIZE,
+        ),
+    ]
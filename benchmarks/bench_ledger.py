@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import itertools
+
+from app.ledger.batcher import TransferBatcher
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import (
+    FEES_REVENUE_ACCOUNT_ID,
+    MPESA_CLEARING_ACCOUNT_ID,
+    TRANSFER_CODE_MPESA_DEPOSIT,
+    TRANSFER_CODE_P2P,
+    TRANSFER_CODE_P2P_FEE,
+)
+from app.ledger.ledger_client import LedgerClient, TransferSpec, _to_tb_transfer
+from app.ledger.tb_client import get_tb_client_async
+from benchmarks.harness import BenchResult, bench_async, bench_sync
+
+# Ids well away from the system accounts and from anything tb.id() hands out.
+_ids = itertools.count(1 << 100)
+
+CONCURRENCY_LEVELS = (64, 512)
+CHAIN_LENGTHS = (2, 8, 32)
+
+
+def _deposit(to_account: int, amount: int = 1) -> TransferSpec:
+    return TransferSpec(
+        id=next(_ids),
+        debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+        credit_account_id=to_account,
+        amount=amount,
+        code=TRANSFER_CODE_MPESA_DEPOSIT,
+    )
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    results: list[BenchResult] = []
+
+    spec = _deposit(next(_ids))
+    results.append(
+        bench_sync("transfer_spec_to_tb", lambda i: _to_tb_transfer(spec), iterations=iterations)
+    )
+
+    async with get_tb_client_async() as client:
+        ledger = LedgerClient(client)
+        await ensure_system_accounts(ledger)
+
+        alice, bob = next(_ids), next(_ids)
+        await ledger.create_account(alice, is_wallet=True)
+        await ledger.create_account(bob, is_wallet=True)
+        await ledger.create_transfer(_deposit(alice, amount=10**15))
+
+        results.append(
+            await bench_async(
+                "create_transfer",
+                lambda i: ledger.create_transfer(_deposit(alice)),
+                iterations=iterations,
+            )
+        )
+
+        for concurrency in CONCURRENCY_LEVELS:
+            batcher = TransferBatcher(client, window_s=0.0005)
+            batched = LedgerClient(client, batcher=batcher)
+            results.append(
+                await bench_async(
+                    "create_transfer_batched",
+                    lambda i: batched.create_transfer(_deposit(alice)),
+                    iterations=iterations,
+                    concurrency=concurrency,
+                    window_ms=0.5,
+                )
+            )
+            await batched.close()
+
+        for length in CHAIN_LENGTHS:
+
+            def chain(i: int, length: int = length) -> list[TransferSpec]:
+                specs = []
+                for n in range(length):
+                    fee = n % 2 == 1
+                    specs.append(
+                        TransferSpec(
+                            id=next(_ids),
+                            debit_account_id=alice,
+                            credit_account_id=FEES_REVENUE_ACCOUNT_ID if fee else bob,
+                            amount=1,
+                            code=TRANSFER_CODE_P2P_FEE if fee else TRANSFER_CODE_P2P,
+                        )
+                    )
+                return specs
+
+            results.append(
+                await bench_async(
+                    "create_linked_transfers",
+                    lambda i, chain=chain: ledger.create_linked_transfers(chain(i)),
+                    iterations=max(1, iterations // length),
+                    ops_per_call=length,
+                    chain_length=length,
+                )
+            )
+
+        results.append(
+            await bench_async(
+                "lookup_account", lambda i: ledger.lookup_account(alice), iterations=iterations
+            )
+        )
+
+    return results
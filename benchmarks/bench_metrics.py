@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import itertools
+
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID, TRANSFER_CODE_MPESA_DEPOSIT
+from app.ledger.ledger_client import LedgerClient, TransferSpec, _to_tb_transfer
+from app.ledger.memory_backend import InMemoryLedger
+from app.metrics import Counter, Histogram, Registry, timed
+from benchmarks.harness import BenchResult, bench_async, bench_sync
+
+_ids = itertools.count(1 << 100)
+
+# Not registered anywhere, so the benchmark leaves the app's /metrics output alone.
+_BENCH_SECONDS = Histogram("bench_call_seconds", "Bench.", ["method"])
+
+
+async def _noop() -> None:
+    return None
+
+
+@timed(_BENCH_SECONDS, "noop")
+async def _timed_noop() -> None:
+    return None
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    # Overhead per instrumented call is the difference between the plain and
+    # instrumented pairs below; compare it with create_transfer against a real
+    # cluster (hundreds of microseconds) in the ledger suite.
+    registry = Registry()
+    hist = registry.register(Histogram("bench_seconds", "Bench.", ["method"]))
+    counter = registry.register(Counter("bench_total", "Bench.", ["op", "result"]))
+    for n in range(50):
+        hist.labels(f"method_{n}").observe(0.001)
+
+    results = [
+        bench_sync(
+            "counter_inc",
+            lambda i: counter.labels("transfer", "EXISTS").inc(),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "histogram_observe",
+            lambda i: hist.labels("method_1").observe(0.0007),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "render_50_histograms",
+            lambda i: registry.render(),
+            iterations=max(1, iterations // 100),
+        ),
+        await bench_async("coroutine_plain", lambda i: _noop(), iterations=iterations),
+        await bench_async("coroutine_timed", lambda i: _timed_noop(), iterations=iterations),
+    ]
+
+    backend = InMemoryLedger()
+    ledger = LedgerClient(backend)
+    await ensure_system_accounts(ledger)
+    wallet = next(_ids)
+    await ledger.create_account(wallet, is_wallet=True)
+
+    def deposit() -> TransferSpec:
+        return TransferSpec(
+            id=next(_ids),
+            debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+            credit_account_id=wallet,
+            amount=1,
+            code=TRANSFER_CODE_MPESA_DEPOSIT,
+        )
+
+    results.append(
+        await bench_async(
+            "memory_create_transfer_backend",
+            lambda i: backend.create_transfers([_to_tb_transfer(deposit())]),
+            iterations=iterations,
+        )
+    )
+    results.append(
+        await bench_async(
+            "memory_create_transfer_client",
+            lambda i: ledger.create_transfer(deposit()),
+            iterations=iterations,
+        )
+    )
+    return results
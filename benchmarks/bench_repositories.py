@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import uuid
+
+from app.db.repositories.deposits import (
+    create_deposit_attempt,
+    store_callback_payload,
+    update_deposit_status,
+)
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from benchmarks.harness import BenchResult, bench_async
+
+# Needs a migrated Postgres at settings.database_url; rows are left behind.
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    run_id = uuid.uuid4().hex[:12]
+    results: list[BenchResult] = []
+
+    async def new_user(i: int) -> None:
+        async with SessionLocal() as session:
+            await create_user(
+                session,
+                user_id=f"bench-{run_id}-{i}",
+                full_name="Bench User",
+                phone_number=f"+bench{run_id}{i}",
+            )
+
+    results.append(await bench_async("create_user", new_user, iterations=iterations))
+
+    owner = f"bench-{run_id}-0"
+
+    async def new_deposit(i: int) -> None:
+        async with SessionLocal() as session:
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"dep-{run_id}-{i}",
+                user_id=owner,
+                amount=100,
+                checkout_request_id=f"ws_CO_{run_id}_{i}",
+                merchant_request_id=None,
+            )
+
+    async def store_payload(i: int) -> None:
+        async with SessionLocal() as session:
+            await store_callback_payload(
+                session,
+                checkout_request_id=f"ws_CO_{run_id}_{i}",
+                payload={"Body": {"stkCallback": {"ResultCode": 0, "CheckoutRequestID": i}}},
+            )
+
+    async def update_status(i: int) -> None:
+        async with SessionLocal() as session:
+            await update_deposit_status(
+                session,
+                checkout_request_id=f"ws_CO_{run_id}_{i}",
+                status="SUCCESS",
+                receipt=f"R{i}",
+            )
+
+    # Each stage revisits the deposits created by the first one (same i sequence).
+    results.append(await bench_async("create_deposit_attempt", new_deposit, iterations=iterations))
+    results.append(
+        await bench_async("store_callback_payload", store_payload, iterations=iterations)
+    )
+    results.append(await bench_async("update_deposit_status", update_status, iterations=iterations))
+    return results
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import tigerbeetle as tb
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.db.types import UInt128Bytes, UInt128Numeric
+from benchmarks.harness import BenchResult, bench_sync
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    dialect = asyncpg_dialect()
+    column_type = UInt128Numeric()
+    bytes_type = UInt128Bytes()
+    value = tb.id()
+    stored = Decimal(value)
+    stored_bytes = value.to_bytes(16, "big")
+
+    return [
+        bench_sync(
+            "uint128_numeric_bind",
+            lambda i: column_type.process_bind_param(value, dialect),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "uint128_numeric_result",
+            lambda i: column_type.process_result_value(stored, dialect),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "uint128_bytes_bind",
+            lambda i: bytes_type.process_bind_param(value, dialect),
+            iterations=iterations,
+        ),
+        bench_sync(
+            "uint128_bytes_result",
+            lambda i: bytes_type.process_result_value(stored_bytes, dialect),
+            iterations=iterations,
+        ),
+    ]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import Column, MetaData, Table, insert, select, text
+
+from app.db.engine import engine
+from app.db.types import UInt128Bytes, UInt128Numeric
+from app.ledger.ids import NS_WALLET, derive_ids
+from benchmarks.harness import BenchResult, bench_async
+
+# Needs Postgres at settings.database_url. Works on temporary tables inside one
+# transaction that is rolled back, so nothing is left behind.
+
+STORAGE_TYPES = {"numeric": UInt128Numeric, "bytea": UInt128Bytes}
+INSERT_CHUNK = 1000
+
+
+async def run(iterations: int) -> list[BenchResult]:
+    results: list[BenchResult] = []
+    chunks = max(1, iterations // INSERT_CHUNK)
+    run_id = uuid.uuid4().hex[:12]
+    # Hash-derived ids, like real wallet ids: uniformly spread over the key space.
+    ids = derive_ids(NS_WALLET, (f"{run_id}-{n}" for n in range((chunks + 1) * INSERT_CHUNK)))
+
+    async with engine.connect() as conn:
+        for storage, type_ in STORAGE_TYPES.items():
+            table = Table(
+                f"bench_u128_{storage}",
+                MetaData(),
+                Column("id", type_(), primary_key=True),
+                prefixes=["TEMPORARY"],
+            )
+            await conn.run_sync(table.create)
+
+            def insert_chunk(i: int, table: Table = table):
+                rows = [{"id": v} for v in ids[i * INSERT_CHUNK : (i + 1) * INSERT_CHUNK]]
+                return conn.execute(insert(table), rows)
+
+            inserted = await bench_async(
+                "uint128_insert",
+                insert_chunk,
+                iterations=chunks,
+                warmup=1,
+                ops_per_call=INSERT_CHUNK,
+                storage=storage,
+            )
+            await conn.execute(text(f"ANALYZE {table.name}"))
+            inserted.extra["index_bytes"] = await conn.scalar(
+                text("SELECT pg_relation_size(:index)"), {"index": f"{table.name}_pkey"}
+            )
+            results.append(inserted)
+
+            stored = len(ids) - INSERT_CHUNK
+            results.append(
+                await bench_async(
+                    "uint128_lookup",
+                    lambda i, table=table: conn.execute(
+                        select(table.c.id).where(table.c.id == ids[i % stored])
+                    ),
+                    iterations=iterations,
+                    storage=storage,
+                )
+            )
+        await conn.rollback()
+
+    return results
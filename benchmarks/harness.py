@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int
+    seconds: float
+    ops_per_s: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    # What was run; name and params identify a result for --compare.
+    params: dict[str, Any] = field(default_factory=dict)
+    # Other measurements reported alongside ops/s (e.g. sizes), not part of the key.
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def percentile(sorted_ns: list[int], q: float) -> float:
+    """Nearest-rank percentile of already-sorted nanosecond samples, in microseconds."""
+    if not sorted_ns:
+        return 0.0
+    rank = min(len(sorted_ns) - 1, max(0, round(q * len(sorted_ns)) - 1))
+    return sorted_ns[rank] / 1000
+
+
+def _result(
+    name: str, samples_ns: list[int], ops: int, seconds: float, params: dict[str, Any]
+) -> BenchResult:
+    samples_ns.sort()
+    return BenchResult(
+        name=name,
+        ops=ops,
+        seconds=round(seconds, 6),
+        ops_per_s=round(ops / seconds, 1) if seconds else 0.0,
+        p50_us=percentile(samples_ns, 0.50),
+        p95_us=percentile(samples_ns, 0.95),
+        p99_us=percentile(samples_ns, 0.99),
+        params=params,
+    )
+
+
+def bench_sync(
+    name: str,
+    fn: Callable[[int], Any],
+    *,
+    iterations: int,
+    warmup: int = 100,
+    ops_per_call: int = 1,
+    **params: Any,
+) -> BenchResult:
+    """
+    Time `fn(i)` sequentially; latency percentiles are per call. `i` is unique across
+    warmup and measured calls, so it can seed ids.
+    """
+    for i in range(warmup):
+        fn(i)
+
+    samples: list[int] = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for i in range(warmup, warmup + iterations):
+        t0 = clock()
+        fn(i)
+        samples.append(clock() - t0)
+    seconds = (clock() - start) / 1e9
+    return _result(name, samples, iterations * ops_per_call, seconds, params)
+
+
+async def bench_async(
+    name: str,
+    fn: Callable[[int], Awaitable[Any]],
+    *,
+    iterations: int,
+    warmup: int = 10,
+    concurrency: int = 1,
+    ops_per_call: int = 1,
+    **params: Any,
+) -> BenchResult:
+    """
+    Await `fn(i)` for i in range(iterations) with up to `concurrency` calls in flight.
+    Latency percentiles are per call, measured from each call's own start.
+    """
+    for i in range(warmup):
+        await fn(i)
+
+    samples: list[int] = []
+    clock = time.perf_counter_ns
+    next_i = warmup
+    end = warmup + iterations
+
+    async def worker() -> None:
+        nonlocal next_i
+        while next_i < end:
+            i = next_i
+            next_i += 1
+            t0 = clock()
+            await fn(i)
+            samples.append(clock() - t0)
+
+    start = clock()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = (clock() - start) / 1e9
+    params = {"concurrency": concurrency, **params}
+    return _result(name, samples, iterations * ops_per_call, seconds, params)
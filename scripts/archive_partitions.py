@@ -0,0 +1,52 @@
+"""
+Detach old monthly partitions, export them to gzipped CSV and drop them.
+
+    python -m scripts.archive_partitions --dir /var/lib/wallet/archive
+    python -m scripts.archive_partitions --dir archive --older-than-months 6 --keep
+
+A partition is archived once all of its rows are older than the start of the month
+`--older-than-months` ago. Re-running finishes an interrupted run.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from app.db.engine import engine
+from app.db.partitions import add_months
+from app.services.partition_archive import PartitionArchiver
+from app.settings.config import settings
+
+ARCHIVED_TABLES = ["deposits", "deposit_callbacks"]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dir", required=True, help="directory for <partition>.csv.gz files")
+    parser.add_argument(
+        "--table", choices=ARCHIVED_TABLES, action="append", help="default: all partitioned tables"
+    )
+    parser.add_argument(
+        "--older-than-months", type=int, default=settings.partition_archive_after_months
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="detach and export, but leave the detached tables in place",
+    )
+    args = parser.parse_args()
+
+    today = datetime.now(timezone.utc).date()
+    start = add_months(today, -args.older_than_months)
+    cutoff = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+
+    archiver = PartitionArchiver(args.dir, keep=args.keep)
+    for table in args.table or ARCHIVED_TABLES:
+        for archived in await archiver.archive(table, cutoff):
+            rows = "already exported" if archived.rows is None else f"{archived.rows} rows"
+            print(f"{table}: {archived.name} -> {archived.path} ({rows})")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,7 +4,7 @@ from tigerbeetle.client import InitError
 
 from app.ledger.bootstrap import ensure_system_accounts
 from app.ledger.ledger_client import LedgerClient
-from app.ledger.tb_client import get_tb_client_async
+from app.ledger.tb_client import new_tb_client_pool
 
 RETRY_ATTEMPTS = 10
 RETRY_DELAY_SECONDS = 1.0
@@ -13,8 +13,8 @@ async def main() -> None:
     last_error: Exception | None = None
     for attempt in range(1, RETRY_ATTEMPTS + 1):
         try:
-            async with get_tb_client_async() as client:
-                ledger = LedgerClient(client)
+            async with new_tb_client_pool() as pool:
+                ledger = LedgerClient(pool)
                 await ensure_system_accounts(ledger)
                 print("OK: system accounts ensured")
                 return
@@ -0,0 +1,28 @@
+"""
+Mark deposits stuck in PENDING_CALLBACK for longer than deposit_pending_ttl_s as FAILED.
+
+    python -m scripts.expire_deposits          # sweep every deposit_expiry_interval_s
+    python -m scripts.expire_deposits --once   # one sweep and exit
+"""
+
+import argparse
+import asyncio
+
+from app.services.deposit_expiry import get_deposit_expiry_sweeper
+from app.settings.config import settings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    sweeper = get_deposit_expiry_sweeper()
+    if args.once:
+        print(f"expired {await sweeper.sweep_once()} deposits")
+    else:
+        await sweeper.run_forever(interval_s=settings.deposit_expiry_interval_s)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+"""
+Create upcoming monthly partitions for the partitioned tables.
+
+    python -m scripts.maintain_partitions
+
+The app does this itself every partition_maintenance_interval_s; run this daily from
+cron as a backup. Safe to run repeatedly; existing partitions are left alone.
+"""
+
+import asyncio
+
+from app.db.engine import engine
+from app.services.partition_maintenance import get_partition_maintainer
+
+
+async def main() -> None:
+    created = await get_partition_maintainer().run_once()
+    if created is None:
+        print("another process is creating partitions; nothing done")
+    else:
+        for table, names in created.items():
+            print(f"{table}: created {', '.join(names) or 'nothing'}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
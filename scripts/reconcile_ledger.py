@@ -0,0 +1,55 @@
+"""
+Reconcile SUCCESS deposits in Postgres against deposit transfers in the ledger.
+
+    python -m scripts.reconcile_ledger -o reconcile.ndjson
+    python -m scripts.reconcile_ledger -o reconcile.ndjson --restart
+
+Mismatches (missing, amount_mismatch, account_mismatch, orphan) are written as NDJSON.
+Progress is checkpointed after every page; re-running with the same output resumes
+where an interrupted run stopped. Exits 1 if any mismatch was found.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from app.ledger.constants import TB_BATCH_MAX
+from app.ledger.tb_client import get_tb_client_async
+from app.services.reconciliation import ReconcileCheckpoint, Reconciler
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("-o", "--output", default="reconcile.ndjson")
+    parser.add_argument("--checkpoint", help="default: <output>.checkpoint.json")
+    parser.add_argument("--page-size", type=int, default=TB_BATCH_MAX)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = ReconcileCheckpoint.load(checkpoint_path)
+
+    resuming = checkpoint.output_offset > 0 and os.path.exists(args.output)
+    with open(args.output, "r+" if resuming else "w") as out:
+        # Drop anything written after the last checkpoint; that page is redone.
+        out.truncate(checkpoint.output_offset if resuming else 0)
+        out.seek(0, os.SEEK_END)
+
+        async with get_tb_client_async() as client:
+            reconciler = Reconciler(client, page_size=args.page_size)
+            checkpoint = await reconciler.run(out, checkpoint, checkpoint_path)
+
+    print(
+        f"checked {checkpoint.checked_deposits} deposits, "
+        f"{checkpoint.checked_transfers} ledger transfers: "
+        f"{checkpoint.mismatches} mismatches -> {args.output}",
+        file=sys.stderr,
+    )
+    return 1 if checkpoint.mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,102 @@
+"""
+Run the micro-benchmarks and print (or save) the results as JSON.
+
+    python -m scripts.run_benchmarks --suite ledger --suite types -o bench.json
+    python -m scripts.run_benchmarks --compare bench.json --max-regression 0.10
+
+Ledger benchmarks use settings.ledger_backend ("memory" unless overridden with
+--ledger-backend); repository benchmarks need a migrated Postgres.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from importlib import import_module
+
+from app.settings.config import settings
+
+SUITES = {
+    "ledger": "benchmarks.bench_ledger",
+    "types": "benchmarks.bench_types",
+    "ids": "benchmarks.bench_ids",
+    "repositories": "benchmarks.bench_repositories",
+    "uint128_storage": "benchmarks.bench_uint128_storage",
+    "metrics": "benchmarks.bench_metrics",
+    "fees": "benchmarks.bench_fees",
+}
+DEFAULT_SUITES = ["ledger", "types", "ids", "metrics", "fees"]
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return a line per benchmark whose throughput dropped more than max_regression."""
+    previous = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        before = previous.get(_key(r))
+        if before is None or not before["ops_per_s"]:
+            continue
+        change = r["ops_per_s"] / before["ops_per_s"] - 1
+        if change < -max_regression:
+            regressions.append(
+                f"{_key(r)}: {before['ops_per_s']:.0f} -> {r['ops_per_s']:.0f} ops/s "
+                f"({change:+.1%}), p99 {before['p99_us']:.1f} -> {r['p99_us']:.1f} us"
+            )
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES))
+    parser.add_argument("--iterations", type=int, default=10_000)
+    parser.add_argument("--ledger-backend", default="memory", choices=["memory", "tigerbeetle"])
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    settings.ledger_backend = args.ledger_backend
+
+    results = []
+    for name in args.suite or DEFAULT_SUITES:
+        module = import_module(SUITES[name])
+        for r in await module.run(args.iterations):
+            results.append({"suite": name, **r.to_dict()})
+
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "iterations": args.iterations,
+            "ledger_backend": args.ledger_backend,
+        },
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,93 @@
+"""
+Pay out a CSV or NDJSON file of (phone, amount) rows from one user's wallet.
+
+    python -m scripts.run_payout --job salaries-2026-10 --source-user acme payouts.csv
+    python -m scripts.run_payout --job merchants-42 --source-user acme rows.ndjson
+    python -m scripts.run_payout --job salaries-2026-10 --status
+
+The file is streamed, never loaded whole. Running the same --job again resumes an
+interrupted run from its checkpoint; rows already paid are not paid again. --status
+prints the job's progress and its failed rows without running it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from app.db.engine import engine
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.tb_client import new_tb_client_pool
+from app.models.user import User
+from app.services.payouts import (
+    PayoutEngine,
+    PayoutJobConflict,
+    get_payout_engine,
+    iter_lines,
+    parse_rows,
+)
+
+READ_SIZE = 1 << 20
+
+
+async def read_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, READ_SIZE):
+            yield chunk
+
+
+async def show_status(payouts: PayoutEngine, job_id: str) -> None:
+    summary = await payouts.get(job_id)
+    if summary is None:
+        raise SystemExit(f"unknown payout job {job_id}")
+    print(summary)
+    after_row = 0
+    while failures := await payouts.failures(job_id, after_row=after_row):
+        for failure in failures:
+            print(json.dumps(failure))
+        after_row = failures[-1]["row_no"]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("file", nargs="?")
+    parser.add_argument("--job", required=True, help="job id; reuse it to resume")
+    parser.add_argument("--source-user", help="user id of the paying wallet")
+    parser.add_argument("--status", action="store_true", help="show the job, do not run it")
+    parser.add_argument(
+        "--format", choices=["csv", "ndjson"], help="default: from the file extension"
+    )
+    args = parser.parse_args()
+    if args.status:
+        async with new_tb_client_pool() as pool:
+            await show_status(get_payout_engine(LedgerClient(pool)), args.job)
+        await engine.dispose()
+        return
+    if args.file is None or args.source_user is None:
+        parser.error("file and --source-user are required unless --status is given")
+
+    fmt = args.format or ("ndjson" if os.path.splitext(args.file)[1] == ".ndjson" else "csv")
+    async with SessionLocal() as session:
+        source = await session.scalar(select(User.tb_account_id).where(User.id == args.source_user))
+    if source is None:
+        raise SystemExit(f"unknown user {args.source_user}")
+
+    async with new_tb_client_pool() as pool:
+        ledger = LedgerClient(pool)
+        await ensure_system_accounts(ledger)
+        rows = parse_rows(iter_lines(read_chunks(args.file)), fmt)
+        try:
+            summary = await get_payout_engine(ledger).run(args.job, source, rows)
+        except PayoutJobConflict as exc:
+            raise SystemExit(str(exc)) from exc
+    print(summary)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
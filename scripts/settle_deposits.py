@@ -0,0 +1,38 @@
+"""
+Credit SUCCESS deposits on the ledger from deposit_outbox.
+
+    python -m scripts.settle_deposits          # run until interrupted
+    python -m scripts.settle_deposits --once   # drain one batch and exit
+
+Any number of these can run at once; batches are claimed with SKIP LOCKED.
+"""
+
+import argparse
+import asyncio
+
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.tb_client import get_ledger_client, get_tb_client_async
+from app.services.settlement import get_settlement_worker
+from app.settings.config import settings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    async with get_tb_client_async() as client:
+        ledger = get_ledger_client(client)
+        await ensure_system_accounts(ledger)
+        worker = get_settlement_worker(ledger)
+        try:
+            if args.once:
+                print(await worker.run_once())
+            else:
+                await worker.run_forever(idle_sleep_s=settings.settlement_idle_sleep_ms / 1000)
+        finally:
+            await ledger.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""
+Void the ledger holds of deposits that failed or were abandoned by their callback.
+
+    python -m scripts.sweep_holds          # sweep every deposit_hold_sweep_interval_s
+    python -m scripts.sweep_holds --once   # one sweep and exit
+
+Any number of these can run at once; holds are claimed with SKIP LOCKED.
+"""
+
+import argparse
+import asyncio
+
+from app.ledger.tb_client import get_ledger_client, get_tb_client_async
+from app.services.deposit_holds import get_hold_sweeper
+from app.settings.config import settings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    async with get_tb_client_async() as client:
+        ledger = get_ledger_client(client)
+        sweeper = get_hold_sweeper(ledger)
+        try:
+            if args.once:
+                print(await sweeper.sweep_once())
+            else:
+                await sweeper.run_forever(interval_s=settings.deposit_hold_sweep_interval_s)
+        finally:
+            await ledger.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
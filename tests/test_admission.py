@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController, Overloaded, admitted
+from app.main import app
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _hold(controller: AdmissionController, gate: asyncio.Event) -> None:
+    async with controller.admit():
+        await gate.wait()
+
+
+@pytest.mark.asyncio
+async def test_excess_calls_queue_then_shed():
+    controller = AdmissionController("t", max_limit=2, queue_size=1, queue_timeout_s=0.05)
+    gate = asyncio.Event()
+    holders = [asyncio.ensure_future(_hold(controller, gate)) for _ in range(2)]
+    await asyncio.sleep(0)
+    queued = asyncio.ensure_future(_hold(controller, gate))
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 1
+
+    with pytest.raises(Overloaded) as full:
+        await _hold(controller, gate)
+    assert full.value.status_code == 429
+    assert full.value.retry_after_s >= 1
+
+    with pytest.raises(Overloaded) as slow:
+        await queued
+    assert slow.value.status_code == 503
+    assert controller.rejected == {"queue_full": 1, "queue_timeout": 1}
+
+    gate.set()
+    await asyncio.gather(*holders)
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_call_gets_the_released_slot():
+    controller = AdmissionController("t", max_limit=1, queue_timeout_s=1.0)
+    gate = asyncio.Event()
+    first = asyncio.ensure_future(_hold(controller, gate))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(_hold(controller, gate))
+    await asyncio.sleep(0)
+
+    gate.set()
+    await asyncio.gather(first, second)
+    assert controller.stats() | {"latency_ms": 0} == {
+        "enabled": True,
+        "limit": 1,
+        "in_flight": 0,
+        "queued": 0,
+        "rejected": {"queue_full": 0, "queue_timeout": 0},
+        "latency_ms": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_limit_adapts_to_latency():
+    clock = Clock()
+    controller = AdmissionController(
+        "t", max_limit=10, min_limit=2, target_latency_s=0.1, backoff=0.5, clock=clock
+    )
+
+    async def call(duration: float) -> None:
+        async with controller.admit():
+            clock.now += duration
+
+    await call(1.0)
+    assert controller.limit == 5
+    await call(1.0)
+    assert controller.limit == 2.5
+    await call(1.0)
+    assert controller.limit == 2
+    for _ in range(20):
+        await call(0.01)
+    assert 4 < controller.limit < 10
+
+
+@pytest.mark.asyncio
+async def test_disabled_controller_is_bypassed():
+    controller = AdmissionController("t", enabled=False, max_limit=1, queue_size=0)
+
+    @admitted(controller)
+    async def work():
+        await asyncio.sleep(0)
+        return controller.in_flight
+
+    assert await asyncio.gather(work(), work()) == [0, 0]
+
+
+def test_overloaded_maps_to_retry_after():
+    @app.get("/test-overloaded")
+    async def shed():
+        raise Overloaded("ledger", "queue_timeout", 3)
+
+    resp = TestClient(app).get("/test-overloaded")
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "3"
+    app.router.routes.pop()
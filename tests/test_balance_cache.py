@@ -0,0 +1,110 @@
+import pytest
+import tigerbeetle as tb
+
+from app.ledger.balance_cache import BalanceCache
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID
+from app.ledger.ledger_client import LedgerClient, TransferSpec
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLedger:
+    def __init__(self, ids):
+        self.accounts = {i: tb.Account(id=i, ledger=1, code=1) for i in ids}
+        self.lookups = 0
+
+    async def lookup_accounts(self, ids):
+        self.lookups += 1
+        return [self.accounts[i] for i in ids if i in self.accounts]
+
+    async def create_transfers(self, transfers):
+        return []
+
+
+def test_lru_ttl_and_counters():
+    clock = FakeClock()
+    cache = BalanceCache(max_entries=2, ttl_s=1.0, clock=clock)
+
+    for i in (10, 11, 12):
+        cache.put(tb.Account(id=i), cache.token())
+
+    assert cache.get(10) is None  # evicted as least recently used
+    assert cache.get(12).id == 12
+    clock.now = 2.0
+    assert cache.get(12) is None  # expired
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 2, 1)
+
+
+def test_stale_fill_after_invalidation_is_dropped():
+    cache = BalanceCache(ttl_overrides={MPESA_CLEARING_ACCOUNT_ID: 0})
+
+    token = cache.token()
+    cache.invalidate([10])
+    cache.put(tb.Account(id=10), token)
+    cache.put(tb.Account(id=MPESA_CLEARING_ACCOUNT_ID), cache.token())
+
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_ledger_writes_invalidate_every_touched_account():
+    client = FakeLedger([10, 11, 12])
+    ledger = LedgerClient(client, balance_cache=BalanceCache())
+
+    await ledger.lookup_accounts_many([10, 11, 12])
+    await ledger.lookup_account(10)
+    assert client.lookups == 1
+
+    await ledger.two_phase_pending(transfer_id=99, debit=10, credit=11, amount=5, code=1)
+    assert ledger.balance_cache.get(10) is None and ledger.balance_cache.get(11) is None
+
+    await ledger.lookup_accounts_many([10, 11])
+    await ledger.two_phase_post(post_id=100, pending_id=99, code=1)
+    assert ledger.balance_cache.get(10) is None and ledger.balance_cache.get(11) is None
+
+    await ledger.create_linked_transfers(
+        [
+            TransferSpec(id=1, debit_account_id=10, credit_account_id=11, amount=1, code=1),
+            TransferSpec(id=2, debit_account_id=10, credit_account_id=12, amount=1, code=1),
+        ]
+    )
+    assert ledger.balance_cache.get(12) is None
+
+
+def test_rejected_post_keeps_the_pending_accounts():
+    cache = BalanceCache()
+    pending = tb.Transfer(
+        id=99, debit_account_id=10, credit_account_id=11, flags=tb.TransferFlags.PENDING
+    )
+    post = tb.Transfer(id=100, pending_id=99, flags=tb.TransferFlags.POST_PENDING_TRANSFER)
+    cache.invalidate_transfers([pending], [])
+
+    def touched_by_post(results):
+        cache.put(tb.Account(id=10), cache.token())
+        cache.invalidate_transfers([post], results)
+        return cache.get(10) is None
+
+    rejected = [tb.CreateTransfersResult(index=0, result=tb.CreateTransferResult.EXCEEDS_CREDITS)]
+    assert touched_by_post(rejected)
+    # The call itself failed: the outcome is unknown.
+    assert touched_by_post(None)
+    assert touched_by_post([])
+    # Posted: nothing left for a later post or void to touch.
+    assert not touched_by_post([])
+
+
+@pytest.mark.asyncio
+async def test_bulk_void_invalidates_the_accounts_it_is_given():
+    # The holds were placed by another process: this cache never saw them.
+    client = FakeLedger([10, 11, 12])
+    ledger = LedgerClient(client, balance_cache=BalanceCache())
+    await ledger.lookup_accounts_many([10, 11, 12])
+
+    await ledger.two_phase_void_many([98, 99], code=1, accounts=[(10, 11), (10, 12)])
+    assert all(ledger.balance_cache.get(i) is None for i in (10, 11, 12))
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.db.repositories.deposits import DepositNotFoundError, create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.metrics import CALLBACK_LAG_SECONDS, CALLBACK_QUEUE_DEPTH
+from app.models.deposit import Deposit
+from app.models.deposit_callback import DepositCallback
+from app.services.callback_ingest import CallbackIngestor, IncomingCallback
+
+
+@pytest.mark.asyncio
+async def test_bulk_apply_keeps_per_callback_outcomes():
+    async with SessionLocal() as session:
+        await create_user(session, user_id="ci1", full_name="A", phone_number="+254700000101")
+        for n in range(3):
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"cid{n}",
+                user_id="ci1",
+                amount=100,
+                checkout_request_id=f"CI-CR{n}",
+                merchant_request_id=None,
+            )
+
+    ingestor = CallbackIngestor(flush_size=10, flush_interval_s=0.01, queue_depth=100)
+    batches = CALLBACK_LAG_SECONDS.labels().count
+
+    def cb(n, status="SUCCESS"):
+        return IncomingCallback(f"CI-CR{n}", status, f"R{n}", {"n": n, "status": status})
+
+    outcomes = await asyncio.gather(
+        ingestor.submit(cb(0)),
+        ingestor.submit(cb(1, "FAILED")),
+        ingestor.submit(cb(0, "FAILED")),  # same id: deferred to the next batch
+        ingestor.submit(cb(99)),
+        return_exceptions=True,
+    )
+    assert outcomes[:3] == [True, True, False]
+    assert isinstance(outcomes[3], DepositNotFoundError)
+    assert await ingestor.submit(cb(2)) is True
+    await ingestor.close()
+    assert CALLBACK_LAG_SECONDS.labels().count == batches + ingestor.batches
+    assert CALLBACK_QUEUE_DEPTH.labels().value == 0
+
+    async with SessionLocal() as session:
+        rows = await session.execute(
+            select(Deposit.checkout_request_id, Deposit.status)
+            .where(Deposit.user_id == "ci1")
+            .order_by(Deposit.checkout_request_id)
+        )
+        assert [tuple(r) for r in rows] == [
+            ("CI-CR0", "SUCCESS"),
+            ("CI-CR1", "FAILED"),
+            ("CI-CR2", "SUCCESS"),
+        ]
+        logged = await session.execute(
+            select(DepositCallback.checkout_request_id, DepositCallback.payload)
+            .where(DepositCallback.deposit_id.like("cid%"))
+            .order_by(DepositCallback.id)
+        )
+        assert [tuple(r) for r in logged] == [
+            ("CI-CR0", {"n": 0, "status": "SUCCESS"}),
+            ("CI-CR1", {"n": 1, "status": "FAILED"}),
+            ("CI-CR0", {"n": 0, "status": "FAILED"}),
+            ("CI-CR2", {"n": 2, "status": "SUCCESS"}),
+        ]
+    stats = ingestor.stats()
+    assert stats["applied"] == 3 and stats["batches"] >= 2 and stats["queue_depth"] == 0
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.ledger.client_pool import PoolClosed, TBClientPool
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+
+
+class GatedClient:
+    """Fake ClientAsync whose lookups block until released; counts concurrent calls."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.closed = False
+
+    async def lookup_accounts(self, ids):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.gate.wait()
+            return []
+        finally:
+            self.active -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+def _pool(clients, max_in_flight=2):
+    it = iter(clients)
+    return TBClientPool(lambda: next(it), size=len(clients), max_in_flight=max_in_flight)
+
+
+@pytest.mark.asyncio
+async def test_calls_go_to_least_loaded_client_and_respect_in_flight_limit():
+    clients = [GatedClient(), GatedClient()]
+    pool = _pool(clients).open()
+
+    tasks = [asyncio.ensure_future(pool.lookup_accounts([i])) for i in range(6)]
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert [c.active for c in clients] == [2, 2]
+    assert [s["waiting"] for s in pool.stats()["clients"]] == [1, 1]
+
+    for c in clients:
+        c.gate.set()
+    await asyncio.gather(*tasks)
+    assert [c.peak for c in clients] == [2, 2]
+    assert [c.calls for c in clients] == [3, 3]
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_in_flight_calls_and_rejects_new_ones():
+    client = GatedClient()
+    pool = _pool([client]).open()
+    running = asyncio.ensure_future(pool.lookup_accounts([1]))
+    await asyncio.sleep(0)
+
+    closing = asyncio.ensure_future(pool.close())
+    await asyncio.sleep(0)
+    assert not client.closed
+    with pytest.raises(PoolClosed):
+        await pool.lookup_accounts([2])
+
+    client.gate.set()
+    await asyncio.gather(running, closing)
+    assert client.closed
+
+
+@pytest.mark.asyncio
+async def test_ledger_client_over_pool():
+    ledger = InMemoryLedger()
+    async with TBClientPool(lambda: ledger, size=3) as pool:
+        client = LedgerClient(pool)
+        assert await client.create_accounts_many([1, 2], is_wallet=True) == {}
+        accounts = await client.lookup_accounts_many([1, 2, 3])
+    assert [i for i, a in accounts.items() if a is not None] == [1, 2]
+    assert sum(c["requests"] for c in pool.stats()["clients"]) == 2
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.deadline import (
+    DeadlineExceeded,
+    _deadline,
+    remaining_s,
+    route_deadline,
+    set_deadline,
+    statement_deadline,
+)
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+from app.main import app
+from app.metrics import DEADLINE_EXCEEDED
+from app.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_spent_budget_skips_ledger_and_repository_calls():
+    ledger_before = DEADLINE_EXCEEDED.labels("ledger").value
+    db_before = DEADLINE_EXCEEDED.labels("db").value
+    token = set_deadline(0)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            await LedgerClient(InMemoryLedger()).create_account(10, is_wallet=True)
+        async with SessionLocal() as session:
+            with pytest.raises(DeadlineExceeded):
+                await create_user(
+                    session, user_id="dl1", full_name="A", phone_number="+254700000802"
+                )
+    finally:
+        _deadline.reset(token)
+
+    assert DEADLINE_EXCEEDED.labels("ledger").value == ledger_before + 1
+    assert DEADLINE_EXCEEDED.labels("db").value == db_before + 1
+    async with SessionLocal() as session:
+        assert await session.scalar(select(User.id).where(User.id == "dl1")) is None
+
+
+@pytest.mark.asyncio
+async def test_transactions_get_the_remaining_budget_as_statement_timeout():
+    @statement_deadline
+    async def slow(session):
+        async with session.begin():
+            timeout = await session.scalar(text("SHOW statement_timeout"))
+            await session.execute(text("SELECT pg_sleep(2)"))
+        return timeout
+
+    token = set_deadline(0.2)
+    try:
+        async with SessionLocal() as session:
+            with pytest.raises(DeadlineExceeded) as exc:
+                await slow(session)
+        assert exc.value.layer == "db"
+    finally:
+        _deadline.reset(token)
+
+    # Without a deadline the engine-wide timeout applies.
+    async with SessionLocal() as session:
+        async with session.begin():
+            assert await session.scalar(text("SHOW statement_timeout")) != "200ms"
+
+
+def test_header_and_route_defaults_set_the_budget():
+    @app.get("/test-deadline")
+    async def budget():
+        return {"remaining_s": remaining_s()}
+
+    @app.get("/test-deadline-route", dependencies=[Depends(route_deadline(None))])
+    async def unbounded():
+        return {"remaining_s": remaining_s()}
+
+    @app.get("/test-deadline-spent")
+    async def spent():
+        await asyncio.sleep(0.01)
+        await LedgerClient(InMemoryLedger()).lookup_account(1)
+
+    client = TestClient(app)
+
+    def remaining(path, budget_ms=None):
+        headers = {} if budget_ms is None else {"x-request-deadline-ms": budget_ms}
+        return client.get(path, headers=headers).json()["remaining_s"]
+
+    try:
+        assert remaining("/test-deadline") is None
+        assert 0 < remaining("/test-deadline", "500") <= 0.5
+        # Capped at request_deadline_max_ms.
+        assert remaining("/test-deadline", "1e9") <= 30
+        # A route default only applies when the client sent no header.
+        assert remaining("/test-deadline-route") is None
+        assert remaining("/test-deadline-route", "500") is not None
+
+        resp = client.get("/test-deadline-spent", headers={"x-request-deadline-ms": "1"})
+        assert resp.status_code == 504
+        assert "ledger" in resp.json()["detail"]
+    finally:
+        del app.router.routes[-3:]
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import func, select, text, update
+
+from app.db.repositories.deposits import create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.models.deposit import Deposit
+from app.services.deposit_expiry import DepositExpirySweeper
+
+
+@pytest.mark.asyncio
+async def test_sweeper_expires_only_stale_pending_deposits_in_batches():
+    async with SessionLocal() as session:
+        await create_user(session, user_id="ex1", full_name="A", phone_number="+254700000401")
+        for n in range(6):
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"ex1-d{n}",
+                user_id="ex1",
+                amount=100,
+                checkout_request_id=f"ex1-CR{n}",
+                merchant_request_id=None,
+            )
+        async with session.begin():
+            # d0..d4 are two hours old; d5 is fresh. d4 already succeeded.
+            await session.execute(
+                update(Deposit)
+                .where(Deposit.id.in_([f"ex1-d{n}" for n in range(5)]))
+                .values(created_at=func.now() - text("interval '2 hours'"))
+            )
+            await session.execute(
+                update(Deposit).where(Deposit.id == "ex1-d4").values(status="SUCCESS")
+            )
+
+    expired = await DepositExpirySweeper(ttl_s=3600, batch_size=2).sweep_once()
+    assert expired >= 4
+
+    async with SessionLocal() as session:
+        rows = await session.execute(
+            select(Deposit.id, Deposit.status).where(Deposit.user_id == "ex1").order_by(Deposit.id)
+        )
+        assert [s for _, s in rows] == ["FAILED"] * 4 + ["SUCCESS", "PENDING_CALLBACK"]
@@ -0,0 +1,191 @@
+import pytest
+import tigerbeetle as tb
+from sqlalchemy import select, update
+
+from app.db.repositories.deposits import apply_callback, create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+from app.models.deposit import Deposit
+from app.models.deposit_hold import DepositHold
+from app.services.deposit_holds import DepositHolds, HoldRequest, HoldSweeper
+from app.services.settlement import SettlementWorker
+
+R = tb.CreateTransferResult
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 1_000_000_000
+
+    def __call__(self) -> int:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_bulk_void_with_timeouts():
+    clock = StepClock()
+    ledger = LedgerClient(InMemoryLedger(clock))
+    await ledger.create_account(1, is_wallet=False)
+    await ledger.create_account(10, is_wallet=True)
+    for n in range(1, 6):
+        await ledger.two_phase_pending(
+            transfer_id=100 + n, debit=1, credit=10, amount=n, code=7, timeout=60 if n == 5 else 0
+        )
+    account = await ledger.lookup_account(10)
+    assert account.credits_pending == 15
+
+    assert await ledger.two_phase_post_many([(201, 101), (202, 102)], code=7) == {}
+    assert await ledger.two_phase_post_many([(201, 101)], code=7) == {}
+    assert await ledger.two_phase_void_many([103], code=7) == {}
+    # A retry is answered with EXISTS; a void of a posted hold is a real failure.
+    assert await ledger.two_phase_void_many([103, 101], code=7) == {
+        1: R.PENDING_TRANSFER_ALREADY_POSTED
+    }
+
+    clock.now += 61 * 10**9
+    assert await ledger.two_phase_void_many([104, 105], code=7) == {1: R.PENDING_TRANSFER_EXPIRED}
+    account = await ledger.lookup_account(10)
+    assert (account.credits_pending, account.credits_posted) == (0, 3)
+
+
+async def _pending_deposits(user_id: str, phone: str, n: int) -> int:
+    async with SessionLocal() as session:
+        user = await create_user(session, user_id=user_id, full_name="A", phone_number=phone)
+        for i in range(n):
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"{user_id}-d{i}",
+                user_id=user_id,
+                amount=100 * (i + 1),
+                checkout_request_id=f"{user_id}-CR{i}",
+                merchant_request_id=None,
+            )
+    return user.tb_account_id
+
+
+async def _holds(user_id: str) -> dict[str, str | None]:
+    async with SessionLocal() as session:
+        rows = await session.execute(
+            select(DepositHold.deposit_id, DepositHold.resolution)
+            .where(DepositHold.deposit_id.like(f"{user_id}-%"))
+            .order_by(DepositHold.deposit_id)
+        )
+        return dict(rows.all())
+
+
+@pytest.mark.asyncio
+async def test_holds_are_settled_voided_and_expired():
+    account_id = await _pending_deposits("hd1", "+254700000801", 4)
+    clock = StepClock()
+    ledger = LedgerClient(InMemoryLedger(clock))
+    await ensure_system_accounts(ledger)
+
+    holds = DepositHolds(ledger, timeout_s=600)
+    requests = [HoldRequest(f"hd1-d{i}", f"hd1-CR{i}", account_id, 100 * (i + 1)) for i in range(4)]
+    assert await holds.place(requests) == {}
+    assert await holds.place(requests) == {}
+    account = await ledger.lookup_account(account_id)
+    assert (account.credits_pending, account.credits_posted) == (1000, 0)
+
+    # d0 fails, d1 succeeds and is settled; d2 and d3 are still waiting.
+    async with SessionLocal() as session:
+        for i, status in ((0, "FAILED"), (1, "SUCCESS")):
+            await apply_callback(
+                session, checkout_request_id=f"hd1-CR{i}", status=status, receipt=None, payload={}
+            )
+    await SettlementWorker(ledger, batch_size=100, max_attempts=3).run_once()
+    result = await HoldSweeper(ledger, batch_size=1).sweep_once()
+    assert (result.voided, result.expired, result.failed) == (1, 0, 0)
+    assert await _holds("hd1") == {
+        "hd1-d0": "VOIDED",
+        "hd1-d1": "SETTLED",
+        "hd1-d2": None,
+        "hd1-d3": None,
+    }
+    account = await ledger.lookup_account(account_id)
+    assert (account.credits_pending, account.credits_posted) == (700, 200)
+
+    # d2's callback never comes: the ledger times the hold out, the sweeper notices.
+    clock.now += 601 * 10**9
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(
+                update(DepositHold)
+                .where(DepositHold.deposit_id == "hd1-d2")
+                .values(expires_at=DepositHold.created_at)
+            )
+    result = await HoldSweeper(ledger, batch_size=10).sweep_once()
+    assert (result.voided, result.expired, result.failed) == (0, 1, 0)
+    assert (await _holds("hd1"))["hd1-d2"] == "EXPIRED"
+    assert (await _holds("hd1"))["hd1-d3"] is None
+
+    clearing = await ledger.lookup_account(MPESA_CLEARING_ACCOUNT_ID)
+    assert clearing.debits_posted >= 200
+    async with SessionLocal() as session:
+        status = await session.scalar(select(Deposit.status).where(Deposit.id == "hd1-d2"))
+        assert status == "PENDING_CALLBACK"
+
+
+@pytest.mark.asyncio
+async def test_settlement_credits_a_deposit_whose_hold_was_released():
+    account_id = await _pending_deposits("hd2", "+254700000804", 2)
+    ledger = LedgerClient(InMemoryLedger(StepClock()))
+    await ensure_system_accounts(ledger)
+    holds = DepositHolds(ledger, timeout_s=600)
+    requests = [HoldRequest(f"hd2-d{i}", f"hd2-CR{i}", account_id, 100 * (i + 1)) for i in range(2)]
+    assert await holds.place(requests) == {}
+    async with SessionLocal() as session:
+        pending_id = await session.scalar(
+            select(DepositHold.pending_id).where(DepositHold.deposit_id == "hd2-d1")
+        )
+    async with SessionLocal() as session:
+        for i in range(2):
+            await apply_callback(
+                session,
+                checkout_request_id=f"hd2-CR{i}",
+                status="SUCCESS",
+                receipt=None,
+                payload={},
+            )
+    # d1's hold is voided behind settlement's back: it gets a direct credit instead.
+    assert await ledger.two_phase_void_many([pending_id], code=0) == {}
+
+    worker = SettlementWorker(ledger, batch_size=100, max_attempts=3)
+    result = await worker.run_once()
+    assert (result.claimed, result.posted, result.failed) == (2, 2, 0)
+    assert await _holds("hd2") == {"hd2-d0": "SETTLED", "hd2-d1": "VOIDED"}
+    account = await ledger.lookup_account(account_id)
+    assert (account.credits_pending, account.credits_posted) == (0, 300)
+
+
+@pytest.mark.asyncio
+async def test_sweeper_leaves_success_holds_to_settlement():
+    account_id = await _pending_deposits("hd3", "+254700000805", 1)
+    ledger = LedgerClient(InMemoryLedger(StepClock()))
+    await ensure_system_accounts(ledger)
+    holds = DepositHolds(ledger, timeout_s=600)
+    assert await holds.place([HoldRequest("hd3-d0", "hd3-CR0", account_id, 100)]) == {}
+    async with SessionLocal() as session:
+        await apply_callback(
+            session, checkout_request_id="hd3-CR0", status="SUCCESS", receipt=None, payload={}
+        )
+    # Even once its timeout has passed, a SUCCESS deposit's hold is settlement's to post.
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(
+                update(DepositHold)
+                .where(DepositHold.deposit_id == "hd3-d0")
+                .values(expires_at=DepositHold.created_at)
+            )
+    result = await HoldSweeper(ledger, batch_size=10).sweep_once()
+    assert (result.voided, result.expired, result.failed) == (0, 0, 0)
+    assert await _holds("hd3") == {"hd3-d0": None}
+
+    await SettlementWorker(ledger, batch_size=100, max_attempts=3).run_once()
+    assert await _holds("hd3") == {"hd3-d0": "SETTLED"}
+    account = await ledger.lookup_account(account_id)
+    assert (account.credits_pending, account.credits_posted) == (0, 100)
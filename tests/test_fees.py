@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from app.ledger.constants import FEES_REVENUE_ACCOUNT_ID, TRANSFER_CODE_P2P_FEE
+from app.ledger.fees import (
+    DEFAULT_P2P_TARIFF,
+    FeeSchedule,
+    FeeScheduleError,
+    FeeScheduleSource,
+    p2p_transfer_specs,
+)
+from app.ledger.ids import p2p_transfer_id
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+
+
+def test_fee_is_looked_up_by_inclusive_upper_bound():
+    schedule = FeeSchedule([(100, 0), (500, 7), (1000, 13)])
+
+    assert [schedule.fee(a) for a in (1, 100, 101, 500, 501, 1000)] == [0, 0, 7, 7, 13, 13]
+    assert schedule.compute_fees([1000, 1, 250]) == [13, 0, 7]
+    assert schedule.compute_fees([]) == []
+    for amount in (0, 1001):
+        with pytest.raises(FeeScheduleError):
+            schedule.fee(amount)
+    with pytest.raises(FeeScheduleError):
+        schedule.compute_fees([5, 1001])
+
+
+@pytest.mark.parametrize(
+    "tiers", [[], [(0, 1)], [(100, 0), (100, 5)], [(500, 0), (100, 5)], [(100, -1)]]
+)
+def test_invalid_tariffs_are_rejected(tiers):
+    with pytest.raises(FeeScheduleError):
+        FeeSchedule(tiers)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['[{"up_to": "abc", "fee": 1}]', '[{"up_to": 100}]', "[1]", "{", '[{"up_to": 0, "fee": 1}]'],
+)
+def test_invalid_tariff_files_are_rejected(text):
+    with pytest.raises(FeeScheduleError):
+        FeeSchedule.from_json(text)
+
+
+def test_specs_for_a_payment():
+    main, fee = p2p_transfer_specs("r1", sender=10, recipient=11, amount=600, fee=13)
+
+    assert (main.id, main.debit_account_id, main.credit_account_id, main.amount) == (
+        p2p_transfer_id("r1", "main"),
+        10,
+        11,
+        600,
+    )
+    assert (fee.id, fee.credit_account_id, fee.amount, fee.code) == (
+        p2p_transfer_id("r1", "fee"),
+        FEES_REVENUE_ACCOUNT_ID,
+        13,
+        TRANSFER_CODE_P2P_FEE,
+    )
+    assert len(p2p_transfer_specs("r2", sender=10, recipient=11, amount=50, fee=0)) == 1
+
+
+@pytest.mark.asyncio
+async def test_payment_legs_post_as_one_chain():
+    ledger = LedgerClient(InMemoryLedger())
+    for account_id in (FEES_REVENUE_ACCOUNT_ID, 10, 11):
+        await ledger.create_account(account_id, is_wallet=False)
+    schedule = FeeSchedule(DEFAULT_P2P_TARIFF)
+
+    specs = p2p_transfer_specs("r3", sender=10, recipient=11, amount=600, fee=schedule.fee(600))
+    await ledger.create_linked_transfers(specs)
+
+    fees = await ledger.lookup_account(FEES_REVENUE_ACCOUNT_ID)
+    assert fees is not None and fees.credits_posted == 13
+
+
+@pytest.mark.asyncio
+async def test_source_reloads_changed_file_and_keeps_last_good(tmp_path):
+    path = tmp_path / "tariff.json"
+    path.write_text(json.dumps([{"up_to": 100, "fee": 1}]))
+    source = FeeScheduleSource(str(path))
+    old = source.current
+    assert old.fee(50) == 1
+    assert await source.reload() is False
+
+    path.write_text(json.dumps([{"up_to": 100, "fee": 2}]))
+    os.utime(path, (1, 1))
+    assert await source.reload() is True
+    assert source.current.fee(50) == 2
+    assert old.fee(50) == 1
+
+    path.write_text("not json")
+    os.utime(path, (2, 2))
+    assert await source.reload() is False
+    assert source.current.fee(50) == 2
+
+    # A reload that blows up unexpectedly does not end polling.
+    source.interval_s = 0.001
+    reloads = 0
+
+    async def failing_reload():
+        nonlocal reloads
+        reloads += 1
+        raise RuntimeError("boom")
+
+    source.reload = failing_reload  # type: ignore[method-assign]
+    source.start()
+    try:
+        while reloads < 2:
+            await asyncio.sleep(0.001)
+    finally:
+        await source.stop()
+
+
+def test_default_source_uses_builtin_tariff():
+    assert FeeScheduleSource().current.bounds[-1] == DEFAULT_P2P_TARIFF[-1][0]
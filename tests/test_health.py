@@ -1,6 +1,13 @@
+import time
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
 
+from app.db.engine import InstrumentedQueuePool
 from app.main import app
+from app.settings.config import settings
 
 client = TestClient(app)
 
@@ -8,4 +15,33 @@ client = TestClient(app)
 def test_health_ok():
     resp = client.get("/health")
     assert resp.status_code == 200
-    assert resp.json()["status"] == "ok"
\ No newline at end of file
+    assert resp.json()["status"] == "ok"
+
+def test_db_pool_stats():
+    resp = client.get("/stats/db-pool")
+    assert resp.status_code == 200
+    assert "pool" in resp.json()
+
+def test_callback_ingest_stats():
+    resp = client.get("/stats/callback-ingest")
+    assert resp.status_code == 200
+    assert resp.json()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_leaves_out_connect_time():
+    engine = create_async_engine(
+        settings.database_url, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+    )
+    event.listen(engine.sync_engine, "connect", lambda *_: time.sleep(0.2))
+    pool = engine.pool
+    assert isinstance(pool, InstrumentedQueuePool)
+    try:
+        for _ in range(2):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+    assert (pool.checkouts, pool.connects) == (2, 1)
+    assert pool.connect_total_s >= 0.2
+    assert pool.wait_max_s < 0.1
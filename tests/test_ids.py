@@ -0,0 +1,30 @@
+from app.ledger.ids import (
+    NS_DEPOSIT,
+    deposit_transfer_id,
+    derive_ids,
+    p2p_transfer_id,
+    post_transfer_id,
+    void_transfer_id,
+    wallet_account_id,
+)
+
+
+def test_ids_are_stable_and_namespaced():
+    assert deposit_transfer_id("ws_CO_1") == deposit_transfer_id("ws_CO_1")
+    assert deposit_transfer_id("ws_CO_1") != deposit_transfer_id("ws_CO_2")
+
+    ids = {
+        deposit_transfer_id("42"),
+        wallet_account_id("42"),
+        p2p_transfer_id("42", "main"),
+        p2p_transfer_id("42", "fee"),
+        post_transfer_id(42),
+        void_transfer_id(42),
+    }
+    assert len(ids) == 6
+    assert all(0 < i < (1 << 128) - 1 for i in ids)
+
+
+def test_bulk_derivation_matches_single():
+    keys = [f"ws_CO_{n}" for n in range(50)]
+    assert derive_ids(NS_DEPOSIT, keys) == [deposit_transfer_id(k) for k in keys]
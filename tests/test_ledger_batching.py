@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+import tigerbeetle as tb
+
+from app.ledger.batcher import LookupBatcher, TransferBatcher
+from app.ledger.ledger_client import InsufficientFunds, LedgerClient, LedgerConflict, TransferSpec
+from app.metrics import LEDGER_BATCH_SIZE
+
+
+class RecordingClient:
+    """Fake ClientAsync: records each create_transfers request and fails chosen ids."""
+
+    def __init__(self, results: dict[int, tb.CreateTransferResult] | None = None):
+        self.results = results or {}
+        self.requests: list[list[tb.Transfer]] = []
+
+    async def create_transfers(self, transfers):
+        self.requests.append(list(transfers))
+        return [
+            tb.CreateTransfersResult(index=i, result=self.results[t.id])
+            for i, t in enumerate(transfers)
+            if t.id in self.results
+        ]
+
+
+def _spec(transfer_id: int) -> TransferSpec:
+    return TransferSpec(id=transfer_id, debit_account_id=1, credit_account_id=2, amount=10, code=1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_transfers_share_one_request():
+    client = RecordingClient()
+    ledger = LedgerClient(client, batcher=TransferBatcher(client, window_s=0.01))
+
+    await asyncio.gather(*(ledger.create_transfer(_spec(i)) for i in range(1, 51)))
+
+    assert len(client.requests) == 1
+    assert [t.id for t in client.requests[0]] == list(range(1, 51))
+
+
+@pytest.mark.asyncio
+async def test_errors_are_routed_to_their_owner():
+    client = RecordingClient(
+        {
+            3: tb.CreateTransferResult.EXCEEDS_CREDITS,
+            4: tb.CreateTransferResult.EXISTS,
+        }
+    )
+    ledger = LedgerClient(client, batcher=TransferBatcher(client, window_s=0.01))
+
+    results = await asyncio.gather(
+        *(ledger.create_transfer(_spec(i)) for i in range(1, 6)), return_exceptions=True
+    )
+
+    assert len(client.requests) == 1
+    assert isinstance(results[2], InsufficientFunds)
+    assert [r for i, r in enumerate(results) if i != 2] == [None] * 4
+
+
+@pytest.mark.asyncio
+async def test_linked_chains_stay_contiguous_and_size_cap_flushes():
+    client = RecordingClient()
+    ledger = LedgerClient(client, batcher=TransferBatcher(client, window_s=0.05, max_size=4))
+
+    await asyncio.gather(
+        ledger.create_linked_transfers([_spec(1), _spec(2), _spec(3)]),
+        ledger.create_linked_transfers([_spec(4), _spec(5)]),
+        ledger.create_transfer(_spec(6)),
+    )
+
+    # The second chain does not fit next to the first, so it starts a new request.
+    assert [[t.id for t in r] for r in client.requests] == [[1, 2, 3], [4, 5, 6]]
+    flags = [bool(t.flags & tb.TransferFlags.LINKED) for t in client.requests[1]]
+    assert flags == [True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_open_chain_is_rejected_without_sending():
+    client = RecordingClient()
+    batcher = TransferBatcher(client, window_s=0.01)
+
+    spec = TransferSpec(
+        id=1,
+        debit_account_id=1,
+        credit_account_id=2,
+        amount=1,
+        code=1,
+        flags=tb.TransferFlags.LINKED,
+    )
+    with pytest.raises(LedgerConflict):
+        await LedgerClient(client, batcher=batcher).create_transfer(spec)
+    assert client.requests == []
+
+
+class LookupClient:
+    def __init__(self, known: set[int]):
+        self.known = known
+        self.requests: list[list[int]] = []
+
+    async def lookup_accounts(self, ids):
+        self.requests.append(list(ids))
+        return [tb.Account(id=i, ledger=1, code=1) for i in reversed(ids) if i in self.known]
+
+
+@pytest.mark.asyncio
+async def test_lookup_accounts_many_chunks_and_maps_missing_to_none():
+    client = LookupClient(known=set(range(0, 10_000, 2)))
+    ledger = LedgerClient(client)
+
+    found = await ledger.lookup_accounts_many(range(10_000))
+
+    assert [len(r) for r in client.requests] == [8189, 1811]
+    assert len(found) == 10_000
+    assert found[4].id == 4
+    assert found[5] is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_single_lookups_are_coalesced():
+    client = LookupClient(known={1, 2})
+    ledger = LedgerClient(client, lookup_batcher=LookupBatcher(client, window_s=0.01))
+
+    a, b, missing, again = await asyncio.gather(
+        ledger.lookup_account(1),
+        ledger.lookup_account(2),
+        ledger.lookup_account(3),
+        ledger.lookup_account(1),
+    )
+
+    assert client.requests == [[1, 2, 3]]
+    assert (a.id, b.id, missing, again.id) == (1, 2, None, 1)
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_observed_per_merged_request():
+    client = RecordingClient()
+    ledger = LedgerClient(client, batcher=TransferBatcher(client, window_s=0.01))
+    sizes = LEDGER_BATCH_SIZE.labels("create_transfers")
+    before = (sizes.count, sizes.sum)
+
+    await asyncio.gather(*(ledger.create_transfer(_spec(i)) for i in range(1, 11)))
+
+    assert len(client.requests) == 1
+    assert (sizes.count, sizes.sum) == (before[0] + 1, before[1] + 10)
@@ -0,0 +1,120 @@
+import pytest
+import tigerbeetle as tb
+
+from app.ledger.constants import LEDGER_KES
+from app.ledger.ledger_client import InsufficientFunds, LedgerClient, LedgerConflict, TransferSpec
+from app.ledger.memory_backend import InMemoryLedger
+
+R = tb.CreateTransferResult
+
+
+def _result(result: tb.CreateTransferResult) -> str:
+    # LedgerConflict carries str(result), which is the bare number on Python 3.11+.
+    return f"^({result}|{result.value})$"
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 1_000_000_000
+
+    def __call__(self) -> int:
+        return self.now
+
+
+async def _ledger_with_accounts(clock=None) -> tuple[InMemoryLedger, LedgerClient]:
+    backend = InMemoryLedger(clock or StepClock())
+    ledger = LedgerClient(backend)
+    await ledger.create_account(1, is_wallet=False)
+    await ledger.create_account(10, is_wallet=True)
+    await ledger.create_account(11, is_wallet=True)
+    return backend, ledger
+
+
+def _t(transfer_id, debit, credit, amount, flags=0):
+    return tb.Transfer(
+        id=transfer_id,
+        debit_account_id=debit,
+        credit_account_id=credit,
+        amount=amount,
+        ledger=LEDGER_KES,
+        code=1,
+        flags=flags,
+    )
+
+
+@pytest.mark.asyncio
+async def test_linked_chain_is_all_or_nothing():
+    backend, ledger = await _ledger_with_accounts()
+    await ledger.create_transfer(TransferSpec(100, 1, 10, 50, code=1))
+
+    errors = await backend.create_transfers(
+        [_t(101, 10, 11, 30, tb.TransferFlags.LINKED), _t(102, 10, 1, 30), _t(103, 1, 11, 5)]
+    )
+
+    assert [(e.index, e.result) for e in errors] == [
+        (0, R.LINKED_EVENT_FAILED),
+        (1, R.EXCEEDS_CREDITS),
+    ]
+    a, b = await backend.lookup_accounts([10, 11])
+    assert (a.debits_posted, b.credits_posted) == (0, 5)
+
+    open_chain = await backend.create_transfers([_t(104, 1, 10, 1, tb.TransferFlags.LINKED)])
+    assert open_chain[0].result == R.LINKED_EVENT_CHAIN_OPEN
+
+
+@pytest.mark.asyncio
+async def test_exists_and_already_failed_idempotency():
+    backend, ledger = await _ledger_with_accounts()
+    spec = TransferSpec(200, 1, 10, 10, code=1)
+    await ledger.create_transfer(spec)
+    await ledger.create_transfer(spec)  # EXISTS is success
+
+    changed = await backend.create_transfers([_t(200, 1, 10, 11)])
+    assert changed[0].result == R.EXISTS_WITH_DIFFERENT_AMOUNT
+
+    with pytest.raises(InsufficientFunds):
+        await ledger.create_transfer(TransferSpec(201, 11, 10, 1, code=1))
+    await ledger.create_transfer(TransferSpec(202, 1, 11, 5, code=1))
+    with pytest.raises(LedgerConflict, match=_result(R.ID_ALREADY_FAILED)):
+        await ledger.create_transfer(TransferSpec(201, 11, 10, 1, code=1))
+
+
+@pytest.mark.asyncio
+async def test_two_phase_void_and_timeout():
+    clock = StepClock()
+    backend, ledger = await _ledger_with_accounts(clock)
+
+    await ledger.two_phase_pending(transfer_id=300, debit=1, credit=10, amount=70, code=1)
+    await ledger.two_phase_void(void_id=301, pending_id=300, code=1)
+    with pytest.raises(LedgerConflict, match=_result(R.PENDING_TRANSFER_ALREADY_VOIDED)):
+        await ledger.two_phase_post(post_id=302, pending_id=300, code=1)
+
+    await backend.create_transfers([_t(303, 1, 10, 40, tb.TransferFlags.PENDING)])
+    expiring = _t(304, 1, 10, 40, tb.TransferFlags.PENDING)
+    expiring.timeout = 1
+    errors = await backend.create_transfers([expiring])
+    assert errors == []
+    assert (await ledger.lookup_account(10)).credits_pending == 80
+
+    clock.now += 2 * 10**9
+    account = await ledger.lookup_account(10)
+    assert account.credits_pending == 40 and account.credits_posted == 0
+    with pytest.raises(LedgerConflict, match=_result(R.PENDING_TRANSFER_EXPIRED)):
+        await ledger.two_phase_post(post_id=305, pending_id=304, code=1)
+
+
+@pytest.mark.asyncio
+async def test_get_account_transfers_pages_by_timestamp():
+    backend, ledger = await _ledger_with_accounts()
+    for i in range(5):
+        await ledger.create_transfer(TransferSpec(400 + i, 1, 10, 1, code=1))
+
+    flags = tb.AccountFilterFlags.DEBITS | tb.AccountFilterFlags.CREDITS
+    first = await backend.get_account_transfers(
+        tb.AccountFilter(account_id=10, limit=3, flags=flags)
+    )
+    rest = await backend.get_account_transfers(
+        tb.AccountFilter(account_id=10, timestamp_min=first[-1].timestamp + 1, limit=3, flags=flags)
+    )
+
+    assert [t.id for t in first + rest] == [400, 401, 402, 403, 404]
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.ledger_client import LedgerClient, LedgerConflict, TransferSpec
+from app.ledger.memory_backend import InMemoryLedger
+from app.main import app
+from app.metrics import (
+    DB_STATEMENT_SECONDS,
+    LEDGER_REQUEST_SECONDS,
+    LEDGER_RESULTS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+)
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    hist = registry.register(Histogram("op_seconds", "Op latency.", ["op"], buckets=[0.1, 1.0]))
+    counter = registry.register(Counter("errors_total", "Errors.", ["kind"]))
+    gauge = registry.register(Gauge("queue_depth", "Queued items."))
+    hist.labels("a").observe(0.05)
+    hist.labels("a").observe(0.5)
+    hist.labels("a").observe(5.0)
+    counter.labels('say "hi"').inc()
+    gauge.labels().set(3)
+    gauge.labels().set(2)
+
+    assert registry.render().splitlines() == [
+        "# HELP op_seconds Op latency.",
+        "# TYPE op_seconds histogram",
+        'op_seconds_bucket{op="a",le="0.1"} 1',
+        'op_seconds_bucket{op="a",le="1.0"} 2',
+        'op_seconds_bucket{op="a",le="+Inf"} 3',
+        'op_seconds_sum{op="a"} 5.55',
+        'op_seconds_count{op="a"} 3',
+        "# HELP errors_total Errors.",
+        "# TYPE errors_total counter",
+        'errors_total{kind="say \\"hi\\""} 1.0',
+        "# HELP queue_depth Queued items.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ledger_and_sql_calls_are_recorded():
+    ledger = LedgerClient(InMemoryLedger())
+    calls = LEDGER_REQUEST_SECONDS.labels("create_account").count
+    missing = LEDGER_RESULTS.labels("transfer", "DEBIT_ACCOUNT_NOT_FOUND").value
+
+    await ledger.create_account(7, is_wallet=False)
+    with pytest.raises(LedgerConflict):
+        await ledger.create_transfer(
+            TransferSpec(id=1, debit_account_id=8, credit_account_id=7, amount=1, code=1)
+        )
+    assert LEDGER_REQUEST_SECONDS.labels("create_account").count == calls + 1
+    assert LEDGER_RESULTS.labels("transfer", "DEBIT_ACCOUNT_NOT_FOUND").value == missing + 1
+
+    statements = DB_STATEMENT_SECONDS.labels("users.create_user").count
+    async with SessionLocal() as session:
+        await create_user(session, user_id="mt1", full_name="A", phone_number="+254700000701")
+    assert DB_STATEMENT_SECONDS.labels("users.create_user").count > statements
+
+
+def test_metrics_endpoint_includes_http_requests():
+    client = TestClient(app)
+    client.get("/health")
+    body = client.get("/metrics").text
+    assert 'http_request_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "# TYPE ledger_request_seconds histogram" in body
@@ -0,0 +1,120 @@
+import csv
+import gzip
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.db.engine import engine
+from app.db.partitions import (
+    add_months,
+    ensure_monthly_partitions,
+    list_partitions,
+    monthly_partition_ddl,
+    months_between,
+    parse_partition_bound,
+    partitions_older_than,
+)
+from app.metrics import PARTITION_MAINTENANCE_FAILURES
+from app.services.partition_archive import PartitionArchiver
+from app.services.partition_maintenance import PARTITION_LOCK_CLASS, PartitionMaintainer
+
+
+def test_monthly_partition_bounds():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert months_between(date(2026, 11, 20), date(2027, 1, 3)) == [
+        date(2026, 11, 1),
+        date(2026, 12, 1),
+        date(2027, 1, 1),
+    ]
+    assert monthly_partition_ddl("t", date(2026, 12, 9)) == (
+        "CREATE TABLE IF NOT EXISTS t_y2026m12 PARTITION OF t "
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+
+
+def test_parse_partition_bound():
+    p = parse_partition_bound(
+        "t_y2026m12",
+        "FOR VALUES FROM ('2026-12-01 03:00:00+03') TO ('2027-01-01 00:00:00+00')",
+    )
+    assert p.lower == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert p.upper == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+    legacy = parse_partition_bound(
+        "t_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"
+    )
+    assert legacy.lower is None
+    assert parse_partition_bound("t_default", "DEFAULT").is_default
+
+    cutoff = datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert [q.name for q in partitions_older_than([legacy, p], cutoff)] == ["t_legacy"]
+    assert legacy.overlaps(datetime(2026, 10, 1, tzinfo=timezone.utc), cutoff)
+    assert not legacy.overlaps(datetime(2026, 11, 1, tzinfo=timezone.utc), cutoff)
+
+
+@pytest.mark.asyncio
+async def test_archive_detaches_exports_and_drops_old_partitions(tmp_path):
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS archive_t CASCADE"))
+        await conn.execute(
+            text("CREATE TABLE archive_t (id int, at timestamptz NOT NULL) PARTITION BY RANGE (at)")
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE archive_t_legacy PARTITION OF archive_t "
+                "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"
+            )
+        )
+        # The month the legacy partition already covers is skipped.
+        created = await ensure_monthly_partitions(
+            conn, "archive_t", months_ahead=1, today=date(2026, 10, 18)
+        )
+        assert created == ["archive_t_y2026m11"]
+        await conn.execute(
+            text(
+                "INSERT INTO archive_t VALUES "
+                "(1, '2026-09-30 23:00:00+00'), (2, '2026-10-02 00:00:00+00'), "
+                "(3, '2026-11-02 00:00:00+00')"
+            )
+        )
+
+    archiver = PartitionArchiver(str(tmp_path))
+    archived = await archiver.archive("archive_t", datetime(2026, 11, 1, tzinfo=timezone.utc))
+    assert [(a.name, a.rows) for a in archived] == [("archive_t_legacy", 2)]
+    with gzip.open(archived[0].path, "rt") as f:
+        assert list(csv.reader(f)) == [
+            ["id", "at"],
+            ["1", "2026-09-30 23:00:00+00"],
+            ["2", "2026-10-02 00:00:00+00"],
+        ]
+
+    async with engine.begin() as conn:
+        assert [p.name for p in await list_partitions(conn, "archive_t")] == ["archive_t_y2026m11"]
+        assert (await conn.execute(text("SELECT to_regclass('archive_t_legacy')"))).scalar() is None
+        await conn.execute(text("DROP TABLE archive_t"))
+
+
+@pytest.mark.asyncio
+async def test_maintainer_creates_upcoming_partitions_once_at_a_time():
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS maintain_t CASCADE"))
+        await conn.execute(
+            text("CREATE TABLE maintain_t (at timestamptz NOT NULL) PARTITION BY RANGE (at)")
+        )
+    maintainer = PartitionMaintainer(tables=["maintain_t", "no_such_table"], months_ahead=1)
+    failures = PARTITION_MAINTENANCE_FAILURES.labels("no_such_table")
+    before = failures.value
+
+    async with engine.begin() as conn:
+        await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_CLASS, 0)))
+        assert await maintainer.run_once(date(2026, 12, 5)) is None
+
+    created = await maintainer.run_once(date(2026, 12, 5))
+    # A failing table does not stop the others.
+    assert created == {"maintain_t": ["maintain_t_y2026m12", "maintain_t_y2027m01"]}
+    assert failures.value == before + 1
+    assert await maintainer.run_once(date(2026, 12, 5)) == {"maintain_t": []}
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP TABLE maintain_t"))
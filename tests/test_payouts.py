@@ -0,0 +1,213 @@
+import pytest
+import tigerbeetle as tb
+from sqlalchemy import delete, select, update
+
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import (
+    FEES_REVENUE_ACCOUNT_ID,
+    MPESA_CLEARING_ACCOUNT_ID,
+    TRANSFER_CODE_MPESA_DEPOSIT,
+)
+from app.ledger.fees import FeeSchedule
+from app.ledger.ledger_client import LedgerClient, TransferSpec
+from app.ledger.memory_backend import InMemoryLedger
+from app.models.payout_job import PayoutJob
+from app.models.payout_row import PayoutRow
+from app.services.payouts import (
+    PayoutEngine,
+    PayoutItem,
+    PayoutJobConflict,
+    iter_lines,
+    parse_rows,
+)
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _rows(data: bytes, fmt: str) -> list[PayoutItem]:
+    # Split mid-line to exercise the line reassembly.
+    parts = [data[i : i + 7] for i in range(0, len(data), 7)]
+    return [item async for item in parse_rows(iter_lines(_chunks(*parts)), fmt)]
+
+
+@pytest.mark.asyncio
+async def test_parse_csv_and_ndjson():
+    csv_rows = await _rows(b"amount,phone\r\n10,+254700000701\n\nx,+254700000702\n5\n", "csv")
+    assert csv_rows == [
+        PayoutItem(1, "+254700000701", 10),
+        PayoutItem(2, "+254700000702", None),
+        PayoutItem(3, "5", None),
+    ]
+
+    ndjson_rows = await _rows(b'{"phone": "+254700000701", "amount": 7}\nnot json', "ndjson")
+    assert ndjson_rows == [PayoutItem(1, "+254700000701", 7), PayoutItem(2, "not json", None)]
+
+    with pytest.raises(ValueError):
+        await _rows(b"msisdn,amount\n", "csv")
+
+
+@pytest.mark.asyncio
+async def test_parse_skips_a_bom_and_reports_undecodable_lines():
+    data = b"\xef\xbb\xbfphone,amount\n+254700000701,10\n\xff\xfe,5\n+254700000702,3\n"
+    assert await _rows(data, "csv") == [
+        PayoutItem(1, "+254700000701", 10),
+        PayoutItem(2, repr(b"\xff\xfe,5"), None),
+        PayoutItem(3, "+254700000702", 3),
+    ]
+
+
+class RecordingBackend(InMemoryLedger):
+    def __init__(self):
+        super().__init__()
+        self.request_sizes: list[int] = []
+
+    async def create_transfers(self, transfers):
+        self.request_sizes.append(len(transfers))
+        return await super().create_transfers(transfers)
+
+
+def _chain(n: int, debit: int = 1) -> list[TransferSpec]:
+    return [
+        TransferSpec(id=n * 10 + leg, debit_account_id=debit, credit_account_id=2, amount=1, code=1)
+        for leg in (1, 2)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_chains_are_packed_without_splitting_and_retries_succeed():
+    backend = RecordingBackend()
+    ledger = LedgerClient(backend)
+    await ledger.create_accounts_many([1, 2], is_wallet=False)
+
+    chains = [_chain(n) for n in range(1, 6)]
+    assert await ledger.create_chains_many(chains, max_batch=5) == {}
+    assert backend.request_sizes == [4, 4, 2]
+
+    # Resent: every chain comes back as [EXISTS, LINKED_EVENT_FAILED], i.e. done.
+    assert await ledger.create_chains_many(chains, max_batch=5) == {}
+    await ledger.create_linked_transfers(chains[0])
+
+    failures = await ledger.create_chains_many([_chain(1), _chain(6, debit=99)])
+    assert failures == {1: tb.CreateTransferResult.DEBIT_ACCOUNT_NOT_FOUND}
+
+
+async def _funded_wallet(ledger: LedgerClient, user_id: str, phone: str, amount: int) -> int:
+    async with SessionLocal() as session:
+        user = await create_user(session, user_id=user_id, full_name="P", phone_number=phone)
+    await ledger.create_account(user.tb_account_id, is_wallet=True)
+    await ledger.create_transfer(
+        TransferSpec(
+            id=tb.id(),
+            debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+            credit_account_id=user.tb_account_id,
+            amount=amount,
+            code=TRANSFER_CODE_MPESA_DEPOSIT,
+        )
+    )
+    return user.tb_account_id
+
+
+@pytest.mark.asyncio
+async def test_engine_pays_records_and_resumes():
+    backend = RecordingBackend()
+    ledger = LedgerClient(backend)
+    await ensure_system_accounts(ledger)
+    source = await _funded_wallet(ledger, "po-src", "+254700000710", 10_000)
+    recipients = {}
+    for n in range(1, 4):
+        async with SessionLocal() as session:
+            user = await create_user(
+                session, user_id=f"po-r{n}", full_name="R", phone_number=f"+25470000071{n}"
+            )
+        recipients[n] = user.tb_account_id
+
+    lines = [
+        "phone,amount",
+        "+254700000711,100",
+        "+254700000712,600",
+        "+254700000799,50",
+        "+254700000713,abc",
+        "+254700000713,999999",
+        "+254700000713,200",
+        "+254700000711,9500",
+    ]
+    data = "\n".join(lines).encode()
+    engine = PayoutEngine(
+        ledger,
+        fee_schedule=FeeSchedule([(100, 0), (1000, 10), (10_000, 20)]),
+        concurrency=1,
+        max_batch=4,
+    )
+    assert engine.chunk_rows == 2
+
+    summary = await engine.run("po-job", source, parse_rows(iter_lines(_chunks(data)), "csv"))
+    assert (summary.status, summary.next_row, summary.posted, summary.failed) == ("DONE", 8, 3, 4)
+
+    async with SessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(PayoutRow.row_no, PayoutRow.status, PayoutRow.fee, PayoutRow.error)
+                .where(PayoutRow.job_id == "po-job")
+                .order_by(PayoutRow.row_no)
+            )
+        ).all()
+    assert [tuple(r) for r in rows] == [
+        (1, "POSTED", 0, None),
+        (2, "POSTED", 10, None),
+        (3, "FAILED", None, "RECIPIENT_NOT_FOUND"),
+        (4, "FAILED", None, "INVALID_ROW"),
+        (5, "FAILED", None, "AMOUNT_ABOVE_LIMIT"),
+        (6, "POSTED", 10, None),
+        (7, "FAILED", 20, "EXCEEDS_CREDITS"),
+    ]
+    assert await engine.failures("po-job", after_row=4, limit=1) == [
+        {"row_no": 5, "recipient": "+254700000713", "amount": 999999, "error": "AMOUNT_ABOVE_LIMIT"}
+    ]
+
+    balances = await ledger.lookup_accounts_many([source, FEES_REVENUE_ACCOUNT_ID, recipients[2]])
+    before = {i: a.credits_posted - a.debits_posted for i, a in balances.items() if a}
+    assert before[recipients[2]] == 600
+
+    # Crash before the checkpoint moved: the same rows are sent again, nothing is paid twice.
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(delete(PayoutRow).where(PayoutRow.job_id == "po-job"))
+            await session.execute(
+                update(PayoutJob)
+                .where(PayoutJob.id == "po-job")
+                .values(status="RUNNING", next_row=1, posted=0, failed=0)
+            )
+    again = await engine.run("po-job", source, parse_rows(iter_lines(_chunks(data)), "csv"))
+    assert (again.posted, again.failed) == (3, 4)
+    balances = await ledger.lookup_accounts_many([source, FEES_REVENUE_ACCOUNT_ID, recipients[2]])
+    assert {i: a.credits_posted - a.debits_posted for i, a in balances.items() if a} == before
+
+    # Rows recorded already are not counted again, and the checkpoint does not move back.
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(
+                update(PayoutJob).where(PayoutJob.id == "po-job").values(status="RUNNING")
+            )
+    await engine._record("po-job", [PayoutItem(1, "+254700000711", 100)], {}, {}, {})
+    again = await engine.run("po-job", source, parse_rows(iter_lines(_chunks(data)), "csv"))
+    assert (again.next_row, again.posted, again.failed) == (8, 3, 4)
+
+
+@pytest.mark.asyncio
+async def test_second_run_of_a_running_job_is_refused():
+    ledger = LedgerClient(InMemoryLedger())
+    engine = PayoutEngine(ledger, fee_schedule=FeeSchedule([(100, 0)]))
+    async with engine._claim("po-lock"):
+        with pytest.raises(PayoutJobConflict, match="already running"):
+            await engine.run(
+                "po-lock", 1, parse_rows(iter_lines(_chunks(b"phone,amount\n")), "csv")
+            )
+    summary = await engine.run(
+        "po-lock", 1, parse_rows(iter_lines(_chunks(b"phone,amount\n")), "csv")
+    )
+    assert (summary.status, summary.posted, summary.failed) == ("DONE", 0, 0)
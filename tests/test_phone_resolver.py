@@ -0,0 +1,56 @@
+import pytest
+
+from app.db.repositories.users import (
+    add_phone_change_listener,
+    create_user,
+    remove_phone_change_listener,
+    update_phone_number,
+)
+from app.db.session import SessionLocal
+from app.services.phone_resolver import PhoneResolver
+
+
+class CountingSessions:
+    def __init__(self):
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return SessionLocal()
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_negative_cache_and_invalidation():
+    sessions = CountingSessions()
+    resolver = PhoneResolver(sessions)
+    add_phone_change_listener(resolver.invalidate)
+    try:
+        async with SessionLocal() as session:
+            merchant = await create_user(
+                session, user_id="ph1", full_name="M", phone_number="+254700000501"
+            )
+
+        resolved = await resolver.resolve_many(["+254700000501", "+254700000502", "+254700000501"])
+        assert resolved == {"+254700000501": merchant.tb_account_id, "+254700000502": None}
+        assert sessions.opened == 1
+
+        # Both the hit and the unknown number are served from the cache now.
+        assert await resolver.resolve("+254700000501") == merchant.tb_account_id
+        assert await resolver.resolve("+254700000502") is None
+        assert sessions.opened == 1
+
+        async with SessionLocal() as session:
+            agent = await create_user(
+                session, user_id="ph2", full_name="A", phone_number="+254700000502"
+            )
+            await update_phone_number(session, "ph1", "+254700000503")
+
+        resolved = await resolver.resolve_many(["+254700000501", "+254700000502", "+254700000503"])
+        assert resolved == {
+            "+254700000501": None,
+            "+254700000502": agent.tb_account_id,
+            "+254700000503": merchant.tb_account_id,
+        }
+        assert sessions.opened == 2
+    finally:
+        remove_phone_change_listener(resolver.invalidate)
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+from app.main import app
+from app.services.health import ReadinessProber
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_prober_checks_ledger_bootstrap_and_staleness():
+    ledger = InMemoryLedger()
+    clock = _Clock()
+    prober = ReadinessProber(lambda: ledger, max_staleness_s=5.0, clock=clock)
+    assert not prober.is_ready()
+
+    # Reachable but not bootstrapped: the clearing account lookup comes back empty.
+    r = await prober.probe_once()
+    assert r.postgres_ok and not r.tigerbeetle_ok
+    assert not prober.is_ready()
+
+    await ensure_system_accounts(LedgerClient(ledger))
+    r = await prober.probe_once()
+    assert r.tigerbeetle_ok and r.tigerbeetle_latency_ms >= 0
+    assert prober.is_ready()
+
+    clock.now += 6.0
+    assert not prober.is_ready()
+    await prober.stop()
+
+
+def test_ready_endpoint_answers_from_background_probe():
+    with TestClient(app) as client:
+        for _ in range(100):
+            resp = client.get("/ready")
+            if resp.json()["age_s"] is not None:
+                break
+            time.sleep(0.02)
+        body = resp.json()
+        assert body["postgres_ok"] is True
+        assert body["ready"] == (resp.status_code == 200)
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+import tigerbeetle as tb
+from sqlalchemy import delete
+
+from app.db.repositories.deposits import apply_callback, create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import MPESA_CLEARING_ACCOUNT_ID, TRANSFER_CODE_MPESA_DEPOSIT
+from app.ledger.ids import deposit_transfer_id
+from app.ledger.ledger_client import LedgerClient, TransferSpec
+from app.ledger.memory_backend import InMemoryLedger
+from app.models.deposit import Deposit
+from app.services.reconciliation import ReconcileCheckpoint, Reconciler
+from app.services.settlement import SettlementWorker
+
+
+@pytest.mark.asyncio
+async def test_reconcile_reports_each_mismatch_kind_and_resumes(tmp_path):
+    backend = InMemoryLedger()
+    ledger = LedgerClient(backend)
+    await ensure_system_accounts(ledger)
+
+    async with SessionLocal() as session:
+        user = await create_user(
+            session, user_id="rc1", full_name="A", phone_number="+254700000301"
+        )
+        for n in range(4):
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"rc1-d{n}",
+                user_id="rc1",
+                amount=100,
+                checkout_request_id=f"rc1-CR{n}",
+                merchant_request_id=None,
+            )
+    await ledger.create_account(user.tb_account_id, is_wallet=True)
+
+    # rc1-CR1 was credited with the wrong amount before settlement ran.
+    await ledger.create_transfer(
+        TransferSpec(
+            id=deposit_transfer_id("rc1-CR1"),
+            debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+            credit_account_id=user.tb_account_id,
+            amount=90,
+            code=TRANSFER_CODE_MPESA_DEPOSIT,
+        )
+    )
+
+    async def succeed(cid):
+        async with SessionLocal() as session:
+            await apply_callback(
+                session, checkout_request_id=cid, status="SUCCESS", receipt=None, payload={}
+            )
+
+    await succeed("rc1-CR0")
+    await succeed("rc1-CR1")
+    await SettlementWorker(ledger, batch_size=100, max_attempts=1).run_once()
+    # rc1-d0's partition has since been archived; its credit is not an orphan.
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(delete(Deposit).where(Deposit.id == "rc1-d0"))
+    # rc1-CR2 turned SUCCESS but has not been credited yet.
+    await succeed("rc1-CR2")
+
+    # A deposit-coded credit nobody asked for.
+    orphan_id = tb.id()
+    await ledger.create_transfer(
+        TransferSpec(
+            id=orphan_id,
+            debit_account_id=MPESA_CLEARING_ACCOUNT_ID,
+            credit_account_id=user.tb_account_id,
+            amount=5,
+            code=TRANSFER_CODE_MPESA_DEPOSIT,
+        )
+    )
+
+    output = tmp_path / "out.ndjson"
+    checkpoint_path = str(tmp_path / "cp.json")
+    with open(output, "w") as out:
+        checkpoint = await Reconciler(backend, page_size=2).run(
+            out, ReconcileCheckpoint(), checkpoint_path
+        )
+    assert checkpoint.phase == "done"
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    mine = {
+        r.get("checkout_request_id") or r["transfer_id"]: r["kind"]
+        for r in records
+        if r.get("checkout_request_id", "").startswith("rc1-") or r["kind"] == "orphan"
+    }
+    assert mine["rc1-CR1"] == "amount_mismatch"
+    assert mine["rc1-CR2"] == "missing"
+    assert next(r for r in records if r.get("checkout_request_id") == "rc1-CR2")["settled"] is False
+    assert mine[str(orphan_id)] == "orphan"
+    assert "rc1-CR0" not in mine and "rc1-CR3" not in mine
+    assert str(deposit_transfer_id("rc1-CR0")) not in mine
+
+    # A finished checkpoint resumes to a no-op.
+    saved = ReconcileCheckpoint.load(checkpoint_path)
+    assert saved.output_offset == output.stat().st_size
+    with open(output, "a") as out:
+        again = await Reconciler(backend, page_size=2).run(out, saved, checkpoint_path)
+    assert again.mismatches == checkpoint.mismatches
@@ -1,13 +1,18 @@
 import pytest
+from sqlalchemy import select
 
 from app.db.repositories.deposits import (
+    DepositNotFoundError,
     DuplicateCheckoutRequestIDError,
+    apply_callback,
     create_deposit_attempt,
     store_callback_payload,
     update_deposit_status,
 )
 from app.db.repositories.users import DuplicatePhoneError, create_user
 from app.db.session import SessionLocal
+from app.db.types import UInt128Bytes
+from app.models.deposit import Deposit
 
 
 @pytest.mark.asyncio
@@ -58,4 +63,47 @@ async def test_update_deposit_status_and_store_callback():
         )
 
         await store_callback_payload(session, checkout_request_id="CR2", payload={"ResultCode": 0})
-        await update_deposit_status(session, checkout_request_id="CR2", status="SUCCESS", receipt="RCP123")
\ No newline at end of file
+        await update_deposit_status(session, checkout_request_id="CR2", status="SUCCESS", receipt="RCP123")
+
+@pytest.mark.asyncio
+async def test_apply_callback_is_single_shot_for_terminal_status():
+    async with SessionLocal() as session:
+        await create_user(session, user_id="u5", full_name="A", phone_number="+254700000004")
+        await create_deposit_attempt(
+            session,
+            deposit_id="d5",
+            user_id="u5",
+            amount=300,
+            checkout_request_id="CR5",
+            merchant_request_id=None,
+        )
+
+        assert await apply_callback(
+            session, checkout_request_id="CR5", status="SUCCESS", receipt="R5", payload={"n": 1}
+        )
+        assert not await apply_callback(
+            session, checkout_request_id="CR5", status="FAILED", receipt=None, payload={"n": 2}
+        )
+
+        with pytest.raises(DepositNotFoundError):
+            await apply_callback(
+                session, checkout_request_id="missing", status="SUCCESS", receipt=None, payload={}
+            )
+
+        dep = await session.scalar(select(Deposit).where(Deposit.checkout_request_id == "CR5"))
+        assert (dep.status, dep.receipt) == ("SUCCESS", "R5")
+        # Both payloads are kept in the callback log, the duplicate included.
+        callbacks = await dep.awaitable_attrs.callbacks
+        assert [(c.status, c.payload) for c in callbacks] == [
+            ("SUCCESS", {"n": 1}),
+            ("FAILED", {"n": 2}),
+        ]
+        assert "raw_callback_json" not in dep.__dict__  # deferred
+
+
+def test_uint128_bytes_round_trip_keeps_order():
+    t = UInt128Bytes()
+    values = [1, 255, 256, 2**64, 2**128 - 2]
+    encoded = [t.process_bind_param(v, None) for v in values]
+    assert [t.process_result_value(b, None) for b in encoded] == values
+    assert encoded == sorted(encoded) and all(len(b) == 16 for b in encoded)
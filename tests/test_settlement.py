@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+
+from app.db.repositories.deposits import apply_callback, create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import InMemoryLedger
+from app.models.deposit_outbox import DepositOutbox
+from app.services.settlement import SettlementWorker
+
+
+async def _successful_deposits(user_id: str, phone: str, amounts: list[int]) -> int:
+    async with SessionLocal() as session:
+        user = await create_user(session, user_id=user_id, full_name="A", phone_number=phone)
+        for n, amount in enumerate(amounts):
+            cid = f"{user_id}-CR{n}"
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"{user_id}-d{n}",
+                user_id=user_id,
+                amount=amount,
+                checkout_request_id=cid,
+                merchant_request_id=None,
+            )
+            await apply_callback(
+                session, checkout_request_id=cid, status="SUCCESS", receipt=None, payload={}
+            )
+    return user.tb_account_id
+
+
+@pytest.mark.asyncio
+async def test_parallel_workers_credit_each_deposit_once():
+    account_id = await _successful_deposits("st1", "+254700000201", [100, 250, 650])
+    ledger = LedgerClient(InMemoryLedger())
+    await ensure_system_accounts(ledger)
+
+    workers = [SettlementWorker(ledger, batch_size=2, max_attempts=3) for _ in range(3)]
+    while True:
+        results = await asyncio.gather(*(w.run_once() for w in workers))
+        if not any(r.claimed for r in results):
+            break
+
+    account = await ledger.lookup_account(account_id)
+    assert account.credits_posted == 1000
+
+    # A crash after posting but before marking the row: the re-post hits EXISTS.
+    async with SessionLocal() as session:
+        async with session.begin():
+            await session.execute(
+                update(DepositOutbox)
+                .where(DepositOutbox.deposit_id.like("st1-%"))
+                .values(processed_at=None)
+            )
+    result = await SettlementWorker(ledger, batch_size=100, max_attempts=3).run_once()
+    assert result.posted >= 3 and result.failed == 0
+    assert (await ledger.lookup_account(account_id)).credits_posted == 1000
+
+    async with SessionLocal() as session:
+        pending = await session.scalar(
+            select(DepositOutbox.id).where(DepositOutbox.processed_at.is_(None))
+        )
+        assert pending is None
+
+
+@pytest.mark.asyncio
+async def test_worker_creates_the_clearing_account_before_posting():
+    account_id = await _successful_deposits("st3", "+254700000203", [40])
+    ledger = LedgerClient(InMemoryLedger())
+
+    while (await SettlementWorker(ledger, batch_size=100, max_attempts=1).run_once()).claimed:
+        pass
+    assert (await ledger.lookup_account(account_id)).credits_posted == 40
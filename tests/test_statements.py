@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+
+import pytest
+import tigerbeetle as tb
+from fastapi.testclient import TestClient
+
+from app.db.repositories.deposits import apply_callback, create_deposit_attempt
+from app.db.repositories.users import create_user
+from app.db.session import SessionLocal
+from app.ledger.bootstrap import ensure_system_accounts
+from app.ledger.constants import FEES_REVENUE_ACCOUNT_ID, LEDGER_KES, TRANSFER_CODE_P2P_FEE
+from app.ledger.ledger_client import LedgerClient
+from app.ledger.memory_backend import get_memory_ledger
+from app.main import app
+from app.services.deposit_holds import DepositHolds, HoldRequest
+from app.services.settlement import SettlementWorker
+from app.services.statements import StatementExporter
+
+
+async def _wallet_with_history(user_id: str, phone: str) -> int:
+    async with SessionLocal() as session:
+        user = await create_user(session, user_id=user_id, full_name="A", phone_number=phone)
+        for n, amount in enumerate([100, 250]):
+            cid = f"{user_id}-CR{n}"
+            await create_deposit_attempt(
+                session,
+                deposit_id=f"{user_id}-d{n}",
+                user_id=user_id,
+                amount=amount,
+                checkout_request_id=cid,
+                merchant_request_id=None,
+            )
+            await apply_callback(
+                session, checkout_request_id=cid, status="SUCCESS", receipt=f"R{n}", payload={}
+            )
+
+    ledger = LedgerClient(get_memory_ledger())
+    await ensure_system_accounts(ledger)
+    while (await SettlementWorker(ledger, batch_size=100, max_attempts=3).run_once()).claimed:
+        pass
+    await get_memory_ledger().create_transfers(
+        [
+            tb.Transfer(
+                id=tb.id(),
+                debit_account_id=user.tb_account_id,
+                credit_account_id=FEES_REVENUE_ACCOUNT_ID,
+                amount=30,
+                ledger=LEDGER_KES,
+                code=TRANSFER_CODE_P2P_FEE,
+            )
+        ]
+    )
+    return user.tb_account_id
+
+
+@pytest.mark.asyncio
+async def test_exporter_pages_history_and_enriches_deposits():
+    account_id = await _wallet_with_history("sm1", "+254700000601")
+
+    exporter = StatementExporter(get_memory_ledger(), page_size=1)
+    pages = [page async for page in exporter.pages(account_id)]
+
+    assert [len(p) for p in pages] == [1, 1, 1]
+    records = [r for p in pages for r in p]
+    assert [(r["direction"], r["amount"], r["deposit_id"], r["receipt"]) for r in records] == [
+        ("credit", 100, "sm1-d0", "R0"),
+        ("credit", 250, "sm1-d1", "R1"),
+        ("debit", 30, None, None),
+    ]
+    assert records[0]["timestamp"] < records[1]["timestamp"] < records[2]["timestamp"]
+
+
+@pytest.mark.asyncio
+async def test_held_deposit_is_listed_once():
+    async with SessionLocal() as session:
+        user = await create_user(
+            session, user_id="sm3", full_name="A", phone_number="+254700000803"
+        )
+        await create_deposit_attempt(
+            session,
+            deposit_id="sm3-d0",
+            user_id="sm3",
+            amount=500,
+            checkout_request_id="sm3-CR0",
+            merchant_request_id=None,
+        )
+    ledger = LedgerClient(get_memory_ledger())
+    await ensure_system_accounts(ledger)
+    holds = DepositHolds(ledger, timeout_s=600)
+    assert await holds.place([HoldRequest("sm3-d0", "sm3-CR0", user.tb_account_id, 500)]) == {}
+    async with SessionLocal() as session:
+        await apply_callback(
+            session, checkout_request_id="sm3-CR0", status="SUCCESS", receipt="R9", payload={}
+        )
+    # Credits the deposit by posting its hold.
+    while (await SettlementWorker(ledger, batch_size=100, max_attempts=3).run_once()).claimed:
+        pass
+
+    exporter = StatementExporter(get_memory_ledger(), page_size=1)
+    records = [r async for page in exporter.pages(user.tb_account_id) for r in page]
+    assert [(r["direction"], r["amount"], r["deposit_id"]) for r in records] == [
+        ("credit", 500, "sm3-d0")
+    ]
+    account = await ledger.lookup_account(user.tb_account_id)
+    assert (account.credits_pending, account.credits_posted) == (0, 500)
+
+
+@pytest.mark.asyncio
+async def test_statement_endpoint_streams_ndjson_and_csv():
+    await _wallet_with_history("sm2", "+254700000602")
+    client = TestClient(app)
+
+    resp = client.get("/users/sm2/statement")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["checkout_request_id"] for r in lines] == ["sm2-CR0", "sm2-CR1", None]
+
+    resp = client.get("/users/sm2/statement", params={"format": "csv"})
+    assert resp.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [(r["direction"], r["amount"]) for r in rows] == [
+        ("credit", "100"),
+        ("credit", "250"),
+        ("debit", "30"),
+    ]
+
+    assert client.get("/users/nobody/statement").status_code == 404